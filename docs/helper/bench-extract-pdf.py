@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Benchmark extract-pdf.py on synthetic PDFs
+
+Usage:
+    python bench-extract-pdf.py [--pages 20] [--repeat 3] [--workers 1]
+                                [--doc text|images|mixed] [--mode raster|embedded|incremental]
+    python bench-extract-pdf.py --save-baseline      # record this machine's numbers
+    python bench-extract-pdf.py --json results.json  # also write the results
+
+Example:
+    python docs/helper/bench-extract-pdf.py --pages 50 --doc images --mode raster --mode embedded
+
+The documents the helper is pointed at are large and private, so this script writes
+its own: three PDFs of --pages pages each, built from scratch with no PDF library.
+
+  text    - 60 lines of text per page, no images
+  images  - a few lines of text, a logo repeated on every page, four distinct pixel
+            images and a JPEG photo per page
+  mixed   - 40 lines of text, the logo and one distinct pixel image per page
+
+Every document is extracted in every mode, each run in its own process with
+--profile, and the median of --repeat runs is reported with its pages per second,
+the split between text, image rendering and image saving, and the peak RSS:
+
+  raster       - extract-pdf.py as is: every image rendered from the page
+  embedded     - --images embedded
+  incremental  - --incremental over the journal of an earlier run of the same document
+
+Results are compared against a stored baseline; a run slower than the baseline by more
+than --tolerance fails, so a regression shows up before the next large document does.
+The baseline lives in .build-cache/bench-extract-pdf.json by default. Timings are only
+comparable on the machine that recorded them, so it is never committed.
+
+Requirements:
+    pip install pdfplumber pillow
+"""
+
+import argparse
+import io
+import json
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import zlib
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:
+    print("Error: Required packages not installed. Run: python -m pip install pdfplumber pillow")
+    sys.exit(1)
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+EXTRACT_SCRIPT = Path(__file__).resolve().parent / "extract-pdf.py"
+DEFAULT_BASELINE = REPO_ROOT / ".build-cache" / "bench-extract-pdf.json"
+
+# name -> (text lines, distinct pixel images, JPEG photos, draw the logo) per page
+DOCS = {
+    "text": (60, 0, 0, False),
+    "images": (5, 4, 1, True),
+    "mixed": (40, 1, 0, True),
+}
+MODES = ("raster", "embedded", "incremental")
+
+_WORDS = ("problem", "need", "requirement", "customer", "system", "shall", "trace", "stakeholder")
+
+
+def _image_xobject(width: int, height: int, data: bytes, filters: str) -> bytes:
+    return (
+        b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB "
+        b"/BitsPerComponent 8 /Filter /%s /Length %d >>\nstream\n"
+        % (width, height, filters.encode(), len(data))
+    ) + data + b"\nendstream"
+
+
+def write_pdf(path: Path, pages: int, text_lines: int, pixel_images: int, photos: int,
+              logo: bool, seed: int = 1) -> None:
+    """Write a `pages`-page PDF with the given text and images on every page.
+
+    Pixel images are 8-bit RGB Flate streams, photos are JPEG (DCT) streams, and the
+    logo is one image object shared by every page, as a letterhead would be.
+    """
+    rnd = random.Random(seed)
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pixels = bytes((x * 8) % 256 for y in range(32) for x in range(32) for _ in range(3))
+    logo_id = add(_image_xobject(32, 32, zlib.compress(pixels), "FlateDecode"))
+    pages_id = add(b"")  # filled in once the page objects exist
+    page_ids = []
+    for page in range(pages):
+        xobjects = {b"Logo": logo_id} if logo else {}
+        ops = [b"BT /F1 10 Tf 50 780 Td 12 TL"]
+        for line in range(text_lines):
+            words = " ".join(rnd.choice(_WORDS) for _ in range(10))
+            ops.append(b"(Page %d line %d %s) '" % (page + 1, line + 1, words.encode()))
+        ops.append(b"ET")
+        if logo:
+            ops.append(b"q 64 0 0 64 480 700 cm /Logo Do Q")
+        for index in range(pixel_images):
+            pixels = bytes(rnd.randrange(256) for _ in range(16 * 16 * 3))
+            name = b"Im%d" % index
+            xobjects[name] = add(_image_xobject(16, 16, zlib.compress(pixels), "FlateDecode"))
+            ops.append(b"q 48 0 0 48 %d 100 cm /%s Do Q" % (60 + 60 * index, name))
+        for index in range(photos):
+            photo = Image.new("RGB", (96, 64), tuple(rnd.randrange(256) for _ in range(3)))
+            photo.putdata([(x * 2, y * 3, rnd.randrange(256))
+                           for y in range(64) for x in range(96)])
+            jpeg = io.BytesIO()
+            photo.save(jpeg, format="JPEG", quality=85)
+            name = b"Ph%d" % index
+            xobjects[name] = add(_image_xobject(96, 64, jpeg.getvalue(), "DCTDecode"))
+            ops.append(b"q 144 0 0 96 %d 200 cm /%s Do Q" % (60 + 160 * index, name))
+        content = b"\n".join(ops)
+        contents = add(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        resources = b" ".join(b"/%s %d 0 R" % (name, ref) for name, ref in xobjects.items())
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> /XObject << %s >> >> >>"
+            % (pages_id, contents, font, resources)
+        ))
+    kids = b" ".join(b"%d 0 R" % ref for ref in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref)
+    path.write_bytes(bytes(out))
+
+
+def run_mode(pdf: Path, work: Path, mode: str, workers: int, repeat: int) -> dict:
+    """Extract `pdf` in `mode` `repeat` times, each in a fresh process; return the median run."""
+    command = [sys.executable, "-B", str(EXTRACT_SCRIPT), str(pdf), str(work / "out.md"),
+               "--workers", str(workers)]
+    if mode == "embedded":
+        command += ["--images", "embedded"]
+    if mode == "incremental":
+        command += ["--incremental"]
+        # The journal every timed run reuses; this run is not timed.
+        subprocess.run(command, capture_output=True, text=True, check=True)
+    reports = []
+    for _ in range(repeat):
+        if mode != "incremental":
+            shutil.rmtree(work, ignore_errors=True)
+            work.mkdir(parents=True)
+        profile = work / "profile.json"
+        child = subprocess.run(command + ["--profile", str(profile)], capture_output=True,
+                               text=True)
+        if child.returncode != 0:
+            raise RuntimeError(f"{pdf.name} {mode} failed:\n{child.stdout}{child.stderr}")
+        reports.append(json.loads(profile.read_text(encoding="utf-8")))
+    median = statistics.median(report["wall_s"] for report in reports)
+    report = min(reports, key=lambda r: abs(r["wall_s"] - median))
+    rss = report["peak_rss_kb"] or {}
+    return {
+        "seconds": [r["wall_s"] for r in reports],
+        "median": median,
+        "pages_per_s": report["pages"] / median if median else None,
+        "totals_s": report["totals_s"],
+        "extracted": report["extracted"],
+        "peak_rss_kb": max(filter(None, (rss.get("self"), rss.get("workers"))), default=None),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, floor: float) -> list:
+    """The runs whose median is slower than the baseline's by more than `tolerance`.
+
+    A run must also be slower by at least `floor` seconds: a text-only document that takes
+    60 ms instead of 40 ms is scheduler noise, not a regression.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("runs", {}).get(name)
+        if not before:
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else 1.0
+        result["vs_baseline"] = ratio
+        if ratio > 1 + tolerance and result["median"] - before["median"] >= floor:
+            regressions.append(
+                f"{name}: {result['median']:.2f} s vs baseline {before['median']:.2f} s "
+                f"({(ratio - 1) * 100:+.0f}%)"
+            )
+    return regressions
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark extract-pdf.py on synthetic PDFs")
+    parser.add_argument("--pages", type=int, default=20, help="pages per document")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="passed to extract-pdf.py")
+    parser.add_argument("--doc", action="append", choices=list(DOCS), help="only these documents")
+    parser.add_argument("--mode", action="append", choices=MODES, help="only these modes")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="record as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown ratio")
+    parser.add_argument("--floor-ms", type=float, default=50.0,
+                        help="ignore slowdowns smaller than this")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the generated PDFs and output")
+    args = parser.parse_args(argv)
+    if args.repeat < 1 or args.pages < 1 or args.workers < 1:
+        parser.error("--pages, --repeat and --workers must be at least 1")
+
+    sizes = {"pages": args.pages, "workers": args.workers}
+    root = Path(tempfile.mkdtemp(prefix="bench-extract-pdf-"))
+    results = {}
+    try:
+        for doc in args.doc or DOCS:
+            pdf = root / f"{doc}.pdf"
+            write_pdf(pdf, args.pages, *DOCS[doc])
+            for mode in args.mode or MODES:
+                results[f"{doc}/{mode}"] = run_mode(pdf, root / doc / mode, mode, args.workers,
+                                                    args.repeat)
+    except RuntimeError as e:
+        print(f"[bench] {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.keep:
+            print(f"[bench] documents kept at {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    baseline_path = Path(args.baseline)
+    try:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        baseline = {}
+    if baseline.get("sizes") not in (None, sizes):
+        print(f"[bench] baseline {baseline_path} was recorded for other sizes — not compared")
+        baseline = {}
+    regressions = compare(results, baseline, args.tolerance, args.floor_ms / 1000)
+
+    print(f"[bench] {args.pages} pages per document, workers {args.workers}, "
+          f"median of {args.repeat}")
+    for name, result in results.items():
+        totals = result["totals_s"]
+        rss = f"{result['peak_rss_kb'] / 1024:.1f} MiB" if result["peak_rss_kb"] else "n/a"
+        # pages_per_s is None for a run the profile timed at zero seconds.
+        rate = result["pages_per_s"]
+        rate = f"{rate:7.1f}" if rate is not None else f"{'n/a':>7}"
+        versus = ""
+        if "vs_baseline" in result:
+            versus = f", {(result['vs_baseline'] - 1) * 100:+.0f}% vs baseline"
+        print(
+            f"[bench] {name:<20} {result['median']:7.2f} s {rate} pages/s"
+            f"  text {totals['text']:6.2f} raster {totals['raster']:6.2f} "
+            f"save {totals['save']:6.2f}  peak RSS {rss}{versus}"
+        )
+
+    report = {"sizes": sizes, "python": sys.version.split()[0], "runs": results}
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[bench] baseline saved to {baseline_path}")
+    elif regressions:
+        print("::error::benchmark regression:\n  - " + "\n  - ".join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
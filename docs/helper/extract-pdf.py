@@ -3,89 +3,546 @@
 PDF to Markdown Extractor with Image Extraction
 
 Usage:
-    python extract-pdf.py <input_pdf> <output_md> [--img-dir <img_directory>]
+    python extract-pdf.py <input_pdf> <output_md> [--img-dir <img_directory>] [--workers N]
+                          [--images raster|embedded] [--pages RANGES] [--incremental]
+                          [--profile [FILE]]
 
 Example:
     python extract-pdf.py docs/document.pdf docs/output.md --img-dir docs/img
+    python extract-pdf.py docs/document.pdf docs/output.md --workers 8
+    python extract-pdf.py docs/document.pdf docs/output.md --images embedded
+    python extract-pdf.py docs/document.pdf docs/output.md --pages 1-20,35 --incremental
 
 This script extracts text and images from a PDF file, creating a markdown
-file with embedded image references.
+file with embedded image references. With --workers N the pages are split
+into ranges extracted on N processes, each with its own pdfplumber handle,
+and merged back in page order: the markdown is identical to a serial run.
+--images embedded writes JPEG/JPEG 2000 streams as stored and simple pixel
+formats as lossless PNGs instead of re-rendering every image from the page,
+and names files by content hash so a repeated image is written once.
+
+--pages writes only the pages selected: the output replaces whatever
+<output_md> held, it is not merged into it.
+
+With --incremental, every extracted page is recorded in a journal beside the
+output (<output_md>.journal.jsonl) keyed by a hash of the page's content and
+image streams, and pages whose hash is in the journal and whose image files
+still exist are taken from it instead of being extracted again: re-running on
+a revised PDF redoes only the pages that changed, and re-running after a crash
+picks up where the crashed run stopped. Without it no page is hashed and no
+journal is written.
+--profile reports the time spent per page on text, image rendering and image
+saving, the throughput in pages per second and the peak memory.
 
 Requirements:
     pip install pdfplumber pillow
 """
 
 import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import io
+import json
 import os
 import sys
+import time
 from pathlib import Path
 
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, so no peak RSS
+    resource = None
+
 try:
     import pdfplumber
+    from pdfminer import pdftypes
     from PIL import Image
 except ImportError:
     print("Error: Required packages not installed. Run: python -m pip install pdfplumber pillow")
     sys.exit(1)
 
 
-def extract_pdf_to_markdown(pdf_path: str, output_md: str, img_dir: str = None) -> None:
-    """Extract PDF content to markdown with images."""
-    
+IMAGE_MODES = ("raster", "embedded")
+
+# Filters pdfminer fully decodes to raw pixels.
+_PIXEL_FILTERS = (
+    pdftypes.LITERALS_FLATE_DECODE + pdftypes.LITERALS_LZW_DECODE
+    + pdftypes.LITERALS_ASCII85_DECODE + pdftypes.LITERALS_ASCIIHEX_DECODE
+    + pdftypes.LITERALS_RUNLENGTH_DECODE
+)
+# (colour space, bits per component) -> Pillow mode, for the pixel layouts PNG holds as is.
+_PIXEL_MODES = {("DeviceRGB", 8): "RGB", ("DeviceGray", 8): "L", ("DeviceGray", 1): "1"}
+
+
+def _embedded_image(img_info: dict):
+    """The bytes to write for an image as embedded, with their extension, or None.
+
+    JPEG and JPEG 2000 streams are written exactly as stored: no decoding, no loss. 8-bit
+    RGB or grayscale and 1-bit grayscale pixels are decoded and saved as a lossless PNG at
+    their own resolution. Anything else (CMYK, indexed colour, masks, a Decode array...)
+    returns None and is rasterized from the page instead.
+    """
+    stream = img_info["stream"]
+    if any(stream.get(key) is not None for key in ("SMask", "Mask", "ImageMask", "Decode")):
+        return None
+    filters = [name for name, _ in stream.get_filters()]
+    if len(filters) == 1 and filters[0] in pdftypes.LITERALS_DCT_DECODE:
+        return stream.get_rawdata(), ".jpg"
+    if len(filters) == 1 and filters[0] in pdftypes.LITERALS_JPX_DECODE:
+        return stream.get_rawdata(), ".jp2"
+    if not all(name in _PIXEL_FILTERS for name in filters):
+        return None
+    colorspace = img_info.get("colorspace") or [None]
+    mode = _PIXEL_MODES.get((getattr(colorspace[0], "name", None), img_info.get("bits")))
+    if mode is None or len(colorspace) != 1:
+        return None
+    width, height = img_info["srcsize"]
+    row = width * 3 if mode == "RGB" else width if mode == "L" else (width + 7) // 8
+    data = stream.get_data()
+    if len(data) < row * height:
+        return None
+    out = io.BytesIO()
+    Image.frombytes(mode, (width, height), data[:row * height]).save(out, format="PNG")
+    return out.getvalue(), ".png"
+
+
+def _save_unique(data: bytes, ext: str, pdf_name: str, img_path: Path) -> Path:
+    """Write `data` under a name derived from its SHA-256, unless that file already exists.
+
+    A logo on every page is written once and every reference points at that one file.
+    Content-derived names make this safe across --workers processes without coordination:
+    two writers of one name write the same bytes, each through its own temporary file.
+    """
+    image_filepath = img_path / f"{pdf_name}_{hashlib.sha256(data).hexdigest()[:16]}{ext}"
+    if not image_filepath.exists():
+        tmp = image_filepath.with_name(f"{image_filepath.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, image_filepath)
+    return image_filepath
+
+
+def _extract_page(page, page_num: int, pdf_name: str, img_path: Path, output_dir: Path,
+                  image_mode: str = "raster") -> dict:
+    """Extract one page: its text, and each of its images saved to `img_path`.
+
+    In "raster" mode every image is cropped from the page and rendered to a PNG at 150
+    dpi, one file per image per page. In "embedded" mode the image's own stream is
+    written where it can be (_embedded_image), only the rest is rasterized, and every
+    file is named by its content, so a repeated image is stored once.
+
+    Returns the page's result rather than markdown, so pages extracted out of order (on
+    worker processes) can still be numbered and written in page order. Its "timings" are
+    the seconds spent on the text (which includes parsing the page's layout), on getting
+    each image's pixels or bytes (rendering, or decoding its stream) and on encoding and
+    writing the image files; --profile reports them.
+    """
+    result = {"page": page_num, "text": None, "images": [], "warnings": [],
+              "timings": {"text": 0.0, "raster": 0.0, "save": 0.0}}
+    timings = result["timings"]
+
+    # Extract text
+    started = time.perf_counter()
+    text = page.extract_text()
+    if text and text.strip():
+        result["text"] = text
+    timings["text"] = time.perf_counter() - started
+
+    # Extract images
+    if hasattr(page, 'images') and page.images:
+        for img_index, img_info in enumerate(page.images):
+            started = time.perf_counter()
+            try:
+                embedded = _embedded_image(img_info) if image_mode == "embedded" else None
+                if embedded is not None:
+                    rendered = time.perf_counter()
+                    image_filepath = _save_unique(*embedded, pdf_name, img_path)
+                else:
+                    # Get image bounding box and extract
+                    x0, top, x1, bottom = img_info['x0'], img_info['top'], img_info['x1'], img_info['bottom']
+
+                    # Crop the image from page
+                    cropped = page.crop((x0, top, x1, bottom))
+                    img = cropped.to_image(resolution=150)
+                    rendered = time.perf_counter()
+
+                    if image_mode == "embedded":
+                        out = io.BytesIO()
+                        img.save(out, format="PNG")
+                        image_filepath = _save_unique(out.getvalue(), ".png", pdf_name, img_path)
+                    else:
+                        image_filename = f"{pdf_name}_page{page_num}_img{img_index + 1}.png"
+                        image_filepath = img_path / image_filename
+                        img.save(str(image_filepath), format="PNG")
+
+                timings["raster"] += rendered - started
+                timings["save"] += time.perf_counter() - rendered
+                rel_img_path = os.path.relpath(image_filepath, output_dir)
+                result["images"].append(rel_img_path.replace("\\", "/"))  # Normalize for markdown
+
+            except Exception as e:
+                result["warnings"].append(
+                    f"Warning: Could not extract image {img_index + 1} from page {page_num}: {e}"
+                )
+
+    return result
+
+
+def _extract_range(pdf_path: str, page_nums: list, pdf_name: str, img_path: Path,
+                   output_dir: Path, image_mode: str = "raster") -> list:
+    """Extract the pages `page_nums` (1-based) through a pdfplumber handle of its own.
+
+    The unit of work for --workers: pdfplumber handles cannot cross process boundaries,
+    so every shard opens the file itself.
+    """
+    results = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num in page_nums:
+            page = pdf.pages[page_num - 1]
+            results.append(
+                _extract_page(page, page_num, pdf_name, img_path, output_dir, image_mode)
+            )
+            _release_page(pdf, page)
+    return results
+
+
+def _release_page(pdf, page) -> None:
+    """Drop everything pdfplumber and pdfminer keep for a page once it has been extracted.
+
+    pdfplumber caches each page's layout objects (chars, lines, rects...) until the page is
+    closed, and pdfminer caches every object it resolves, decoded content streams included,
+    for as long as the document is open. Without this, memory grows with the page count
+    instead of staying at the size of the largest page.
+    """
+    page.close()
+    resolved = getattr(pdf.doc, "_cached_objs", None)  # pdfminer internals; absent, skip
+    if resolved is not None:
+        for ref in page.page_obj.contents:
+            resolved.pop(getattr(ref, "objid", None), None)
+
+
+def _write_page(md_file, result: dict, image_counter: int) -> int:
+    """Append one page's markdown to `md_file`, numbering its images from `image_counter`."""
+    for warning in result["warnings"]:
+        print(warning)
+    if result["text"]:
+        md_file.write(f"\n<!-- Page {result['page']} -->\n")
+        md_file.write(result["text"] + "\n")
+    for rel_img_path in result["images"]:
+        image_counter += 1
+        md_file.write(f"\n![Image {image_counter}]({rel_img_path})\n")
+    return image_counter
+
+
+def _shards(page_nums: list, workers: int) -> list:
+    """Split `page_nums` into consecutive runs of pages for `workers` processes.
+
+    A few runs per worker, so one slow stretch of pages (a run of scanned figures) does
+    not leave the other workers idle at the end.
+    """
+    size = max(1, -(-len(page_nums) // (workers * 4)))
+    return [page_nums[start:start + size] for start in range(0, len(page_nums), size)]
+
+
+def _parse_pages(spec: str) -> list:
+    """Parse a --pages value such as "1-20,35,40-" into (first, last) pairs.
+
+    `last` is None for an open range ("40-" runs to the end of the document).
+    """
+    ranges = []
+    for part in spec.split(","):
+        first, dash, last = part.strip().partition("-")
+        try:
+            first = int(first)
+            last = (int(last) if last else None) if dash else first
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"not a page range: {part.strip()!r}")
+        if first < 1 or (last is not None and last < first):
+            raise argparse.ArgumentTypeError(f"not a page range: {part.strip()!r}")
+        ranges.append((first, last))
+    return ranges
+
+
+def _select_pages(ranges: list, page_count: int) -> list:
+    """The sorted page numbers `ranges` covers in a document of `page_count` pages."""
+    selected = set()
+    for first, last in ranges:
+        last = page_count if last is None else last
+        if last > page_count:
+            raise ValueError(f"--pages asks for page {last}, but the PDF has {page_count}")
+        selected.update(range(first, last + 1))
+    return sorted(selected)
+
+
+def _page_key(pdf, page, salt: bytes) -> str:
+    """A hash of everything a page's extracted output depends on.
+
+    Covers the page's size, its content streams and the raw data of every XObject it
+    draws (images, and forms with whatever those draw in turn), plus `salt` for the
+    settings that shape the output. Fonts are not hashed: a revision that only swaps a
+    font's program but not the text drawn with it is taken as unchanged. The objects
+    resolved on the way are dropped from pdfminer's cache again, as in _release_page.
+    """
+    digest = hashlib.sha256(salt)
+    digest.update(repr(page.page_obj.attrs.get("MediaBox")).encode())
+    resolved = []
+    for stream in page.page_obj.contents:
+        digest.update(pdftypes.resolve1(stream).get_rawdata() or b"")
+        resolved.append(getattr(stream, "objid", None))
+    pending, seen = [page.page_obj.resources], set()
+    while pending:
+        xobjects = pdftypes.dict_value(pdftypes.dict_value(pending.pop()).get("XObject"))
+        for name in sorted(xobjects):
+            ref = xobjects[name]
+            objid = getattr(ref, "objid", None)
+            if objid is not None and objid in seen:
+                continue
+            seen.add(objid)
+            resolved.append(objid)
+            xobject = pdftypes.resolve1(ref)
+            if isinstance(xobject, pdftypes.PDFStream):
+                digest.update(name.encode() + b"\0" + (xobject.get_rawdata() or b""))
+                if xobject.get("Resources") is not None:
+                    pending.append(xobject.get("Resources"))
+    cache = getattr(pdf.doc, "_cached_objs", None)  # pdfminer internals; absent, skip
+    if cache is not None:
+        for objid in resolved:
+            cache.pop(objid, None)
+    return digest.hexdigest()
+
+
+def _journal_path(output_md: str) -> Path:
+    return Path(f"{output_md}.journal.jsonl")
+
+
+def _load_journal(journal: Path, output_dir: Path) -> dict:
+    """Map page key -> result for every journaled page whose image files still exist.
+
+    Unreadable lines are skipped: the last one may have been cut off by a crash.
+    """
+    reusable = {}
+    if not journal.exists():
+        return reusable
+    with open(journal, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+                key, result = entry["key"], entry["result"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            if all((output_dir / rel).is_file() for rel in result["images"]):
+                reusable[key] = result
+    return reusable
+
+
+def _compact_journal(journal: Path, current: dict) -> None:
+    """Rewrite the journal with one entry per page: this run's, or the latest before it.
+
+    Pages outside this run's --pages selection keep their entries, so extracting a
+    document in several ranges still builds up one journal for all of it.
+    """
+    latest = {}
+    with open(journal, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+                latest[entry["page"]] = entry
+            except (ValueError, KeyError, TypeError):
+                continue
+    latest.update(current)
+    partial = journal.with_name(journal.name + ".part")
+    with open(partial, "w", encoding="utf-8") as handle:
+        for page_num in sorted(latest):
+            handle.write(json.dumps(latest[page_num], sort_keys=True) + "\n")
+    os.replace(partial, journal)
+
+
+def _peak_rss_kb(who) -> int:
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _profile_report(profiled: list, wall: float, page_count: int, workers: int,
+                    image_mode: str) -> dict:
+    """The --profile report: per-page timings, their totals, throughput and peak memory.
+
+    Pages reused by --incremental were not extracted and have no timings. With workers,
+    per-page seconds are the workers' and add up to more than the wall time; the peak
+    RSS of the largest worker is reported beside this process's.
+    """
+    totals = {phase: sum(page[phase] for page in profiled) for phase in ("text", "raster", "save")}
+    return {
+        "pages": page_count,
+        "extracted": len(profiled),
+        "workers": workers,
+        "image_mode": image_mode,
+        "wall_s": wall,
+        "pages_per_s": page_count / wall if wall else None,
+        "totals_s": totals,
+        "peak_rss_kb": None if resource is None else {
+            "self": _peak_rss_kb(resource.RUSAGE_SELF),
+            "workers": _peak_rss_kb(resource.RUSAGE_CHILDREN) if workers > 1 else None,
+        },
+        "per_page": profiled,
+    }
+
+
+def _print_profile(report: dict) -> None:
+    rate = report["pages_per_s"]
+    rate = f"{rate:.1f}" if rate is not None else "n/a"
+    print(f"Profile: {report['pages']} pages ({report['extracted']} extracted) in "
+          f"{report['wall_s']:.2f} s, {rate} pages/s, "
+          f"workers {report['workers']}, images {report['image_mode']}")
+    spent = sum(report["totals_s"].values()) or 1.0
+    for phase, seconds in report["totals_s"].items():
+        print(f"  {phase:<7}{seconds:9.2f} s  {seconds / spent * 100:5.1f}%")
+    slowest = sorted(report["per_page"], key=lambda p: p["text"] + p["raster"] + p["save"],
+                     reverse=True)[:5]
+    if slowest:
+        print("  slowest pages: " + ", ".join(
+            f"{p['page']} ({p['text'] + p['raster'] + p['save']:.2f} s)" for p in slowest))
+    if report["peak_rss_kb"]:
+        rss = report["peak_rss_kb"]
+        print(f"  peak RSS {rss['self'] / 1024:.1f} MiB"
+              + (f", largest worker {rss['workers'] / 1024:.1f} MiB" if rss["workers"] else ""))
+
+
+def extract_pdf_to_markdown(pdf_path: str, output_md: str, img_dir: str = None,
+                            workers: int = 1, image_mode: str = "raster", pages: list = None,
+                            incremental: bool = False, profile: str = None) -> None:
+    """Extract PDF content to markdown with images.
+
+    Each page's markdown is written out as soon as the page is done and the page's cached
+    objects are released, so memory stays bounded by the largest page rather than growing
+    with the document. The file is written beside `output_md` and moved into place at the
+    end, so an interrupted run never leaves a truncated document behind.
+
+    With `workers` > 1 the pages are sharded over that many processes. Results are merged
+    in page order and images numbered as they are merged, so the markdown is identical to
+    a serial run.
+
+    `image_mode` is "raster" (render every image from the page) or "embedded" (write each
+    image's own bytes where possible, once per distinct image); see _extract_page.
+
+    `pages` limits the output to those (first, last) ranges (see _parse_pages); the
+    output then holds those pages only, whatever it held before. With `incremental`,
+    every page is keyed by _page_key and appended to the journal as soon as it is
+    written, and pages already in the journal under the same key are reused rather than
+    extracted. Raster image files are named by page number, so in raster mode a page is
+    only reused at the position it was journaled at; embedded files are named by
+    content, so an unchanged page is reused wherever it moved to. Without `incremental`
+    no page is hashed and the journal is neither read nor written.
+
+    `profile` prints where the time went (see _profile_report) and, unless it is "-",
+    also writes the full per-page report to that path as JSON.
+    """
+
     pdf_name = Path(pdf_path).stem
-    
+    output_dir = Path(output_md).parent
+
     # Set up image directory
     if img_dir:
         img_path = Path(img_dir)
         img_path.mkdir(parents=True, exist_ok=True)
     else:
-        img_path = Path(output_md).parent / "img"
+        img_path = output_dir / "img"
         img_path.mkdir(parents=True, exist_ok=True)
-    
-    markdown_content = []
+
     image_counter = 0
-    page_count = 0
-    
+    image_files = set()
+    journal = _journal_path(output_md)
+    reusable = _load_journal(journal, output_dir) if incremental else {}
+    salt = json.dumps([image_mode, pdf_name, os.path.relpath(img_path, output_dir)]).encode()
+    current = {}
+    reused = 0
+    profiled = []
+    started = time.perf_counter()
     with pdfplumber.open(pdf_path) as pdf:
         page_count = len(pdf.pages)
-        
-        for page_num, page in enumerate(pdf.pages, start=1):
-            # Extract text
-            text = page.extract_text()
-            if text and text.strip():
-                markdown_content.append(f"\n<!-- Page {page_num} -->\n")
-                markdown_content.append(text + "\n")
-            
-            # Extract images
-            if hasattr(page, 'images') and page.images:
-                for img_index, img_info in enumerate(page.images):
-                    try:
-                        # Get image bounding box and extract
-                        x0, top, x1, bottom = img_info['x0'], img_info['top'], img_info['x1'], img_info['bottom']
-                        
-                        # Crop the image from page
-                        cropped = page.crop((x0, top, x1, bottom))
-                        img = cropped.to_image(resolution=150)
-                        
-                        image_counter += 1
-                        image_filename = f"{pdf_name}_page{page_num}_img{img_index + 1}.png"
-                        image_filepath = img_path / image_filename
-                        
-                        img.save(str(image_filepath), format="PNG")
-                        
-                        # Add image reference to markdown
-                        rel_img_path = os.path.relpath(image_filepath, Path(output_md).parent)
-                        rel_img_path = rel_img_path.replace("\\", "/")  # Normalize for markdown
-                        markdown_content.append(f"\n![Image {image_counter}]({rel_img_path})\n")
-                        
-                    except Exception as e:
-                        print(f"Warning: Could not extract image {img_index + 1} from page {page_num}: {e}")
-    
-    # Write markdown file
-    with open(output_md, "w", encoding="utf-8") as md_file:
-        md_file.write("".join(markdown_content))
-    
-    print(f"Extracted {page_count} pages to {output_md}")
-    print(f"Extracted {image_counter} images to {img_path}")
+        page_nums = _select_pages(pages or [(1, None)], page_count)
+        # With --incremental, hash every selected page first: reused pages need nothing
+        # else, and the rest are extracted serially or handed to workers below.
+        keys = {}
+        for page_num in page_nums if incremental else ():
+            page = pdf.pages[page_num - 1]
+            keys[page_num] = _page_key(pdf, page, salt + (
+                b"" if image_mode == "embedded" else str(page_num).encode()))
+            page.close()
+        todo = [page_num for page_num in page_nums if keys.get(page_num) not in reusable]
+        parallel = workers > 1 and len(todo) > 1
+
+        partial = Path(f"{output_md}.part")
+        with open(partial, "w", encoding="utf-8") as md_file, \
+                (open(journal, "a", encoding="utf-8") if incremental
+                 else contextlib.nullcontext()) as journal_file:
+
+            def write(result, key):
+                nonlocal image_counter
+                image_counter = _write_page(md_file, result, image_counter)
+                image_files.update(result["images"])
+                timings = result.pop("timings", None)
+                if timings is not None:
+                    profiled.append(dict(timings, page=result["page"],
+                                         images=len(result["images"])))
+                if journal_file is not None:
+                    current[result["page"]] = {"page": result["page"], "key": key,
+                                               "result": result}
+                    journal_file.write(json.dumps(current[result["page"]], sort_keys=True)
+                                       + "\n")
+                    journal_file.flush()
+
+            if not parallel:
+                for page_num in page_nums:
+                    key = keys.get(page_num)
+                    if key in reusable:
+                        result = dict(reusable[key], page=page_num)
+                        reused += 1
+                    else:
+                        page = pdf.pages[page_num - 1]
+                        result = _extract_page(
+                            page, page_num, pdf_name, img_path, output_dir, image_mode
+                        )
+                        _release_page(pdf, page)
+                    write(result, key)
+            else:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = {
+                        shard[0]: pool.submit(_extract_range, pdf_path, shard, pdf_name,
+                                              img_path, output_dir, image_mode)
+                        for shard in _shards(todo, workers)
+                    }
+                    # Write each shard as soon as it and every page before it are done,
+                    # and let go of it: finished shards wait only until their turn.
+                    extracted = iter(())
+                    for page_num in page_nums:
+                        key = keys.get(page_num)
+                        if key in reusable:
+                            write(dict(reusable[key], page=page_num), key)
+                            reused += 1
+                            continue
+                        if page_num in futures:
+                            extracted = iter(futures.pop(page_num).result())
+                        write(next(extracted), key)
+    os.replace(partial, output_md)
+    if incremental:
+        _compact_journal(journal, current)
+
+    print(f"Extracted {len(page_nums)} of {page_count} pages to {output_md}"
+          if len(page_nums) < page_count else f"Extracted {page_count} pages to {output_md}")
+    if image_mode == "embedded":
+        print(f"Extracted {image_counter} images ({len(image_files)} distinct files) "
+              f"to {img_path}")
+    else:
+        print(f"Extracted {image_counter} images to {img_path}")
+    if incremental:
+        print(f"Reused {reused} unchanged pages from {journal}")
+    if profile:
+        report = _profile_report(profiled, time.perf_counter() - started, len(page_nums),
+                                 workers, image_mode)
+        _print_profile(report)
+        if profile != "-":
+            Path(profile).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
 
 
 def main():
@@ -93,14 +550,37 @@ def main():
     parser.add_argument("input_pdf", help="Input PDF file path")
     parser.add_argument("output_md", help="Output Markdown file path")
     parser.add_argument("--img-dir", help="Directory to store extracted images", default=None)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Extract pages on N processes (default: 1); output is identical")
+    parser.add_argument("--images", choices=IMAGE_MODES, default="raster",
+                        help="raster: render each image from the page at 150 dpi (default); "
+                             "embedded: write each image's own bytes, once per distinct image")
+    parser.add_argument("--pages", type=_parse_pages, default=None,
+                        help="Only extract these pages, e.g. 1-20,35,40- (default: all); "
+                             "the output holds only these pages")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Journal every page and reuse pages from an earlier run's "
+                             "journal whose content has not changed; resumes an "
+                             "interrupted run")
+    parser.add_argument("--profile", nargs="?", const="-", default=None, metavar="FILE",
+                        help="Report time spent on text, image rendering and image saving, "
+                             "pages/s and peak memory; with FILE, also write per-page JSON")
     
     args = parser.parse_args()
+    if args.workers < 1:
+        print(f"Error: --workers must be at least 1 (got {args.workers})")
+        sys.exit(1)
     
     if not os.path.exists(args.input_pdf):
         print(f"Error: PDF file not found: {args.input_pdf}")
         sys.exit(1)
     
-    extract_pdf_to_markdown(args.input_pdf, args.output_md, args.img_dir)
+    try:
+        extract_pdf_to_markdown(args.input_pdf, args.output_md, args.img_dir, args.workers,
+                                args.images, args.pages, args.incremental, args.profile)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
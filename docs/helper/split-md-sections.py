@@ -3,149 +3,295 @@
 Split Markdown by Sections
 
 Usage:
-    python split-md-sections.py <input_md> <output_dir>
+    python split-md-sections.py <input_md> <output_dir> [--map <sections.json|.yaml>]
+    python split-md-sections.py <input_md> <output_dir> --headings [LEVEL]
 
 Splits a large markdown file into smaller files based on chapter/section headings.
+
+Where each section starts and ends comes from a section map: a JSON or YAML file
+listing the page range, file name and title of every section, along with the index
+page's title and details (dissertation-sections.json beside this script is the
+default). With --headings the sections are instead derived from the document's own
+headings of LEVEL or above (default 1), ignoring headings inside fenced code blocks.
+
+The input is memory-mapped and scanned once for its <!-- Page N --> markers (or its
+headings); every section is then cut from the map by slicing between two offsets and
+copied to its file byte for byte, so the cost grows with the document, not with the
+number of sections times the document.
+
+A file is only written when its content differs from what is already on disk, and the
+index holds nothing that changes between runs, so splitting an unchanged document
+writes nothing.
 """
 
 import argparse
+import bisect
+import hashlib
+import json
+import mmap
 import os
 import re
 import sys
 from pathlib import Path
-from datetime import datetime
 
 
-def split_markdown_by_sections(input_path: str, output_dir: str) -> None:
-    """Split markdown file into sections based on document structure."""
-    
-    with open(input_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Create output directory
-    out_path = Path(output_dir)
-    out_path.mkdir(parents=True, exist_ok=True)
-    
-    # Define section patterns and their file mappings
-    sections = [
-        # Front matter
-        (r'<!-- Page 1 -->', r'(?=<!-- Page 5 -->)', '00-title-page.md', 'Title Page'),
-        (r'<!-- Page 5 -->', r'(?=<!-- Page 6 -->)', '01-resumo-pt.md', 'Resumo (Portuguese Abstract)'),
-        (r'<!-- Page 6 -->', r'(?=<!-- Page 7 -->)', '02-abstract-en.md', 'Abstract (English)'),
-        (r'<!-- Page 7 -->', r'(?=<!-- Page 10 -->)', '03-list-of-figures.md', 'List of Figures'),
-        (r'<!-- Page 10 -->', r'(?=<!-- Page 11 -->)', '04-list-of-tables.md', 'List of Tables'),
-        (r'<!-- Page 11 -->', r'(?=<!-- Page 12 -->)', '05-list-of-charts.md', 'List of Charts'),
-        (r'<!-- Page 12 -->', r'(?=<!-- Page 14 -->)', '06-acronyms.md', 'Acronyms and Abbreviations'),
-        (r'<!-- Page 14 -->', r'(?=<!-- Page 17 -->)', '07-table-of-contents.md', 'Table of Contents'),
-        
-        # Chapter 1 - Introduction
-        (r'<!-- Page 17 -->', r'(?=<!-- Page 26 -->)', '10-ch1-introduction.md', 'Chapter 1: Introduction'),
-        
-        # Chapter 2 - Theoretical Framework
-        (r'<!-- Page 26 -->', r'(?=<!-- Page 54 -->)', '20-ch2-theoretical-framework.md', 'Chapter 2: Theoretical Framework'),
-        
-        # Chapter 3 - Problem-Based SRS Method
-        (r'<!-- Page 54 -->', r'(?=<!-- Page 91 -->)', '30-ch3-problem-based-srs-method.md', 'Chapter 3: Problem-Based SRS Method'),
-        
-        # Chapter 4 - Case Study (CRM)
-        (r'<!-- Page 91 -->', r'(?=<!-- Page 109 -->)', '40-ch4-case-study-crm.md', 'Chapter 4: Case Study - CRM Application'),
-        
-        # Chapter 5 - Experiment (MicroER)
-        (r'<!-- Page 109 -->', r'(?=<!-- Page 125 -->)', '50-ch5-experiment-microer.md', 'Chapter 5: Experiment - MicroER'),
-        
-        # Chapter 6 - Final Considerations
-        (r'<!-- Page 125 -->', r'(?=<!-- Page 130 -->)', '60-ch6-final-considerations.md', 'Chapter 6: Final Considerations'),
-        
-        # References
-        (r'<!-- Page 130 -->', r'(?=<!-- Page 134 -->)', '70-references.md', 'References'),
-        
-        # Appendices
-        (r'<!-- Page 134 -->', r'(?=<!-- Page 141 -->)', '80-appendix-a-ad-theorems.md', 'Appendix A: AD Corollaries and Theorems'),
-        (r'<!-- Page 141 -->', r'(?=<!-- Page 147 -->)', '81-appendix-b-research-method.md', 'Appendix B: Bibliographic Research Method'),
-        (r'<!-- Page 147 -->', r'$', '82-appendix-c-opd-notation.md', 'Appendix C: OPD Notation'),
-    ]
-    
-    # Generate timestamp prefix
-    timestamp = datetime.now().strftime('%Y-%m-%d_%H%M%S')
-    
-    # Create index file
-    index_content = f"""# Problem-Based SRS: Method for Software Requirements Specification
-
-**Generated:** {timestamp}
-
-**Original:** CT_PPGCA_M_Souza_Rafael_Gorski_Moreno_2016 (Master's Dissertation)
-
-**Author:** Rafael Gorski Moreno Souza
-
-**Advisor:** Prof. Dr. Paulo Cézar Stadzisz
-
-**Institution:** Federal Technological University of Paraná (UTFPR)
-
-**Year:** 2016
-
----
-
-## Document Sections
+DEFAULT_MAP = Path(__file__).resolve().parent / "dissertation-sections.json"
 
-"""
-    
-    files_created = []
-    
-    for start_pattern, end_pattern, filename, title in sections:
+PAGE_MARKER = re.compile(rb'<!-- Page (\d+) -->')
+# A fence line (its marker, then any info string), or an ATX heading; whether a fence
+# opens or closes one, and the heading's level, are for the caller to decide.
+HEADING_OR_FENCE = re.compile(
+    rb'^(?: {0,3}(`{3,}|~{3,})([^\r\n]*)|(#{1,6})[ \t]+(.+?)[ \t#]*)\r?$', re.MULTILINE)
+
+
+def load_section_map(path: str) -> dict:
+    """Read a section map from a .json, .yaml or .yml file.
+
+    A map has a "sections" list of {"start_page", "end_page", "file", "title"} entries,
+    where a section without "end_page" runs to the end of the document; or, instead of
+    "sections", a "headings" level to derive them from. "title", "details" (label ->
+    value, in order), "part_of" and "footer" fill in the index and section headers.
+    """
+    text = Path(path).read_text(encoding='utf-8')
+    if Path(path).suffix.lower() in ('.yaml', '.yml'):
         try:
-            # Find content between patterns
-            pattern = f'({start_pattern}.*?){end_pattern}'
-            match = re.search(pattern, content, re.DOTALL)
-            
-            if match:
-                section_content = match.group(1)
-                
+            import yaml
+        except ImportError:
+            print("Error: YAML section maps need PyYAML. Run: python -m pip install pyyaml")
+            sys.exit(1)
+        section_map = yaml.safe_load(text)
+    else:
+        section_map = json.loads(text)
+    if not isinstance(section_map, dict) or not (
+        isinstance(section_map.get('sections'), list) or section_map.get('headings')
+    ):
+        raise ValueError(f"{path}: a section map needs a 'sections' list or a 'headings' level")
+    return section_map
+
+
+def index_page_markers(data) -> dict:
+    """Map each page number to the offsets of its <!-- Page N --> markers, in one pass."""
+    index = {}
+    for match in PAGE_MARKER.finditer(data):
+        index.setdefault(int(match.group(1)), []).append(match.start())
+    return index
+
+
+def section_bounds(data, index: dict, start_page: int, end_page) -> tuple:
+    """The (start, end) offsets of a section, or None if a marker it needs is missing.
+
+    The section runs from the first marker of `start_page` up to the first marker of
+    `end_page` after it, or to the end of the document (less one final newline) when
+    `end_page` is None.
+    """
+    starts = index.get(start_page)
+    if not starts:
+        return None
+    start = starts[0]
+    if end_page is None:
+        return start, _document_end(data)
+    ends = index.get(end_page, [])
+    following = bisect.bisect_right(ends, start)
+    if following == len(ends):
+        return None
+    return start, ends[following]
+
+
+def _document_end(data) -> int:
+    return len(data) - 1 if data[-1:] == b"\n" else len(data)
+
+
+def _slug(title: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')[:60] or 'section'
+
+
+def heading_sections(data, level: int) -> list:
+    """(start, end, file, title) for every heading of `level` or above, in one pass.
+
+    Text before the first heading, if any, becomes a "Front Matter" section. Files are
+    numbered in document order, so the same document always gets the same names. Each
+    section already opens with its heading, so no header is added to these files.
+    """
+    headings = []
+    fence = None
+    for match in HEADING_OR_FENCE.finditer(data):
+        marker, info = match.group(1), match.group(2)
+        if marker is not None:
+            if fence is None:
+                # An info string may follow an opening fence (```python), though a
+                # backtick fence's may not itself hold a backtick.
+                if not (marker[:1] == b'`' and b'`' in info):
+                    fence = marker
+            elif marker[:1] == fence[:1] and len(marker) >= len(fence) and not info.strip():
+                # Only a bare fence of the same character, at least as long, closes it.
+                fence = None
+        elif fence is None and len(match.group(3)) <= level:
+            headings.append((match.start(), match.group(4).decode('utf-8', 'replace')))
+    if headings and data[:headings[0][0]].strip():
+        headings.insert(0, (0, 'Front Matter'))
+    elif not headings and data.strip():
+        headings.append((0, 'Front Matter'))
+    width = max(2, len(str(len(headings) - 1)))
+    sections = []
+    for number, (start, title) in enumerate(headings):
+        end = headings[number + 1][0] if number + 1 < len(headings) else _document_end(data)
+        sections.append((start, end, f"{number:0{width}d}-{_slug(title)}.md", title))
+    return sections
+
+
+def write_if_changed(path: Path, chunks: list) -> str:
+    """Write `chunks` to `path` unless the file already holds exactly those bytes.
+
+    Returns "created", "updated" or "unchanged". Unchanged files keep their timestamps,
+    so nothing downstream (git, a docs build, a cache) sees a change that did not happen.
+    """
+    size = sum(len(chunk) for chunk in chunks)
+    if path.exists() and path.stat().st_size == size:
+        wanted = hashlib.sha256()
+        for chunk in chunks:
+            wanted.update(chunk)
+        current = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                current.update(block)
+        if current.digest() == wanted.digest():
+            return "unchanged"
+    status = "updated" if path.exists() else "created"
+    partial = path.with_name(path.name + '.part')
+    with open(partial, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(partial, path)
+    return status
+
+
+_STATUS_MARK = {"created": "✓ Created", "updated": "✓ Updated", "unchanged": "· Unchanged"}
+
+
+def _write_sections(data, out_path: Path, section_map: dict, counts: dict) -> list:
+    """Cut every section the map describes out of `data` and write it.
+
+    Returns the (file, title) pairs written, in map order.
+    """
+    derived = bool(section_map.get('headings'))
+    if derived:
+        sections = heading_sections(data, int(section_map['headings']))
+    else:
+        index = index_page_markers(data)
+        sections = []
+        for entry in section_map['sections']:
+            bounds = section_bounds(data, index, entry['start_page'], entry.get('end_page'))
+            if bounds:
+                sections.append((*bounds, entry['file'], entry['title']))
+            else:
+                print(f"⚠ Section not found: {entry['title']}")
+    part_of = section_map.get('part_of', '')
+    files_created = []
+
+    with memoryview(data) as view:
+        for start, end, filename, title in sections:
+            try:
                 # Add header to section
-                header = f"# {title}\n\n"
-                header += f"*Part of: Problem-Based SRS Dissertation (2016)*\n\n---\n\n"
-                
-                full_content = header + section_content
-                
+                header = ""
+                if not derived:
+                    header = f"# {title}\n\n"
+                    if part_of:
+                        header += f"*Part of: {part_of}*\n\n---\n\n"
+
                 # Write section file
-                section_path = out_path / filename
-                with open(section_path, 'w', encoding='utf-8') as f:
-                    f.write(full_content)
-                
+                status = write_if_changed(out_path / filename,
+                                          [header.encode('utf-8'), view[start:end]])
+                counts[status] += 1
                 files_created.append((filename, title))
-                print(f"✓ Created {filename}")
-            else:
-                print(f"⚠ Section not found: {title}")
-                
-        except Exception as e:
-            print(f"✗ Error processing {title}: {e}")
-    
-    # Complete index file
+                print(f"{_STATUS_MARK[status]} {filename}")
+
+            except Exception as e:
+                print(f"✗ Error processing {title}: {e}")
+
+    return files_created
+
+
+def render_index(section_map: dict, files_created: list) -> str:
+    """The index README: the map's title, details, section links and footer.
+
+    Built from the map and the sections alone, with no date or run-specific detail, so
+    an unchanged document produces a byte-identical index.
+    """
+    index_content = f"# {section_map.get('title', 'Document Sections')}\n\n"
+    for label, value in (section_map.get('details') or {}).items():
+        index_content += f"**{label}:** {value}\n\n"
+    index_content += "---\n\n## Document Sections\n\n"
     for filename, title in files_created:
         index_content += f"- [{title}]({filename})\n"
-    
-    index_content += "\n---\n\n## Images\n\nAll images are stored in `../img/` and referenced from within each section.\n"
-    
+    if section_map.get('footer'):
+        index_content += f"\n---\n\n{section_map['footer']}\n"
+    return index_content
+
+
+def split_markdown_by_sections(input_path: str, output_dir: str, section_map: dict = None) -> None:
+    """Split markdown file into sections based on document structure.
+
+    `section_map` is a loaded section map (see load_section_map); by default, the
+    dissertation's.
+    """
+    if section_map is None:
+        section_map = load_section_map(DEFAULT_MAP)
+
+    # Create output directory
+    out_path = Path(output_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    counts = {"created": 0, "updated": 0, "unchanged": 0}
+    with open(input_path, 'rb') as f:
+        # mmap cannot map an empty file; an empty document simply has no sections.
+        empty = os.fstat(f.fileno()).st_size == 0
+        data = b"" if empty else mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        files_created = _write_sections(data, out_path, section_map, counts)
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
     # Write index
-    index_path = out_path / "README.md"
-    with open(index_path, 'w', encoding='utf-8') as f:
-        f.write(index_content)
-    
-    print(f"\n✓ Created README.md (index)")
-    print(f"\nTotal: {len(files_created) + 1} files created in {output_dir}")
+    status = write_if_changed(out_path / "README.md",
+                              [render_index(section_map, files_created).encode('utf-8')])
+    counts[status] += 1
+    print(f"\n{_STATUS_MARK[status]} README.md (index)")
+    print(f"\nTotal: {len(files_created) + 1} files in {output_dir} "
+          f"({counts['created']} created, {counts['updated']} updated, "
+          f"{counts['unchanged']} unchanged)")
 
 
 def main():
     parser = argparse.ArgumentParser(description="Split markdown into sections")
     parser.add_argument("input_md", help="Input Markdown file")
     parser.add_argument("output_dir", help="Output directory for split files")
-    
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--map", default=None,
+                        help=f"Section map, JSON or YAML (default: {DEFAULT_MAP.name})")
+    source.add_argument("--headings", type=int, nargs="?", const=1, default=None,
+                        metavar="LEVEL",
+                        help="Derive sections from headings of LEVEL or above (default: 1)")
+
     args = parser.parse_args()
-    
+
     if not os.path.exists(args.input_md):
         print(f"Error: File not found: {args.input_md}")
         sys.exit(1)
-    
-    split_markdown_by_sections(args.input_md, args.output_dir)
+
+    if args.headings is not None:
+        if not 1 <= args.headings <= 6:
+            print(f"Error: --headings must be between 1 and 6 (got {args.headings})")
+            sys.exit(1)
+        section_map = {"title": Path(args.input_md).stem, "headings": args.headings}
+    else:
+        try:
+            section_map = load_section_map(args.map or DEFAULT_MAP)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    split_markdown_by_sections(args.input_md, args.output_dir, section_map)
 
 
 if __name__ == "__main__":
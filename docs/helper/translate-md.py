@@ -3,32 +3,271 @@
 Markdown Translator (Portuguese to English)
 
 Usage:
-    python translate-md.py <input_md> <output_md>
+    python translate-md.py <input_md> <output_md> [--translator google|stub|fake]
+                           [--memory <file> | --no-memory] [--memory-entries N]
+                           [--concurrency N] [--rate PER_SECOND] [--retries N]
 
 Example:
     python translate-md.py docs/document_PT.md docs/document_EN.md
+    python translate-md.py docs/document_PT.md docs/document_EN.md --concurrency 8 --rate 5
+    python translate-md.py docs/document_PT.md /tmp/check.md --translator stub
+    python translate-md.py docs/document_PT.md /tmp/check.md --translator fake --concurrency 8
 
 This script translates a markdown file from Portuguese to English
 while preserving markdown formatting, image references, and comments.
 
+Every chunk translated is kept in a translation memory on disk
+(.build-cache/translation-memory.json by default), keyed by the translator,
+the source and target language and a hash of the chunk with its whitespace
+normalized, so the stub's output never stands in for a real translation.
+Re-translating a revised document only sends the new or changed chunks to
+the translator; the least recently used entries are evicted once the memory
+holds --memory-entries of them. --translator stub translates offline, by
+tagging each chunk with the target language, to try the pipeline without
+network access.
+
+With --concurrency N, up to N translation requests are in flight at once, each
+thread with a translator of its own, and all of them share a token bucket
+that admits --rate requests per second. A failed request is retried up to
+--retries times with exponential backoff. Every translated block is put back
+where it came from, so the output is identical to a serial run. --translator
+fake is the stub with an injected round-trip latency (--fake-latency) and
+failure rate (--fake-failure-rate), to try concurrency and retries offline; it
+sends every chunk each run, so it skips the memory unless --memory names one.
+
 Requirements:
-    pip install deep_translator
+    pip install deep_translator   (not needed with --translator stub)
 """
 
 import argparse
+import collections
+import concurrent.futures
+import hashlib
+import json
 import os
+import random
 import re
 import sys
+import threading
+import time
 from pathlib import Path
 
-try:
-    from deep_translator import GoogleTranslator
-except ImportError:
-    print("Error: deep_translator not installed. Run: python -m pip install deep_translator")
-    sys.exit(1)
 
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_MEMORY = REPO_ROOT / ".build-cache" / "translation-memory.json"
+MEMORY_SCHEMA = 2
+TRANSLATORS = ("google", "stub", "fake")
+
+
+class StubTranslator:
+    """An offline stand-in for GoogleTranslator: tags each chunk with the target language.
+
+    Makes no network calls, so the page splitting, chunking and translation memory can be
+    exercised (and their output checked) anywhere.
+    """
+
+    def __init__(self, source: str, target: str):
+        self.source = source
+        self.target = target
+
+    def translate(self, text: str) -> str:
+        return f"[{self.target}] {text}"
+
+
+class FakeTranslator(StubTranslator):
+    """The stub, as slow and as unreliable as asked: for concurrency and retry runs offline.
+
+    Every call sleeps `latency` seconds, as a network round trip would, and fails with
+    probability `failure_rate`. Its output is the stub's, so a concurrent run can be
+    compared with a serial one byte for byte.
+    """
+
+    def __init__(self, source: str, target: str, latency: float = 0.2,
+                 failure_rate: float = 0.0):
+        super().__init__(source, target)
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+    def translate(self, text: str) -> str:
+        time.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise ConnectionError("fake translator: injected failure")
+        return super().translate(text)
+
+
+class TokenBucket:
+    """Admit `rate` acquisitions per second on average, in bursts of up to `burst`.
+
+    Shared by every worker thread, so the translation service sees one client's rate
+    whatever --concurrency is.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ThrottledTranslator:
+    """Call a per-thread translator under a rate limit, retrying failures with backoff.
+
+    deep_translator's GoogleTranslator keeps the text of the call in progress on the
+    instance, so threads must not share one: each thread gets its own from `factory`.
+    After the last retry the error is raised to translate_text, which keeps the source.
+    """
+
+    def __init__(self, factory, bucket: TokenBucket = None, retries: int = 3,
+                 backoff: float = 1.0):
+        self.factory = factory
+        self.bucket = bucket
+        self.retries = retries
+        self.backoff = backoff
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.requests = self.retried = 0
+
+    def translate(self, text: str) -> str:
+        translator = getattr(self.local, "translator", None)
+        if translator is None:
+            translator = self.local.translator = self.factory()
+        for attempt in range(self.retries + 1):
+            if self.bucket is not None:
+                self.bucket.acquire()
+            with self.lock:
+                self.requests += 1
+            try:
+                return translator.translate(text)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                with self.lock:
+                    self.retried += 1
+                # Exponential backoff with jitter, so retrying threads do not stampede.
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+class TranslationMemory:
+    """Translations of earlier runs, on disk, bounded to `max_entries` by LRU eviction.
+
+    Entries are keyed by translator, source language, target language and the SHA-256 of
+    the chunk with its whitespace normalized, so re-wrapping a paragraph does not cost a
+    call, and one translator's output is never served for another's. The
+    file keeps entries in least- to most-recently-used order; it is rewritten once, at
+    the end of a run, and a missing or unreadable file is just an empty memory.
+    """
+
+    def __init__(self, path: Path, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = collections.OrderedDict()
+        self.hits = self.misses = self.evicted = 0
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            data = {}
+        if isinstance(data, dict) and data.get("schema") == MEMORY_SCHEMA:
+            self.entries.update(data.get("entries") or [])
+        self._evict()
+
+    @staticmethod
+    def key(translator: str, source: str, target: str, text: str) -> str:
+        normalized = ' '.join(text.split())
+        key = f"{translator}\0{source}\0{target}\0{normalized}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        with self.lock:
+            translation = self.entries.get(key)
+            if translation is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return translation
+
+    def put(self, key: str, translation: str) -> None:
+        with self.lock:
+            self.entries[key] = translation
+            self.entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evicted += 1
+
+    def save(self) -> None:
+        """Write the memory atomically, so an interrupted run leaves the old one."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        data = {"schema": MEMORY_SCHEMA, "entries": list(self.entries.items())}
+        tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+                       encoding='utf-8')
+        os.replace(tmp, self.path)
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0.0
+        return (f"Translation memory: {self.hits} hits, {self.misses} misses "
+                f"({rate:.1f}% hit rate), {len(self.entries)} entries, "
+                f"{self.evicted} evicted ({self.path})")
 
-def translate_text(text: str, translator: GoogleTranslator) -> str:
+
+class MemoryTranslator:
+    """Answers from a TranslationMemory, and asks `translator` only on a miss.
+
+    `name` is the kind of translator behind it (see TRANSLATORS), part of every key.
+    """
+
+    def __init__(self, translator, memory: TranslationMemory, name: str, source: str,
+                 target: str):
+        self.translator = translator
+        self.memory = memory
+        self.name = name
+        self.source = source
+        self.target = target
+
+    def translate(self, text: str) -> str:
+        key = TranslationMemory.key(self.name, self.source, self.target, text)
+        translated = self.memory.get(key)
+        if translated is None:
+            translated = self.translator.translate(text)
+            if translated:
+                self.memory.put(key, translated)
+        return translated
+
+
+def translator_factory(name: str, source: str, target: str, latency: float = 0.2,
+                       failure_rate: float = 0.0):
+    """A callable that makes a new translator of kind `name` each time it is called."""
+    if name == "stub":
+        return lambda: StubTranslator(source, target)
+    if name == "fake":
+        return lambda: FakeTranslator(source, target, latency, failure_rate)
+    try:
+        from deep_translator import GoogleTranslator
+    except ImportError:
+        print("Error: deep_translator not installed. Run: python -m pip install deep_translator")
+        sys.exit(1)
+    return lambda: GoogleTranslator(source=source, target=target)
+
+
+def translate_text(text: str, translator) -> str:
     """Translate text while preserving markdown elements."""
     if not text.strip():
         return text
@@ -70,14 +309,18 @@ def translate_text(text: str, translator: GoogleTranslator) -> str:
         return text
 
 
-def translate_markdown_file(input_path: str, output_path: str) -> None:
-    """Translate a markdown file from Portuguese to English."""
-    
-    with open(input_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    translator = GoogleTranslator(source='pt', target='en')
-    
+def _translate_pages(content: str, translator, pool=None) -> str:
+    """Translate a whole document page by page, keeping markers, images and page numbers.
+
+    With a thread `pool`, each block of text is submitted to it as it is found and its
+    place in the page is held by the future; the pages are joined once every future has
+    resolved, so blocks finishing out of order still land where they came from.
+    """
+    def translate_block(text):
+        if pool is None:
+            return translate_text(text, translator)
+        return pool.submit(translate_text, text, translator)
+
     # Split by page markers to process page by page
     pages = re.split(r'(<!-- Page \d+ -->)', content)
     
@@ -102,7 +345,7 @@ def translate_markdown_file(input_path: str, output_path: str) -> None:
                     # Flush text buffer
                     if text_buffer:
                         text_to_translate = '\n'.join(text_buffer)
-                        translated = translate_text(text_to_translate, translator)
+                        translated = translate_block(text_to_translate)
                         translated_lines.append(translated)
                         text_buffer = []
                     translated_lines.append(line)
@@ -110,14 +353,14 @@ def translate_markdown_file(input_path: str, output_path: str) -> None:
                     # Page numbers - keep as is
                     if text_buffer:
                         text_to_translate = '\n'.join(text_buffer)
-                        translated = translate_text(text_to_translate, translator)
+                        translated = translate_block(text_to_translate)
                         translated_lines.append(translated)
                         text_buffer = []
                     translated_lines.append(line)
                 elif not line.strip():
                     if text_buffer:
                         text_to_translate = '\n'.join(text_buffer)
-                        translated = translate_text(text_to_translate, translator)
+                        translated = translate_block(text_to_translate)
                         translated_lines.append(translated)
                         text_buffer = []
                     translated_lines.append(line)
@@ -127,33 +370,116 @@ def translate_markdown_file(input_path: str, output_path: str) -> None:
             # Flush remaining buffer
             if text_buffer:
                 text_to_translate = '\n'.join(text_buffer)
-                translated = translate_text(text_to_translate, translator)
+                translated = translate_block(text_to_translate)
                 translated_lines.append(translated)
             
-            translated_parts.append('\n'.join(translated_lines))
+            translated_parts.append(translated_lines)
         else:
             translated_parts.append(part)
     
-    translated_content = ''.join(translated_parts)
+    def resolved(lines):
+        return '\n'.join(line if isinstance(line, str) else line.result() for line in lines)
+
+    return ''.join(part if isinstance(part, str) else resolved(part) for part in translated_parts)
+
+
+def translate_markdown_file(input_path: str, output_path: str, translator_name: str = "google",
+                            memory_path: Path = DEFAULT_MEMORY,
+                            memory_entries: int = 50000, concurrency: int = 1,
+                            rate: float = None, retries: int = 3, backoff: float = 1.0,
+                            fake_latency: float = 0.2, fake_failure_rate: float = 0.0) -> None:
+    """Translate a markdown file from Portuguese to English.
+
+    With a `memory_path`, translations are looked up in and added to the translation
+    memory there (see TranslationMemory); None translates every chunk afresh. Chunks the
+    memory does not have are sent through a ThrottledTranslator: `concurrency` at a time,
+    at most `rate` requests per second (None: no limit) and `retries` retries apiece.
+    """
+    
+    with open(input_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    throttled = ThrottledTranslator(
+        translator_factory(translator_name, 'pt', 'en', fake_latency, fake_failure_rate),
+        TokenBucket(rate, burst=concurrency) if rate else None, retries, backoff,
+    )
+    translator = throttled
+    memory = None
+    if memory_path is not None:
+        memory = TranslationMemory(Path(memory_path), memory_entries)
+        translator = MemoryTranslator(translator, memory, translator_name, 'pt', 'en')
+    
+    started = time.perf_counter()
+    try:
+        if concurrency > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+                translated_content = _translate_pages(content, translator, pool)
+        else:
+            translated_content = _translate_pages(content, translator)
+    finally:
+        # Whatever was translated before a failure or Ctrl+C is still worth keeping.
+        if memory is not None:
+            memory.save()
     
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(translated_content)
     
     print(f"Translation complete: {output_path}")
+    print(f"{throttled.requests} requests ({throttled.retried} retried) in "
+          f"{time.perf_counter() - started:.1f} s, {concurrency} in flight")
+    if memory is not None:
+        print(memory.report())
 
 
 def main():
     parser = argparse.ArgumentParser(description="Translate Markdown from Portuguese to English")
     parser.add_argument("input_md", help="Input Markdown file path (Portuguese)")
     parser.add_argument("output_md", help="Output Markdown file path (English)")
+    parser.add_argument("--translator", choices=TRANSLATORS, default="google",
+                        help="google (default), or stub to translate offline for testing")
+    memory = parser.add_mutually_exclusive_group()
+    memory.add_argument("--memory", default=None,
+                        help="Translation memory file "
+                             "(default: .build-cache/translation-memory.json, "
+                             "none with --translator fake)")
+    memory.add_argument("--no-memory", action="store_true",
+                        help="Translate every chunk afresh, without reading or writing the memory")
+    parser.add_argument("--memory-entries", type=int, default=50000,
+                        help="Evict the least recently used translations beyond this many")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Translation requests in flight at once (default: 1)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="At most this many requests per second (default: no limit)")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="Retries per failed request, with exponential backoff (default: 3)")
+    parser.add_argument("--backoff", type=float, default=1.0,
+                        help="Seconds before the first retry; doubled for each one after")
+    parser.add_argument("--fake-latency", type=float, default=0.2,
+                        help="Seconds each --translator fake request takes (default: 0.2)")
+    parser.add_argument("--fake-failure-rate", type=float, default=0.0,
+                        help="Share of --translator fake requests that fail (default: 0)")
     
     args = parser.parse_args()
     
     if not os.path.exists(args.input_md):
         print(f"Error: File not found: {args.input_md}")
         sys.exit(1)
+    if args.memory_entries < 1:
+        print(f"Error: --memory-entries must be at least 1 (got {args.memory_entries})")
+        sys.exit(1)
+    if args.concurrency < 1:
+        print(f"Error: --concurrency must be at least 1 (got {args.concurrency})")
+        sys.exit(1)
+    if args.rate is not None and args.rate <= 0:
+        print(f"Error: --rate must be positive (got {args.rate})")
+        sys.exit(1)
     
-    translate_markdown_file(args.input_md, args.output_md)
+    # A fake run measures requests, and a memory would answer them before they are sent.
+    memory_path = args.memory or (None if args.translator == "fake" else DEFAULT_MEMORY)
+    translate_markdown_file(args.input_md, args.output_md, args.translator,
+                            None if args.no_memory else memory_path, args.memory_entries,
+                            args.concurrency, args.rate, args.retries, args.backoff,
+                            args.fake_latency, args.fake_failure_rate)
 
 
 if __name__ == "__main__":
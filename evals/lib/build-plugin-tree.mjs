@@ -0,0 +1,69 @@
+// A throwaway copy of the repository for suites that run `scripts/build-plugin.py` for real.
+//
+// The build script resolves everything from its own location, so a suite that runs the
+// checkout's copy writes caches and archives into the checkout. Every build-plugin suite
+// therefore stages the script and the files it reads into a temporary directory and runs
+// it there. This module is that fixture, written once: which interpreter to use, what to
+// copy, and how to run the staged script with an environment that cannot leak into CI
+// (no bytecode, no GITHUB_OUTPUT unless a test asks for one).
+
+import fs from "node:fs";
+import os from "node:os";
+import path from "node:path";
+import { spawnSync } from "node:child_process";
+import { fileURLToPath } from "node:url";
+
+export const repoRoot = path.resolve(path.dirname(fileURLToPath(import.meta.url)), "../..");
+
+/** What the packager reads. Suites that need less pass their own list to stageTree(). */
+export const STAGED = [".claude-plugin", "agents", "skills", "settings.json", "LICENSE", "CHANGELOG.md"];
+
+/** The first Python on PATH, or undefined: suites skip cleanly without one. */
+export const python = ["python3", "python"].find(
+  (exe) => spawnSync(exe, ["--version"], { encoding: "utf8" }).status === 0,
+);
+
+/** The environment every build-plugin.py run gets, with `env` on top. */
+export function buildEnv(env = {}) {
+  return { ...process.env, PYTHONDONTWRITEBYTECODE: "1", GITHUB_OUTPUT: "", ...env };
+}
+
+/**
+ * Copy scripts/build-plugin.py, the build_plugin.py it runs, and `rels` (paths relative to the repository root) into a
+ * fresh temporary directory named after `prefix`, and return its path.
+ * @param {string} prefix
+ * @param {string[]} [rels]
+ */
+export function stageTree(prefix, rels = STAGED) {
+  const root = fs.mkdtempSync(path.join(os.tmpdir(), prefix));
+  fs.mkdirSync(path.join(root, "scripts"));
+  for (const script of ["build-plugin.py", "build_plugin.py"]) {
+    fs.copyFileSync(path.join(repoRoot, "scripts", script), path.join(root, "scripts", script));
+  }
+  for (const rel of rels) {
+    fs.cpSync(path.join(repoRoot, rel), path.join(root, rel), { recursive: true });
+  }
+  return root;
+}
+
+/** Remove a tree made by stageTree(); a no-op when staging was skipped. */
+export function removeTree(root) {
+  if (root) fs.rmSync(root, { recursive: true, force: true });
+}
+
+/**
+ * Run the build script staged in `root` with `args`, from `root` unless `options.cwd`
+ * says otherwise, and return the completed process.
+ * @param {string} root
+ * @param {string[]} args
+ * @param {{env?: Record<string,string>, cwd?: string, maxBuffer?: number, script?: string}} [options]
+ */
+export function runBuildPlugin(root, args, options = {}) {
+  const script = options.script ?? path.join(root, "scripts/build-plugin.py");
+  return spawnSync(python, ["-B", script, ...args], {
+    encoding: "utf8",
+    cwd: options.cwd ?? root,
+    env: buildEnv(options.env),
+    ...(options.maxBuffer ? { maxBuffer: options.maxBuffer } : {}),
+  });
+}
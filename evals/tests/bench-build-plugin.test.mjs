@@ -0,0 +1,63 @@
+// `scripts/bench-build-plugin.py` is the only thing that says how the build pipeline scales,
+// and a benchmark that quietly stops measuring a phase — or compares against a baseline
+// recorded for a different tree — reports "no regression" for ever. This suite runs it at a
+// size small enough for the PR gate and checks the shape of what it reports, not the
+// numbers, which depend on the machine.
+//
+// Needs Python and skips cleanly without an interpreter.
+import { describe, it } from "node:test";
+import assert from "node:assert/strict";
+import fs from "node:fs";
+import os from "node:os";
+import path from "node:path";
+import { spawnSync } from "node:child_process";
+import { python, repoRoot, buildEnv } from "../lib/build-plugin-tree.mjs";
+
+const BENCH = path.join(repoRoot, "scripts/bench-build-plugin.py");
+const TINY = ["--skills", "3", "--refs", "1", "--plugins", "2", "--versions", "4", "--repeat", "1"];
+
+function bench(...args) {
+  return spawnSync(python, ["-B", BENCH, ...args], {
+    encoding: "utf8",
+    env: buildEnv(),
+  });
+}
+
+describe("bench-build-plugin.py", () => {
+  it("times every phase and reports throughput against a recorded baseline", (t) => {
+    if (!python) return t.skip("no python interpreter available to run the benchmark");
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), "pbsrs-bench-"));
+    try {
+      const baseline = path.join(dir, "baseline.json");
+      const results = path.join(dir, "results.json");
+      const saved = bench(...TINY, "--baseline", baseline, "--save-baseline");
+      assert.equal(saved.status, 0, `${saved.stdout}${saved.stderr}`);
+      // A generous tolerance: this asserts that the comparison happens, not its outcome.
+      const res = bench(...TINY, "--baseline", baseline, "--tolerance", "100", "--json", results);
+      assert.equal(res.status, 0, `${res.stdout}${res.stderr}`);
+      const report = JSON.parse(fs.readFileSync(results, "utf8"));
+      assert.deepEqual(Object.keys(report.phases), ["validate", "marketplace", "package", "notes"]);
+      for (const [phase, result] of Object.entries(report.phases)) {
+        assert.ok(result.median > 0, `${phase} must have been timed`);
+        assert.ok(result.throughput > 0, `${phase} must report a throughput`);
+        assert.equal(typeof result.vs_baseline, "number", `${phase} must be compared with the baseline`);
+      }
+    } finally {
+      fs.rmSync(dir, { recursive: true, force: true });
+    }
+  });
+
+  it("refuses to compare against a baseline recorded for another tree size", (t) => {
+    if (!python) return t.skip("no python interpreter available to run the benchmark");
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), "pbsrs-bench-"));
+    try {
+      const baseline = path.join(dir, "baseline.json");
+      assert.equal(bench(...TINY, "--baseline", baseline, "--save-baseline").status, 0);
+      const res = bench(...TINY, "--skills", "4", "--baseline", baseline);
+      assert.equal(res.status, 0, `${res.stdout}${res.stderr}`);
+      assert.match(res.stdout, /recorded for other sizes — not compared/);
+    } finally {
+      fs.rmSync(dir, { recursive: true, force: true });
+    }
+  });
+});
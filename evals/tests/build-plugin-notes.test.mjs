@@ -0,0 +1,70 @@
+// `build-plugin.py notes` publishes exactly one CHANGELOG section as a release's notes, and
+// it now reads that section through a version → byte-range index cached against the file's
+// hash. An index is only safe if it agrees with the file it was built from, so this suite
+// holds three things against the real script, on a throwaway copy of the tree:
+//
+//   - `notes --all --format json` and `notes --version X` print the same notes for every X;
+//   - an edit to CHANGELOG.md is visible on the very next call, cached index or not;
+//   - the single-version path still refuses a version with no section.
+//
+// Every check needs Python and skips cleanly without an interpreter.
+import { describe, it, before, after } from "node:test";
+import assert from "node:assert/strict";
+import fs from "node:fs";
+import path from "node:path";
+import { python, stageTree, removeTree, runBuildPlugin } from "../lib/build-plugin-tree.mjs";
+
+let root;
+
+function run(...args) {
+  return runBuildPlugin(root, args);
+}
+
+function notes(...args) {
+  const res = run("notes", ...args);
+  assert.equal(res.status, 0, `notes ${args.join(" ")} failed:\n${res.stdout}${res.stderr}`);
+  return res.stdout.replace(/\r?\n$/, "");
+}
+
+before(() => {
+  if (!python) return;
+  root = stageTree("pbsrs-notes-index-", [".claude-plugin", "CHANGELOG.md"]);
+});
+
+after(() => removeTree(root));
+
+describe("build-plugin.py notes reads through an index", () => {
+  it("prints, for every version --all lists, the notes --version prints", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const all = JSON.parse(notes("--all", "--format", "json"));
+    assert.ok(all.length > 1, "the changelog has more than one section");
+    for (const { version, notes: body } of all.filter((s) => s.notes)) {
+      assert.equal(notes("--version", version), body, `notes for ${version} disagree between the two paths`);
+    }
+  });
+
+  it("sees an edit to CHANGELOG.md on the next call", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const file = path.join(root, "CHANGELOG.md");
+    const [{ version }] = JSON.parse(notes("--all", "--format", "json")).filter(
+      (s) => s.version !== "Unreleased",
+    );
+    notes("--version", version); // warm the index
+    const original = fs.readFileSync(file, "utf8");
+    const heading = original.match(new RegExp(`^## \\[${version.replaceAll(".", "\\.")}\\].*$`, "m"))[0];
+    fs.writeFileSync(file, original.replace(heading, `${heading}\n\nInserted by the notes-index suite.`));
+    try {
+      assert.match(notes("--version", version), /^Inserted by the notes-index suite\./);
+    } finally {
+      fs.writeFileSync(file, original);
+    }
+    assert.doesNotMatch(notes("--version", version), /Inserted by the notes-index suite/);
+  });
+
+  it("still fails for a version with no section", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const res = run("notes", "--version", "0.0.1");
+    assert.notEqual(res.status, 0);
+    assert.match(res.stderr, /no CHANGELOG\.md section found for version 0\.0\.1/);
+  });
+});
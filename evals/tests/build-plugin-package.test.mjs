@@ -0,0 +1,391 @@
+// `build-plugin.py package` runs on every push, and on most pushes nothing it ships has
+// changed. It used to delete the archive and re-deflate every file regardless; it now keeps
+// each compressed entry in `.build-cache/` under the content hash of its source. A cache is
+// the kind of optimisation that is correct on the day it lands and silently wrong a month
+// later — a stale entry ships yesterday's file under today's version — so this suite runs
+// the real packager against a throwaway copy of the tree and checks what it *wrote*, not
+// what it printed.
+//
+// Every check needs Python and skips cleanly without an interpreter.
+import { describe, it, before, after } from "node:test";
+import assert from "node:assert/strict";
+import crypto from "node:crypto";
+import fs from "node:fs";
+import path from "node:path";
+import { spawnSync } from "node:child_process";
+import { python, stageTree, removeTree, runBuildPlugin } from "../lib/build-plugin-tree.mjs";
+
+let root;
+let outDir;
+
+/** Run build-plugin.py in the staged tree; fails the test on a non-zero exit. */
+function build(...args) {
+  const res = runBuildPlugin(root, args);
+  assert.equal(res.status, 0, `build-plugin.py ${args.join(" ")} failed:\n${res.stdout}${res.stderr}`);
+  return res.stdout;
+}
+
+/** Every entry name in a zip, with its bytes, via Python's own zipfile as an independent reader. */
+function readArchive(zipPath) {
+  const res = spawnSync(
+    python,
+    [
+      "-B",
+      "-c",
+      "import base64,json,sys,zipfile\n" +
+        "z=zipfile.ZipFile(sys.argv[1])\n" +
+        "assert z.testzip() is None\n" +
+        "print(json.dumps({n: base64.b64encode(z.read(n)).decode() for n in z.namelist()}))\n",
+      zipPath,
+    ],
+    { encoding: "utf8" },
+  );
+  assert.equal(res.status, 0, `zipfile could not read ${zipPath}:\n${res.stderr}`);
+  return Object.fromEntries(
+    Object.entries(JSON.parse(res.stdout)).map(([n, b]) => [n, Buffer.from(b, "base64")]),
+  );
+}
+
+const archivePath = () => {
+  const zips = fs.readdirSync(outDir).filter((f) => f.endsWith(".zip"));
+  assert.equal(zips.length, 1, "package() must emit exactly one archive");
+  return path.join(outDir, zips[0]);
+};
+
+before(() => {
+  if (!python) return;
+  root = stageTree("pbsrs-package-cache-");
+  outDir = path.join(root, "dist");
+});
+
+after(() => removeTree(root));
+
+describe("build-plugin.py package reuses what has not changed", () => {
+  it("reports a cache hit when nothing it ships has changed", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    build("package", "--out-dir", "dist");
+    const before = fs.readFileSync(archivePath());
+    const out = build("package", "--out-dir", "dist");
+    assert.match(out, /\[package\] cache hit/, "an unchanged tree must be a reported no-op");
+    assert.deepEqual(fs.readFileSync(archivePath()), before, "a cache hit must not touch the archive");
+  });
+
+  it("recompresses only the file that changed, and ships its new content", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const changed = "skills/problem-based-srs/reference/live.md";
+    fs.appendFileSync(path.join(root, changed), "\n<!-- edited by the package-cache suite -->\n");
+    const out = build("package", "--out-dir", "dist");
+    assert.match(out, /\(\d+ files, 1 compressed,/, `exactly one entry must be re-deflated:\n${out}`);
+    const entries = readArchive(archivePath());
+    for (const [name, bytes] of Object.entries(entries)) {
+      const rel = name.split("/").slice(1).join("/");
+      // The one generated entry is shipped from where the build keeps it.
+      const source = rel === "skills-index.json" ? ".build-cache/skills-index.json" : rel;
+      assert.deepEqual(
+        bytes,
+        fs.readFileSync(path.join(root, source)),
+        `${name} must carry the file as it is on disk now — a stale cache entry ships old content`,
+      );
+    }
+  });
+
+  it("rebuilds from scratch with --no-cache and produces the same entries", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const cached = readArchive(archivePath());
+    const out = build("package", "--out-dir", "dist", "--no-cache");
+    assert.match(out, /0 from cache/, "--no-cache must not read a single cached entry");
+    assert.deepEqual(readArchive(archivePath()), cached);
+  });
+});
+
+describe("build-plugin.py package is reproducible", () => {
+  // CI and release runners dedupe archives by hash. That only works if the bytes depend on
+  // what is shipped — not on checkout mtimes, umask, or which worker thread finished first.
+  it("writes byte-identical archives from the same content, whatever the mtimes", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    build("package", "--out-dir", "dist", "--no-cache", "--jobs", "1");
+    const serial = fs.readFileSync(archivePath());
+    const past = new Date("2001-02-03T04:05:06Z");
+    for (const rel of ["skills/problem-based-srs/SKILL.md", "LICENSE"]) {
+      fs.utimesSync(path.join(root, rel), past, past);
+    }
+    build("package", "--out-dir", "dist", "--no-cache", "--jobs", "4");
+    assert.deepEqual(
+      fs.readFileSync(archivePath()),
+      serial,
+      "a parallel build after touching inputs must hash the same as a serial one",
+    );
+  });
+
+  it("stores entries in sorted order", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const names = Object.keys(readArchive(archivePath()));
+    assert.deepEqual(names, [...names].sort(), "entry order must not depend on traversal order");
+  });
+});
+
+describe("build-plugin.py package --delta-from / apply", () => {
+  // A patch is only worth shipping if applying it gives back the release, bit for bit:
+  // mirrors verify what they rebuilt against the published hash.
+  it("ships only what changed, and apply rebuilds the full archive byte for byte", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const ref = path.join(root, "skills/problem-based-srs/reference");
+    const gone = path.join(ref, "crm-example.md");
+    const removed = fs.readFileSync(gone);
+    const edited = path.join(ref, "needs.md");
+    const original = fs.readFileSync(edited);
+    build("package", "--out-dir", "delta/base");
+    const [baseName] = fs.readdirSync(path.join(root, "delta/base")).filter((f) => f.endsWith(".zip"));
+    const base = path.join("delta/base", baseName);
+    try {
+      fs.appendFileSync(edited, "\n<!-- edited by the delta suite -->\n");
+      fs.writeFileSync(path.join(ref, "added-by-delta-suite.md"), "# Added\n");
+      fs.rmSync(gone);
+      const out = build("package", "--out-dir", "delta/new", "--delta-from", base);
+      assert.match(out, /wrote delta .*\(1 added, 1 changed, 1 deleted;/);
+
+      const files = fs.readdirSync(path.join(root, "delta/new"));
+      const full = files.find((f) => f.endsWith(".zip") && !f.endsWith(".patch.zip"));
+      const patchName = files.find((f) => f.endsWith(".patch.zip"));
+      const patch = readArchive(path.join(root, "delta/new", patchName));
+      assert.deepEqual(
+        Object.keys(patch).map((n) => n.split("/").pop()).sort(),
+        ["added-by-delta-suite.md", "needs.md", "patch.json"],
+        "the patch must carry the added and changed files and nothing else",
+      );
+      assert.deepEqual(JSON.parse(patch["patch.json"]).deleted, [
+        `${baseName.replace(/-v[^-]*\.zip$/, "")}/skills/problem-based-srs/reference/crm-example.md`,
+      ]);
+
+      build("apply", "--base", base, "--patch", `delta/new/${patchName}`, "--out", "delta/rebuilt.zip");
+      assert.deepEqual(
+        fs.readFileSync(path.join(root, "delta/rebuilt.zip")),
+        fs.readFileSync(path.join(root, "delta/new", full)),
+        "base + patch must hash exactly as the archive the patch was made for",
+      );
+
+      const wrong = runBuildPlugin(root, ["apply", "--base", `delta/new/${full}`,
+        "--patch", `delta/new/${patchName}`, "--out", "delta/wrong.zip"]);
+      assert.notEqual(wrong.status, 0, "a patch applied to the wrong base must fail");
+      assert.match(wrong.stderr, /is not the archive this patch was made from/);
+      assert.ok(!fs.existsSync(path.join(root, "delta/wrong.zip")));
+    } finally {
+      fs.writeFileSync(gone, removed);
+      fs.writeFileSync(edited, original);
+      fs.rmSync(path.join(ref, "added-by-delta-suite.md"), { force: true });
+      fs.rmSync(path.join(root, "delta"), { recursive: true, force: true });
+    }
+  });
+});
+
+describe("build-plugin.py package --compression / --format", () => {
+  /** [name, compress_type, compressed size] for every entry, read by zipfile. */
+  function entryMethods(zipPath) {
+    const res = spawnSync(
+      python,
+      ["-B", "-c", "import json,sys,zipfile\nprint(json.dumps([[i.filename,i.compress_type,i.compress_size] for i in zipfile.ZipFile(sys.argv[1]).infolist()]))", zipPath],
+      { encoding: "utf8" },
+    );
+    assert.equal(res.status, 0, res.stderr);
+    return JSON.parse(res.stdout);
+  }
+
+  it("stores already-compressed and tiny files, deflates the rest, and ships the same bytes", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const png = path.join(root, "skills/problem-based-srs/reference/diagram.png");
+    fs.writeFileSync(png, Buffer.alloc(8192)); // compressible, but a .png gains nothing in practice
+    try {
+      const out = build("package", "--out-dir", "policy/auto", "--report");
+      assert.match(out, /store +8192 -> +8192 .*diagram\.png/, `the report must show the policy per entry:\n${out}`);
+      assert.match(out, /\[package\] entries: \d+ -> \d+ bytes/);
+      const [auto] = fs.readdirSync(path.join(root, "policy/auto")).filter((f) => f.endsWith(".zip"));
+      const methods = Object.fromEntries(
+        entryMethods(path.join(root, "policy/auto", auto)).map(([n, m]) => [n.split("/").pop(), m]),
+      );
+      assert.equal(methods["diagram.png"], 0, "a .png is stored");
+      assert.equal(methods["settings.json"], 0, "a file of a few bytes is stored");
+      assert.equal(methods["SKILL.md"], 8, "Markdown is deflated");
+
+      build("package", "--out-dir", "policy/store", "--compression", "store");
+      const stored = entryMethods(path.join(root, "policy/store", auto));
+      assert.ok(stored.every(([, m]) => m === 0), "--compression store stores every entry");
+      assert.deepEqual(
+        readArchive(path.join(root, "policy/store", auto)),
+        readArchive(path.join(root, "policy/auto", auto)),
+        "the policy changes how entries are stored, never what they contain",
+      );
+    } finally {
+      fs.rmSync(png, { force: true });
+      fs.rmSync(path.join(root, "policy"), { recursive: true, force: true });
+    }
+  });
+
+  for (const format of ["tar.gz", "tar.xz"]) {
+    it(`writes a reproducible ${format} with the same files as the zip`, (t) => {
+      if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+      try {
+        build("package", "--out-dir", "tarball/a", "--format", format);
+        const past = new Date("2001-02-03T04:05:06Z");
+        fs.utimesSync(path.join(root, "LICENSE"), past, past);
+        build("package", "--out-dir", "tarball/b", "--format", format, "--no-cache");
+        const [name] = fs.readdirSync(path.join(root, "tarball/a")).filter((f) => f.endsWith(format));
+        assert.ok(name.endsWith(`.${format}`));
+        assert.deepEqual(
+          fs.readFileSync(path.join(root, "tarball/a", name)),
+          fs.readFileSync(path.join(root, "tarball/b", name)),
+          `two ${format} builds of one tree must be byte-identical`,
+        );
+        const res = spawnSync(
+          python,
+          ["-B", "-c", "import json,sys,tarfile\nprint(json.dumps(sorted(tarfile.open(sys.argv[1]).getnames())))", path.join(root, "tarball/a", name)],
+          { encoding: "utf8" },
+        );
+        assert.equal(res.status, 0, res.stderr);
+        assert.deepEqual(JSON.parse(res.stdout), Object.keys(readArchive(archivePath())).sort());
+      } finally {
+        fs.rmSync(path.join(root, "tarball"), { recursive: true, force: true });
+      }
+    });
+  }
+});
+
+describe("build-plugin.py package --report", () => {
+  it("is refused for a tarball, which has no per-entry compression to report", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const res = runBuildPlugin(root, ["package", "--out-dir", "tarball/r", "--format", "tar.gz", "--report"]);
+    assert.equal(res.status, 1);
+    assert.match(res.stderr, /--report shows per-entry compression, which a tar\.gz does not have/);
+    assert.ok(!fs.existsSync(path.join(root, "tarball/r")), "nothing is written");
+  });
+});
+
+describe("build-plugin.py package checksums / verify", () => {
+  // The checksums are taken while the archive is written, not by reading it back, so they
+  // are held against an independent hash of what actually landed on disk.
+  const sha256 = (bytes) => crypto.createHash("sha256").update(bytes).digest("hex");
+
+  function verify(...args) {
+    return runBuildPlugin(root, ["verify", ...args]);
+  }
+
+  it("writes the archive's and every entry's SHA-256 as the archive is written", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    build("package", "--out-dir", "sums");
+    try {
+      const [zip] = fs.readdirSync(path.join(root, "sums")).filter((f) => f.endsWith(".zip"));
+      const manifest = JSON.parse(fs.readFileSync(path.join(root, "sums", `${zip}.manifest.json`), "utf8"));
+      const bytes = fs.readFileSync(path.join(root, "sums", zip));
+      assert.deepEqual(manifest.archive, { name: zip, size: bytes.length, sha256: sha256(bytes) });
+      const entries = readArchive(path.join(root, "sums", zip));
+      assert.deepEqual(
+        manifest.entries,
+        Object.entries(entries).map(([name, data]) => ({ name, size: data.length, sha256: sha256(data) })),
+      );
+      const lines = fs.readFileSync(path.join(root, "sums", `${zip}.sha256`), "utf8").trimEnd().split("\n");
+      assert.equal(lines[0], `${sha256(bytes)}  ${zip}`, "sha256sum -c checks the download from its first line");
+      assert.equal(lines.length, 1 + manifest.entries.length);
+
+      // A cache hit leaves the archive alone and still leaves its checksums beside it.
+      fs.rmSync(path.join(root, "sums", `${zip}.manifest.json`));
+      assert.match(build("package", "--out-dir", "sums"), /cache hit/);
+      assert.deepEqual(
+        JSON.parse(fs.readFileSync(path.join(root, "sums", `${zip}.manifest.json`), "utf8")),
+        manifest,
+      );
+    } finally {
+      fs.rmSync(path.join(root, "sums"), { recursive: true, force: true });
+    }
+  });
+
+  for (const format of ["zip", "tar.gz"]) {
+    it(`verify passes an intact ${format} and names what differs in a tampered one`, (t) => {
+      if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+      build("package", "--out-dir", "sums", "--format", format);
+      try {
+        const [archive] = fs.readdirSync(path.join(root, "sums")).filter((f) => f.endsWith(format));
+        const rel = `sums/${archive}`;
+        const ok = verify(rel);
+        assert.equal(ok.status, 0, ok.stderr);
+        assert.match(ok.stdout, /\[verify\] OK: .* \(\d+ entries, \d+ bytes read once\)/);
+
+        const manifestPath = path.join(root, "sums", `${archive}.manifest.json`);
+        const manifest = JSON.parse(fs.readFileSync(manifestPath, "utf8"));
+        const [entry] = manifest.entries.filter((e) => e.name.endsWith("/LICENSE"));
+        entry.sha256 = "0".repeat(64);
+        manifest.entries.push({ name: "gone/README.md", size: 1, sha256: "0".repeat(64) });
+        fs.writeFileSync(path.join(root, "sums/edited.json"), JSON.stringify(manifest));
+        const bad = verify(rel, "--manifest", "sums/edited.json");
+        assert.notEqual(bad.status, 0);
+        assert.match(bad.stderr, /gone\/README\.md: missing from the archive/);
+        assert.match(bad.stderr, /\/LICENSE: content does not match the manifest/);
+
+        const bytes = fs.readFileSync(path.join(root, rel));
+        bytes[bytes.length - 1] ^= 0xff;
+        fs.writeFileSync(path.join(root, rel), bytes);
+        const flipped = verify(rel);
+        assert.notEqual(flipped.status, 0, "a flipped byte in the archive must fail");
+      } finally {
+        fs.rmSync(path.join(root, "sums"), { recursive: true, force: true });
+      }
+    });
+  }
+});
+
+describe("build-plugin.py package ships a skills index", () => {
+  // The index exists so a consumer never has to parse SKILL.md itself, which only helps
+  // while it says exactly what the SKILL.md files it was built from say.
+  const sha256 = (bytes) => crypto.createHash("sha256").update(bytes).digest("hex");
+
+  function shippedIndex(outDir) {
+    const [zip] = fs.readdirSync(path.join(root, outDir)).filter((f) => f.endsWith(".zip"));
+    const entries = readArchive(path.join(root, outDir, zip));
+    const [name] = Object.keys(entries).filter((n) => n.endsWith("/skills-index.json"));
+    assert.ok(name, "the archive must carry skills-index.json");
+    assert.equal(name.split("/").length, 2, "the index sits at the archive root");
+    return JSON.parse(entries[name]);
+  }
+
+  it("lists every skill with its nested frontmatter, size and hash", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    build("package", "--out-dir", "indexed");
+    try {
+      const index = shippedIndex("indexed");
+      const skills = fs
+        .readdirSync(path.join(root, "skills"), { withFileTypes: true })
+        .filter((e) => e.isDirectory())
+        .map((e) => e.name)
+        .sort();
+      assert.deepEqual(index.skills.map((s) => s.name), skills);
+      for (const skill of index.skills) {
+        const md = fs.readFileSync(path.join(root, skill.path));
+        assert.equal(skill.size, md.length);
+        assert.equal(skill.sha256, sha256(md));
+        assert.equal(skill.frontmatter.name, skill.name);
+      }
+      const orchestrator = index.skills.find((s) => s.name === "problem-based-srs");
+      const version = fs
+        .readFileSync(path.join(root, orchestrator.path), "utf8")
+        .match(/^metadata:\n(?:[ \t].*\n)*?[ \t]+version:\s*"?([^"\n]+)"?$/m)[1];
+      assert.equal(orchestrator.frontmatter.metadata.version, version, "nested keys are kept");
+    } finally {
+      fs.rmSync(path.join(root, "indexed"), { recursive: true, force: true });
+    }
+  });
+
+  it("follows an edit to a skill's frontmatter into the next archive", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const skillMd = path.join(root, "skills/problem-based-srs/SKILL.md");
+    const original = fs.readFileSync(skillMd, "utf8");
+    build("validate");
+    try {
+      fs.writeFileSync(skillMd, original.replace(/^license: .*$/m, "license: Apache-2.0"));
+      build("package", "--out-dir", "indexed");
+      const [skill] = shippedIndex("indexed").skills.filter((s) => s.name === "problem-based-srs");
+      assert.equal(skill.frontmatter.license, "Apache-2.0");
+      assert.equal(skill.sha256, sha256(fs.readFileSync(skillMd)));
+    } finally {
+      fs.writeFileSync(skillMd, original);
+      fs.rmSync(path.join(root, "indexed"), { recursive: true, force: true });
+    }
+  });
+});
@@ -0,0 +1,170 @@
+// `build-plugin.py serve` answers build commands from a warm interpreter, so editors and
+// test runners can skip a Python start-up per call. A served answer is only a substitute
+// for running the script if it is the same answer, so this suite sends real command lines
+// to a real server on a throwaway copy of the tree and holds each reply against what the
+// script prints and exits with when run directly.
+//
+// Every check needs Python and skips cleanly without an interpreter.
+import { describe, it, before, after } from "node:test";
+import assert from "node:assert/strict";
+import fs from "node:fs";
+import net from "node:net";
+import path from "node:path";
+import readline from "node:readline";
+import { spawn } from "node:child_process";
+import { python, buildEnv, stageTree, removeTree, runBuildPlugin } from "../lib/build-plugin-tree.mjs";
+
+let root;
+
+const ENV = buildEnv();
+
+function run(...args) {
+  return runBuildPlugin(root, args);
+}
+
+// Start a server and resolve once it prints where it listens.
+function startServer(...args) {
+  const child = spawn(python, ["-B", path.join(root, "scripts/build-plugin.py"), "serve", ...args], {
+    cwd: root,
+    env: ENV,
+  });
+  const exited = new Promise((resolve) => child.on("exit", resolve));
+  const listening = new Promise((resolve, reject) => {
+    const lines = readline.createInterface({ input: child.stdout });
+    lines.on("line", (line) => {
+      const m = line.match(/^\[serve\] listening on (\S+);/);
+      if (m) resolve(m[1]);
+    });
+    child.on("exit", (code) => reject(new Error(`serve exited with ${code} before listening`)));
+  });
+  return { child, exited, listening };
+}
+
+// One connection, any number of requests, one JSON line back for each.
+async function connect(where) {
+  const socket = where.startsWith("unix:")
+    ? net.createConnection(where.slice("unix:".length))
+    : net.createConnection(Number(where.split(":")[1]), "127.0.0.1");
+  await new Promise((resolve, reject) => socket.once("connect", resolve).once("error", reject));
+  const replies = readline.createInterface({ input: socket })[Symbol.asyncIterator]();
+  return {
+    async send(line) {
+      socket.write(line + "\n");
+      const { value } = await replies.next();
+      return JSON.parse(value);
+    },
+    request(...argv) {
+      return this.send(JSON.stringify({ argv }));
+    },
+    close: () => socket.end(),
+  };
+}
+
+before(() => {
+  if (!python) return;
+  root = stageTree("pbsrs-serve-");
+});
+
+after(() => removeTree(root));
+
+describe("build-plugin.py serve", () => {
+  it("answers each command exactly as running the script would", async (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const server = startServer("--port", "0");
+    const client = await connect(await server.listening);
+    try {
+      // --no-cache where a first call would warm the cache the second one reads.
+      for (const argv of [
+        ["validate", "--no-cache"],
+        ["notes", "--version", "2.6"],
+        ["notes", "--all", "--format", "json"],
+        ["notes", "--version", "0.0.1"],
+        ["package", "--out-dir", "dist", "--no-cache"],
+        // A served path resolves against the repository, not the server's working directory.
+        ["trace", path.join(root, "missing.md")],
+      ]) {
+        const served = await client.request(...argv);
+        const direct = run(...argv);
+        assert.equal(served.status, direct.status, `exit status of ${argv.join(" ")}`);
+        assert.equal(served.stdout, direct.stdout, `stdout of ${argv.join(" ")}`);
+        assert.equal(served.stderr, direct.stderr, `stderr of ${argv.join(" ")}`);
+      }
+      const bad = await client.request("validate", "--no-such-flag");
+      assert.equal(bad.status, 2);
+      assert.match(bad.stderr, /unrecognized arguments: --no-such-flag/);
+    } finally {
+      await client.request("shutdown");
+      client.close();
+    }
+    assert.equal(await server.exited, 0, "shutdown stops the server cleanly");
+  });
+
+  it("refuses commands it does not serve and lines that are not requests", async (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const server = startServer("--port", "0");
+    const client = await connect(await server.listening);
+    try {
+      const watch = await client.request("watch");
+      assert.equal(watch.status, 2);
+      assert.match(watch.stderr, /serve answers validate, notes, package, build, trace, verify only/);
+      const garbage = await client.send("not json");
+      assert.equal(garbage.status, 2);
+      assert.match(garbage.stderr, /^bad request/);
+      const missing = await client.send(JSON.stringify({ args: ["validate"] }));
+      assert.equal(missing.status, 2, "a request without argv is refused, not run");
+      // The connection survives every refusal.
+      assert.equal((await client.request("validate")).status, 0);
+    } finally {
+      await client.request("shutdown");
+      client.close();
+    }
+    assert.equal(await server.exited, 0);
+  });
+
+  it("keeps every path a client passes inside the repository", async (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const server = startServer("--port", "0");
+    const client = await connect(await server.listening);
+    const outside = path.join(path.dirname(root), `${path.basename(root)}-outside`);
+    try {
+      for (const argv of [
+        ["package", "--out-dir", outside, "--no-cache"],
+        ["package", "--out-dir", "../escape", "--no-cache"],
+        ["verify", "/etc/hostname"],
+        ["trace", "../spec.md"],
+        ["validate", "--timings", "../timings.json"],
+      ]) {
+        const res = await client.request(...argv);
+        assert.equal(res.status, 1, `${argv.join(" ")} must be refused`);
+        assert.match(res.stderr, /is outside the repository/);
+      }
+      assert.ok(!fs.existsSync(outside), "nothing is written outside the repository");
+      assert.ok(!fs.existsSync(path.join(path.dirname(root), "escape")));
+      const inside = await client.request("trace", "missing.md");
+      assert.equal(inside.status, 1);
+      assert.match(inside.stderr, new RegExp(`specification not found: ${path.join(root, "missing.md")}`));
+    } finally {
+      await client.request("shutdown");
+      client.close();
+    }
+    assert.equal(await server.exited, 0);
+  });
+
+  it("listens on a Unix socket by default and removes it on shutdown", async (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    if (process.platform === "win32") return t.skip("no Unix sockets on Windows");
+    const server = startServer();
+    const where = await server.listening;
+    const socketPath = path.join(root, ".build-cache", "serve.sock");
+    assert.equal(where, `unix:${socketPath}`);
+    assert.equal(fs.statSync(socketPath).mode & 0o777, 0o600, "only the owner may connect");
+    const client = await connect(where);
+    const res = await client.request("validate");
+    assert.equal(res.status, 0, res.stderr);
+    assert.match(res.stdout, /\[validate\] success/);
+    await client.request("shutdown");
+    client.close();
+    assert.equal(await server.exited, 0);
+    assert.ok(!fs.existsSync(socketPath), "the socket file is removed");
+  });
+});
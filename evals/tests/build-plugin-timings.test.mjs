@@ -0,0 +1,103 @@
+// `build-plugin.py --timings` is what the build-cost charts are drawn from, so its numbers
+// have to describe the run that produced them: every phase that ran, in order, with the
+// bytes it actually moved. This suite runs the real script on a throwaway copy of the tree
+// and holds the report against what landed on disk.
+//
+// Every check needs Python and skips cleanly without an interpreter.
+import { describe, it, before, after } from "node:test";
+import assert from "node:assert/strict";
+import fs from "node:fs";
+import path from "node:path";
+import { python, stageTree, removeTree, runBuildPlugin } from "../lib/build-plugin-tree.mjs";
+
+let root;
+
+function run(env, ...args) {
+  return runBuildPlugin(root, args, { env });
+}
+
+before(() => {
+  if (!python) return;
+  root = stageTree("pbsrs-timings-");
+});
+
+after(() => removeTree(root));
+
+describe("build-plugin.py --timings", () => {
+  it("reports every phase of a build, with the bytes each one moved", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const res = run({}, "build", "--out-dir", "dist", "--no-cache", "--timings", "timings.json");
+    assert.equal(res.status, 0, `build failed:\n${res.stdout}${res.stderr}`);
+    const report = JSON.parse(fs.readFileSync(path.join(root, "timings.json"), "utf8"));
+    assert.equal(report.command, "build");
+    const names = report.phases.map((p) => p.phase);
+    for (const phase of ["manifest", "marketplace", "skills", "links", "archive", "notes"]) {
+      assert.ok(names.includes(phase), `no ${phase} phase in ${names.join(", ")}`);
+    }
+    assert.ok(names.indexOf("skills") < names.indexOf("archive"), "phases are listed in the order they ran");
+
+    const archive = report.phases.find((p) => p.phase === "archive");
+    const [zip] = fs.readdirSync(path.join(root, "dist")).filter((f) => f.endsWith(".zip"));
+    const size = (name) => fs.statSync(path.join(root, "dist", name)).size;
+    assert.equal(
+      archive.bytes_written,
+      size(zip) + size(`${zip}.sha256`) + size(`${zip}.manifest.json`),
+      "--no-cache writes nothing but the archive and its checksums, so the phase wrote exactly their size",
+    );
+    assert.ok(report.phases.every((p) => p.ok && p.wall_ms >= 0 && p.bytes_read >= 0));
+    const summed = report.phases.reduce((n, p) => n + p.bytes_read, 0);
+    assert.ok(report.total.bytes_read >= summed, "the total covers every phase");
+  });
+
+  it("reads each Markdown file under skills/ once in a cold validate", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const res = run({}, "validate", "--no-cache", "--timings", "validate-timings.json");
+    assert.equal(res.status, 0, `validate failed:\n${res.stdout}${res.stderr}`);
+    const report = JSON.parse(fs.readFileSync(path.join(root, "validate-timings.json"), "utf8"));
+    const read = (phase) => report.phases.find((p) => p.phase === phase).bytes_read;
+    const markdown = fs
+      .readdirSync(path.join(root, "skills"), { recursive: true })
+      .filter((rel) => rel.endsWith(".md"))
+      .reduce((n, rel) => n + fs.statSync(path.join(root, "skills", rel)).size, 0);
+    // The skills phase also compares the index it writes with the one already on disk.
+    const index = path.join(root, ".build-cache/skills-index.json");
+    const indexSize = fs.existsSync(index) ? fs.statSync(index).size : 0;
+    assert.ok(
+      read("skills") + read("links") <= markdown + indexSize,
+      `skills ${read("skills")} + links ${read("links")} bytes for ${markdown} bytes of Markdown`,
+    );
+  });
+
+  it("writes FILE under the repository root, whatever the working directory", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const res = runBuildPlugin(root, ["validate", "--timings", "from-skills.json"], {
+      cwd: path.join(root, "skills"),
+    });
+    assert.equal(res.status, 0, res.stderr);
+    assert.ok(fs.existsSync(path.join(root, "from-skills.json")));
+    assert.ok(!fs.existsSync(path.join(root, "skills", "from-skills.json")));
+  });
+
+  it("still reports, and marks the phase that failed, when the build fails", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const res = run({}, "notes", "--version", "0.0.1", "--timings");
+    assert.notEqual(res.status, 0);
+    const report = JSON.parse(res.stderr.slice(res.stderr.indexOf("{")));
+    assert.deepEqual(
+      report.phases.map((p) => [p.phase, p.ok]),
+      [["notes", false]],
+    );
+  });
+
+  it("publishes the report as the `timings` GitHub output", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const out = path.join(root, "github-output");
+    fs.writeFileSync(out, "");
+    const res = run({ GITHUB_OUTPUT: out }, "validate", "--no-cache", "--timings");
+    assert.equal(res.status, 0, res.stderr);
+    const line = fs.readFileSync(out, "utf8").split("\n").find((l) => l.startsWith("timings="));
+    assert.ok(line, "no timings= line in GITHUB_OUTPUT");
+    const report = JSON.parse(line.slice("timings=".length));
+    assert.deepEqual(report.phases.map((p) => p.phase), ["manifest", "marketplace", "skills", "links"]);
+  });
+});
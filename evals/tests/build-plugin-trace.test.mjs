@@ -0,0 +1,141 @@
+// `build-plugin.py trace` is the Python twin of the canvas parser for specifications the
+// canvas refuses: `parseSpecificationData` stops at 2 MB, and generated SRS documents for
+// large programs are bigger than that. Two parsers of one format are only useful while
+// they agree, so this suite holds the streaming checker against the JS parser and its
+// reference-integrity check on the same document, and then runs it on one past the limit.
+//
+// Every check needs Python and skips cleanly without an interpreter.
+import { describe, it, before, after } from "node:test";
+import assert from "node:assert/strict";
+import fs from "node:fs";
+import os from "node:os";
+import path from "node:path";
+import { python, repoRoot, runBuildPlugin } from "../lib/build-plugin-tree.mjs";
+
+const navigator = path.join(repoRoot, ".github/extensions/srs-navigator/lib");
+
+const { parseSpecificationData } = await import(path.join(navigator, "parser.mjs"));
+const { validateReferenceIntegrity } = await import(path.join(navigator, "validation.mjs"));
+
+let dir;
+
+/** Run trace on `spec` in the scratch directory, from somewhere other than the repository. */
+function trace(spec, ...args) {
+  return runBuildPlugin(repoRoot, ["trace", path.join(dir, spec), ...args], {
+    cwd: dir,
+    maxBuffer: 64 * 1024 * 1024,
+  });
+}
+
+// Both notations, bracketed and bare headings, an item with no ID, a reference under a
+// '##' note inside an item, and one gap of every kind.
+const SPEC = `# Customer Problems
+
+### CP.01: Orders get lost
+Orders vanish between sales and the warehouse.
+
+### [CP-2] Slow invoicing
+
+### Untitled pain
+
+# Customer Needs
+
+### CN.01.1: Track every order
+Addresses CP.01 and cp-9.
+
+### [CN-2] Faster invoices
+Addresses CP-2.
+
+### CN.03.1 Nobody asked
+No problem behind this one.
+
+# Functional Requirements
+
+### FR.01.1.1: Order log
+Implements CN.01.1.
+
+### FR-002 Invoice batch
+
+## Note
+Serves CN-2 and CN.07.1.
+
+### FR.03 Gold plating
+
+# Non-Functional Requirements
+
+### NFR.01 Response time
+CN.01.1, within 2 s.
+`;
+
+before(() => {
+  dir = fs.mkdtempSync(path.join(os.tmpdir(), "pbsrs-trace-"));
+  fs.writeFileSync(path.join(dir, "spec.md"), SPEC);
+});
+
+after(() => {
+  if (dir) fs.rmSync(dir, { recursive: true, force: true });
+});
+
+describe("build-plugin.py trace", () => {
+  it("finds the nodes and dangling references the canvas parser finds", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const res = trace("spec.md", "--format", "json");
+    assert.notEqual(res.status, 0, "a spec with gaps must fail the check");
+    const report = JSON.parse(res.stdout);
+
+    const spec = parseSpecificationData(SPEC);
+    assert.deepEqual(report.counts, {
+      problem: spec.problems.length,
+      need: spec.needs.length,
+      fr: spec.functionalRequirements.length,
+      nfr: spec.nonFunctionalRequirements.length,
+    });
+    assert.deepEqual(
+      [...report.dangling].sort(),
+      [...validateReferenceIntegrity(spec).errors].sort(),
+      "dangling references must read exactly as the canvas reports them",
+    );
+    assert.deepEqual(report.orphaned_needs, ["CN.03.1"]);
+    assert.deepEqual(report.untraced_requirements, ["FR.03"]);
+    assert.match(res.stderr, /Need CN\.03\.1 is orphaned/);
+    assert.match(res.stderr, /FR\.03 is untraced/);
+  });
+
+  it("checks a specification the canvas parser refuses as too large", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const parts = ["# Customer Problems\n"];
+    for (let i = 1; i <= 1500; i++) parts.push(`### CP.${i}: Problem ${i}\n${"p".repeat(200)}\n`);
+    parts.push("# Customer Needs\n");
+    for (let i = 1; i <= 1500; i++) parts.push(`### CN.${i}.1: Need\nAddresses CP.${i}. ${"n".repeat(600)}\n`);
+    parts.push("# Functional Requirements\n");
+    for (let i = 1; i <= 1500; i++) parts.push(`### FR.${i}.1.1: Req\nImplements CN.${i}.1. ${"f".repeat(800)}\n`);
+    parts.push("### FR.9999 Stray\nImplements CN.9999.1.\n");
+    const big = parts.join("\n");
+    fs.writeFileSync(path.join(dir, "big.md"), big);
+    assert.throws(() => parseSpecificationData(big), /Input too large/, "the fixture must exceed the canvas limit");
+
+    const res = trace("big.md");
+    assert.notEqual(res.status, 0);
+    assert.match(res.stdout, /1500 problem\(s\), 1500 need\(s\), 1501 FR, 0 NFR; 3001 link\(s\)/);
+    assert.match(res.stderr, /FR FR\.9999 references non-existent need CN\.9999\.1/);
+  });
+
+  it("passes a fully traced specification", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    fs.writeFileSync(
+      path.join(dir, "clean.md"),
+      "# Problems\n### CP.01 A\n# Needs\n### CN.01.1 B\nCP.01\n# Functional Requirements\n### FR.01.1.1 C\nCN.01.1\n",
+    );
+    const res = trace("clean.md");
+    assert.equal(res.status, 0, res.stderr);
+    assert.match(res.stdout, /\[trace\] OK/);
+  });
+
+  it("resolves a relative spec against the repository root, as serve does", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const rel = path.relative(repoRoot, path.join(dir, "clean.md"));
+    const res = runBuildPlugin(repoRoot, ["trace", rel], { cwd: dir });
+    assert.equal(res.status, 0, res.stderr);
+    assert.match(res.stdout, /\[trace\] OK/);
+  });
+});
@@ -0,0 +1,304 @@
+// `build-plugin.py validate` caches each unit's result in `.build-cache/validate.json`, so a
+// repository with hundreds of skills only re-parses the ones that changed. The failure this
+// guards is the one every validation cache eventually ships: a stale hit that reports a
+// broken skill as OK because the file was edited in a way the cache did not notice.
+//
+// Runs the real validator against a throwaway copy of the tree. Every check needs Python
+// and skips cleanly without an interpreter.
+import { describe, it, before, after } from "node:test";
+import assert from "node:assert/strict";
+import fs from "node:fs";
+import path from "node:path";
+import { spawn, spawnSync } from "node:child_process";
+import { python, buildEnv, stageTree, removeTree, runBuildPlugin } from "../lib/build-plugin-tree.mjs";
+
+let root;
+
+/** Run build-plugin.py in the staged tree and return the completed process. */
+function run(...args) {
+  return runBuildPlugin(root, args);
+}
+
+/** Like run(), but the command must succeed. */
+function ok(...args) {
+  const res = run(...args);
+  assert.equal(res.status, 0, `build-plugin.py ${args.join(" ")} failed:\n${res.stdout}${res.stderr}`);
+  return res.stdout;
+}
+
+const SKILL = "skills/problem-based-srs/SKILL.md";
+
+before(() => {
+  if (!python) return;
+  root = stageTree("pbsrs-validate-cache-", [".claude-plugin", "skills", "CHANGELOG.md"]);
+});
+
+after(() => removeTree(root));
+
+describe("build-plugin.py validate caches per unit", () => {
+  it("misses on a cold cache and hits every unit on an unchanged tree", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    assert.match(ok("validate"), /cache: 0 hit\(s\), 3 miss\(es\)/);
+    const warm = ok("validate");
+    assert.match(warm, /cache: 3 hit\(s\), 0 miss\(es\)/, `an unchanged tree must be all hits:\n${warm}`);
+    assert.match(warm, /skill OK: problem-based-srs/, "a cache hit must still report the skill");
+  });
+
+  it("still hits after a touch that leaves the content alone", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const later = new Date(Date.now() + 60_000);
+    fs.utimesSync(path.join(root, SKILL), later, later);
+    assert.match(ok("validate"), /cache: 3 hit\(s\)/, "a checkout that only moved mtimes is not a change");
+  });
+
+  it("revalidates a skill whose SKILL.md changed, and reports its new error", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const file = path.join(root, SKILL);
+    const original = fs.readFileSync(file, "utf8");
+    fs.writeFileSync(file, original.replace(/^name: .*$/m, "name: renamed-skill"));
+    try {
+      const res = run("validate");
+      assert.notEqual(res.status, 0, "a stale cache hit would have passed this broken skill");
+      assert.match(
+        res.stdout,
+        /cache: 1 hit\(s\), 2 miss\(es\)/,
+        "only the edited skill, and the link check that reads it, are misses",
+      );
+      assert.match(res.stderr, /does not match directory/);
+    } finally {
+      fs.writeFileSync(file, original);
+    }
+  });
+
+  it("revalidates the catalog when a manifest it read changes", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const file = path.join(root, ".claude-plugin/plugin.json");
+    const original = fs.readFileSync(file, "utf8");
+    const manifest = JSON.parse(original);
+    fs.writeFileSync(file, JSON.stringify({ ...manifest, name: "some-other-plugin" }, null, 2));
+    try {
+      const res = run("validate");
+      assert.notEqual(res.status, 0, "the catalog now names a plugin the repository does not publish");
+      assert.match(res.stderr, /does not catalog 'some-other-plugin'|does not match the plugin/);
+    } finally {
+      fs.writeFileSync(file, original);
+    }
+  });
+
+  it("bypasses the cache entirely with --no-cache", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const out = ok("validate", "--no-cache");
+    assert.doesNotMatch(out, /cache:/, "--no-cache must neither read nor report the cache");
+    assert.match(out, /marketplace OK: /, "the catalog is validated for real, not replayed");
+  });
+});
+
+describe("build-plugin.py validate resolves catalog sources once each", () => {
+  // Sourced manifests are loaded on a thread pool and memoized by path, with their content hash.
+  // Neither may change what is reported, or in which order.
+  it("reports per entry, in catalog order, however many entries share a source", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const file = path.join(root, ".claude-plugin/marketplace.json");
+    const original = fs.readFileSync(file, "utf8");
+    const catalog = JSON.parse(original);
+    for (const name of ["shared-a", "shared-b", "broken"]) {
+      fs.mkdirSync(path.join(root, "plugins", name, ".claude-plugin"), { recursive: true });
+      fs.writeFileSync(
+        path.join(root, "plugins", name, ".claude-plugin/plugin.json"),
+        name === "broken" ? "{ not json" : JSON.stringify({ name, version: "1.0.0" }),
+      );
+    }
+    const extra = Array.from({ length: 40 }, (_, i) => {
+      const name = ["shared-a", "shared-b"][i % 2];
+      return { name, source: `./plugins/${name}`, version: i === 17 ? "9.9.9" : "1.0.0" };
+    });
+    extra.splice(5, 0, { name: "broken", source: "./plugins/broken" });
+    extra.push({ name: "broken", source: "./plugins/broken" });
+    fs.writeFileSync(file, JSON.stringify({ ...catalog, plugins: [...catalog.plugins, ...extra] }, null, 2));
+    try {
+      const res = run("validate", "--no-cache");
+      assert.notEqual(res.status, 0);
+      const offset = catalog.plugins.length;
+      const reported = [...res.stderr.matchAll(/plugins\[(\d+)\]: (invalid JSON|pinned version)/g)].map(
+        (m) => [Number(m[1]) - offset, m[2]],
+      );
+      assert.deepEqual(reported, [
+        [5, "invalid JSON"],
+        [18, "pinned version"],
+        [41, "invalid JSON"],
+      ]);
+    } finally {
+      fs.writeFileSync(file, original);
+      fs.rmSync(path.join(root, "plugins"), { recursive: true, force: true });
+    }
+  });
+
+  it("keeps one memoized manifest per listed source, however often it is edited", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    // watch and serve validate in one long-lived process; the memo must not grow per edit.
+    const script =
+      "import importlib.util,json,sys\n" +
+      "spec=importlib.util.spec_from_file_location('bp', sys.argv[1])\n" +
+      "m=importlib.util.module_from_spec(spec)\n" +
+      "spec.loader.exec_module(m)\n" +
+      "meta=m._read_json(m.PLUGIN_MANIFEST)\n" +
+      "catalog=json.loads(m.MARKETPLACE_MANIFEST.read_text())\n" +
+      "listed=catalog['plugins']+[{'name':'edited','source':'./plugins/edited'}]\n" +
+      "m.MARKETPLACE_MANIFEST.write_text(json.dumps({**catalog,'plugins':listed}))\n" +
+      "manifest=m.REPO_ROOT/'plugins/edited/.claude-plugin/plugin.json'\n" +
+      "manifest.parent.mkdir(parents=True)\n" +
+      "sizes=[]\n" +
+      "for i in range(5):\n" +
+      "    manifest.write_text(json.dumps({'name':'edited','version':f'1.0.{i}'}))\n" +
+      "    m.validate_marketplace(meta)\n" +
+      "    sizes.append(len(m._SOURCED_MANIFESTS))\n" +
+      "m.MARKETPLACE_MANIFEST.write_text(json.dumps(catalog))\n" +
+      "m.validate_marketplace(meta)\n" +
+      "sizes.append(len(m._SOURCED_MANIFESTS))\n" +
+      "print(json.dumps(sizes))\n";
+    const file = path.join(root, ".claude-plugin/marketplace.json");
+    const original = fs.readFileSync(file, "utf8");
+    try {
+      const res = spawnSync(python, ["-B", "-c", script, path.join(root, "scripts/build_plugin.py")], {
+        encoding: "utf8",
+        env: buildEnv(),
+      });
+      assert.equal(res.status, 0, res.stderr);
+      const sizes = JSON.parse(res.stdout.trim().split("\n").pop());
+      assert.deepEqual(sizes, [2, 2, 2, 2, 2, 1], "one entry per source, and none for a dropped one");
+    } finally {
+      fs.writeFileSync(file, original);
+      fs.rmSync(path.join(root, "plugins"), { recursive: true, force: true });
+    }
+  });
+});
+
+describe("build-plugin.py validate checks links between skill docs", () => {
+  const REF = "skills/problem-based-srs/reference/needs.md";
+
+  it("reports a missing file and a missing heading anchor, with file and line", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const file = path.join(root, REF);
+    const original = fs.readFileSync(file, "utf8");
+    const edited =
+      original + "\nSee [a](../SKILL.md#no-such-heading), [b](not-written-yet.md), [c](#customer-needs-cn).\n";
+    fs.writeFileSync(file, edited);
+    try {
+      const res = run("validate");
+      assert.notEqual(res.status, 0);
+      const line = edited.split("\n").findIndex((l) => l.startsWith("See [a]")) + 1;
+      assert.match(res.stderr, new RegExp(`needs\\.md:${line}: broken link '\\.\\./SKILL\\.md#no-such-heading' \\(no heading`));
+      assert.match(res.stderr, /broken link 'not-written-yet\.md' \(no such file\)/);
+      assert.doesNotMatch(res.stderr, /#customer-needs-cn/, "an anchor for a heading in the same file resolves");
+
+      // Creating the target fixes the link even though no file the check read has changed.
+      fs.writeFileSync(path.join(root, "skills/problem-based-srs/reference/not-written-yet.md"), "# Soon\n");
+      const again = run("validate");
+      assert.doesNotMatch(again.stderr, /not-written-yet/, "a new file must invalidate the cached link check");
+    } finally {
+      fs.writeFileSync(file, original);
+      fs.rmSync(path.join(root, "skills/problem-based-srs/reference/not-written-yet.md"), { force: true });
+    }
+    assert.match(ok("validate"), /links OK/);
+  });
+});
+
+describe("build-plugin.py validate --jobs", () => {
+  const EXTRA = Array.from({ length: 12 }, (_, i) => `extra-${String(i).padStart(2, "0")}`);
+
+  // A pool returns results in completion order unless told otherwise. The error list is
+  // what a contributor reads top to bottom, so it must not reshuffle between runs.
+  it("reports the same errors, in directory order, as a serial run", (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    for (const name of EXTRA) {
+      fs.mkdirSync(path.join(root, "skills", name), { recursive: true });
+      // Every third skill is broken, and the body is long enough that reading it whole
+      // would be the dominant cost — the frontmatter is all validation needs.
+      const frontmatter = EXTRA.indexOf(name) % 3 === 0
+        ? `---\nname: wrong-${name}\n---\n`
+        : `---\nname: ${name}\ndescription: d\n---\n`;
+      fs.writeFileSync(path.join(root, "skills", name, "SKILL.md"), frontmatter + "x".repeat(64 * 1024));
+    }
+    try {
+      const serial = run("validate", "--no-cache");
+      const pooled = run("validate", "--no-cache", "--jobs", "4");
+      assert.notEqual(serial.status, 0);
+      assert.equal(pooled.status, serial.status);
+      assert.equal(pooled.stderr, serial.stderr, "the pooled error list must equal the serial one");
+      const named = [...serial.stderr.matchAll(/- (extra-\d+)\/SKILL\.md/g)].map((m) => m[1]);
+      assert.deepEqual(named, [...named].sort(), "errors are reported in directory order");
+    } finally {
+      for (const name of EXTRA) fs.rmSync(path.join(root, "skills", name), { recursive: true });
+    }
+  });
+});
+
+describe("build-plugin.py watch", () => {
+  /** Resolve once the watcher's accumulated stdout matches `pattern`, or reject on timeout. */
+  function waitFor(child, state, pattern, ms = 10_000) {
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        child.stdout.off("data", check);
+        reject(new Error(`watch never printed ${pattern}:\n${state.out}`));
+      }, ms);
+      function check() {
+        if (!pattern.test(state.out)) return;
+        clearTimeout(timer);
+        child.stdout.off("data", check);
+        resolve(state.out);
+      }
+      child.stdout.on("data", check);
+      check();
+    });
+  }
+
+  it("revalidates only the skill that was saved", async (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const child = spawn(python, ["-B", "-u", path.join(root, "scripts/build-plugin.py"), "watch"], {
+      cwd: root,
+      env: buildEnv(),
+    });
+    const state = { out: "" };
+    child.stdout.setEncoding("utf8");
+    child.stdout.on("data", (chunk) => (state.out += chunk));
+    const file = path.join(root, SKILL);
+    const original = fs.readFileSync(file, "utf8");
+    try {
+      await waitFor(child, state, /\[watch\] watching/);
+      assert.match(state.out, /revalidated \d+ unit\(s\) in [\d.]+ ms: all OK/);
+      state.out = "";
+      fs.writeFileSync(file, original.replace(/^name: .*$/m, "name: renamed-skill"));
+      const out = await waitFor(child, state, /revalidated 2 unit\(s\)/);
+      assert.match(out, /does not match directory/, "the save must surface the skill's new error");
+      assert.match(out, /\[watch\] links OK/, "links are rechecked with the skill");
+      assert.doesNotMatch(out, /marketplace OK/, "an edit under skills/ must not revalidate the catalog");
+    } finally {
+      child.kill();
+      fs.writeFileSync(file, original);
+    }
+  });
+
+  it("reports a broken link added on save, as validate does", async (t) => {
+    if (!python) return t.skip("no python interpreter available to run build-plugin.py");
+    const child = spawn(python, ["-B", "-u", path.join(root, "scripts/build-plugin.py"), "watch"], {
+      cwd: root,
+      env: buildEnv(),
+    });
+    const state = { out: "" };
+    child.stdout.setEncoding("utf8");
+    child.stdout.on("data", (chunk) => (state.out += chunk));
+    const file = path.join(root, SKILL);
+    const original = fs.readFileSync(file, "utf8");
+    try {
+      await waitFor(child, state, /\[watch\] watching/);
+      state.out = "";
+      fs.writeFileSync(file, original + "\n[x](reference/nope.md)\n");
+      const out = await waitFor(child, state, /revalidated \d+ unit\(s\)/);
+      assert.match(out, /\[watch\] links: .*broken link 'reference\/nope\.md' \(no such file\)/);
+      assert.doesNotMatch(out, /all OK/);
+    } finally {
+      child.kill();
+      fs.writeFileSync(file, original);
+    }
+  });
+});
@@ -41,7 +41,7 @@ const read = (rel) => fs.readFileSync(path.join(repoRoot, rel), "utf8");
 
 const README = read("README.md");
 const LANDING = read("docs/index.html");
-const BUILD_SCRIPT = read("scripts/build-plugin.py");
+const BUILD_SCRIPT = read("scripts/build_plugin.py");
 const PLUGIN = JSON.parse(read(".claude-plugin/plugin.json"));
 
 const MARKETPLACE_REL = ".claude-plugin/marketplace.json";
@@ -165,12 +165,15 @@ function stageValidatableTree(marketplace) {
   const dir = fs.mkdtempSync(path.join(os.tmpdir(), "srs-marketplace-"));
   fs.mkdirSync(path.join(dir, "scripts"), { recursive: true });
   fs.mkdirSync(path.join(dir, ".claude-plugin"), { recursive: true });
-  fs.mkdirSync(path.join(dir, "skills", "problem-based-srs"), { recursive: true });
-  fs.copyFileSync(path.join(repoRoot, "scripts/build-plugin.py"), path.join(dir, "scripts/build-plugin.py"));
+  for (const script of ["build-plugin.py", "build_plugin.py"]) {
+    fs.copyFileSync(path.join(repoRoot, "scripts", script), path.join(dir, "scripts", script));
+  }
   fs.copyFileSync(path.join(repoRoot, ".claude-plugin/plugin.json"), path.join(dir, ".claude-plugin/plugin.json"));
-  fs.copyFileSync(
-    path.join(repoRoot, "skills/problem-based-srs/SKILL.md"),
-    path.join(dir, "skills/problem-based-srs/SKILL.md"),
+  // The whole skill, not just SKILL.md: validate also resolves the links into reference/.
+  fs.cpSync(
+    path.join(repoRoot, "skills/problem-based-srs"),
+    path.join(dir, "skills/problem-based-srs"),
+    { recursive: true },
   );
   if (marketplace !== null) {
     fs.writeFileSync(path.join(dir, MARKETPLACE_REL), JSON.stringify(marketplace, null, 2));
@@ -625,7 +625,7 @@ describe("a dangling link that cutting the release would not fix", () => {
   });
 
   it("takes the plugin changelog from the file the release pipeline reads", () => {
-    const build = read("scripts/build-plugin.py");
+    const build = read("scripts/build_plugin.py");
     assert.match(
       build,
       /CHANGELOG\s*=\s*REPO_ROOT\s*\/\s*"CHANGELOG\.md"/,
@@ -0,0 +1,245 @@
+// `docs/helper/extract-pdf.py` can spread pages over worker processes, stream them to a
+// `.part` file, write embedded images once by content and reuse pages an earlier run
+// journaled. Every one of those is only safe while the document that comes out is the one
+// a plain serial run would have written, so this suite extracts small PDFs that
+// `bench-extract-pdf.py`'s `write_pdf` builds from scratch and compares what comes out.
+//
+// Every check needs Python with pdfplumber and Pillow, and skips cleanly without them.
+import { describe, it, before, after } from "node:test";
+import assert from "node:assert/strict";
+import fs from "node:fs";
+import os from "node:os";
+import path from "node:path";
+import { spawnSync } from "node:child_process";
+import { python, repoRoot, buildEnv } from "../lib/build-plugin-tree.mjs";
+
+const SCRIPT = path.join(repoRoot, "docs/helper/extract-pdf.py");
+const BENCH = path.join(repoRoot, "docs/helper/bench-extract-pdf.py");
+
+const usable = python && spawnSync(python, ["-c", "import pdfplumber, PIL"]).status === 0;
+const SKIP = "no python interpreter with pdfplumber and Pillow available to run extract-pdf.py";
+
+// Every page holds five lines of text, one pixel image, one JPEG photo and the logo all
+// pages share. write_pdf draws the pages from one seed in order, so the first four pages
+// of revised/six/doc.pdf are those of revised/four/doc.pdf.
+const PDFS = {
+  "three.pdf": 3,
+  "four.pdf": 4,
+  "revised/four/doc.pdf": 4,
+  "revised/six/doc.pdf": 6,
+};
+
+// Where the image mode makes no difference, embedded is used: it renders nothing.
+const EMBEDDED = ["--images", "embedded"];
+
+let dir;
+const pdfPath = (name) => path.join(dir, name);
+// A plain serial extraction of four.pdf in embedded mode, over an earlier run's output.
+let plain;
+
+before(() => {
+  dir = fs.mkdtempSync(path.join(os.tmpdir(), "pbsrs-extract-"));
+  if (!usable) return;
+  // One interpreter writes every PDF with write_pdf from bench-extract-pdf.py.
+  const script =
+    "import importlib.util,json,sys\n" +
+    "from pathlib import Path\n" +
+    "spec=importlib.util.spec_from_file_location('bench', sys.argv[1])\n" +
+    "m=importlib.util.module_from_spec(spec)\n" +
+    "spec.loader.exec_module(m)\n" +
+    "for name, pages in json.loads(sys.argv[3]).items():\n" +
+    "    path=Path(sys.argv[2], name)\n" +
+    "    path.parent.mkdir(parents=True, exist_ok=True)\n" +
+    "    m.write_pdf(path, pages, 5, 1, 1, True)\n";
+  const res = spawnSync(python, ["-B", "-c", script, BENCH, dir, JSON.stringify(PDFS)], {
+    encoding: "utf8",
+    env: buildEnv(),
+  });
+  assert.equal(res.status, 0, res.stdout + res.stderr);
+  fs.mkdirSync(path.join(dir, "plain"));
+  fs.writeFileSync(path.join(dir, "plain/out.md"), "an earlier run\n");
+  plain = extract(pdfPath("four.pdf"), "plain/out.md", ...EMBEDDED);
+});
+
+after(() => fs.rmSync(dir, { recursive: true, force: true }));
+
+/** Extract `pdf` into `out` (relative to the suite's directory) and return the process. */
+function run(pdf, out, ...args) {
+  fs.mkdirSync(path.dirname(path.join(dir, out)), { recursive: true });
+  return spawnSync(python, ["-B", SCRIPT, pdf, path.join(dir, out), ...args], {
+    encoding: "utf8",
+    env: buildEnv({ PYTHONIOENCODING: "utf-8" }),
+  });
+}
+
+/** Extract `pdf` into `out`; return the Markdown, the image files and stdout. */
+function extract(pdf, out, ...args) {
+  const res = run(pdf, out, ...args);
+  assert.equal(res.status, 0, res.stdout + res.stderr);
+  const imgDir = path.join(dir, path.dirname(out), "img");
+  const images = Object.fromEntries(
+    fs.readdirSync(imgDir).sort().map((f) => [f, fs.readFileSync(path.join(imgDir, f))]),
+  );
+  return { text: fs.readFileSync(path.join(dir, out), "utf8"), images, stdout: res.stdout };
+}
+
+/** The page numbers of the `<!-- Page N -->` markers in `text`, in order. */
+const pageMarkers = (text) => [...text.matchAll(/<!-- Page (\d+) -->/g)].map((m) => Number(m[1]));
+
+describe("extract-pdf.py --workers", () => {
+  it("writes the same Markdown and images as a serial run", (t) => {
+    if (!usable) return t.skip(SKIP);
+    const pdf = pdfPath("four.pdf");
+    const serial = {
+      raster: extract(pdf, "raster-serial/out.md", "--images", "raster"),
+      embedded: plain,
+    };
+    for (const mode of ["raster", "embedded"]) {
+      const args = ["--images", mode, "--workers", "2"];
+      const parallel = extract(pdf, `${mode}-workers/out.md`, ...args);
+      assert.equal(parallel.text, serial[mode].text, `${mode}: pages merged back in page order`);
+      assert.deepEqual(parallel.images, serial[mode].images, `${mode}: the same image files`);
+      assert.deepEqual(pageMarkers(parallel.text), [1, 2, 3, 4]);
+    }
+  });
+});
+
+describe("extract-pdf.py streams to <output>.part", () => {
+  it("moves the finished document into place and leaves no .part behind", (t) => {
+    if (!usable) return t.skip(SKIP);
+    assert.equal(fs.existsSync(path.join(dir, "plain/out.md.part")), false);
+    assert.deepEqual(pageMarkers(plain.text), [1, 2, 3, 4]);
+    assert.doesNotMatch(plain.text, /an earlier run/, "the output is replaced, not appended to");
+  });
+
+  it("leaves the previous document in place when a run fails part-way", (t) => {
+    if (!usable) return t.skip(SKIP);
+    const pdf = pdfPath("four.pdf");
+    extract(pdf, "broken/out.md", ...EMBEDDED, "--incremental");
+    fs.writeFileSync(path.join(dir, "broken/out.md"), "an earlier run\n");
+    // Pages 1 and 2 are reused and written; page 3's journal entry then fails to write.
+    const journal = path.join(dir, "broken/out.md.journal.jsonl");
+    const entries = fs.readFileSync(journal, "utf8").trim().split("\n").map((l) => JSON.parse(l));
+    delete entries[2].result.warnings;
+    fs.writeFileSync(journal, entries.map((e) => JSON.stringify(e) + "\n").join(""));
+    const res = run(pdf, "broken/out.md", ...EMBEDDED, "--incremental");
+    assert.notEqual(res.status, 0, "the run must fail for this check to mean anything");
+    assert.equal(fs.readFileSync(path.join(dir, "broken/out.md"), "utf8"), "an earlier run\n");
+    const partial = fs.readFileSync(path.join(dir, "broken/out.md.part"), "utf8");
+    assert.deepEqual(pageMarkers(partial), [1, 2], "the pages before the failure streamed out");
+  });
+});
+
+describe("extract-pdf.py --images embedded", () => {
+  it("writes an image every page repeats once, and points every page at that file", (t) => {
+    if (!usable) return t.skip(SKIP);
+    const { text, images, stdout } = plain;
+    const refs = [...text.matchAll(/!\[Image \d+\]\(([^)]+)\)/g)].map((m) => m[1]);
+    assert.equal(refs.length, 12, "three images on each of four pages");
+    const uses = {};
+    for (const ref of refs) uses[ref] = (uses[ref] || 0) + 1;
+    assert.deepEqual(Object.values(uses).filter((n) => n > 1), [4], "the logo, once per page");
+    assert.equal(Object.keys(images).length, Object.keys(uses).length, "one file per image");
+    assert.match(stdout, new RegExp(`Extracted 12 images \\(${Object.keys(uses).length} distinct`));
+    assert.ok(Object.keys(images).some((f) => f.endsWith(".jpg")), "JPEG photos kept as JPEG");
+  });
+
+  it("leaves image files that already hold the same content alone", (t) => {
+    if (!usable) return t.skip(SKIP);
+    const pdf = pdfPath("three.pdf");
+    extract(pdf, "again/out.md", ...EMBEDDED);
+    const imgDir = path.join(dir, "again/img");
+    const files = fs.readdirSync(imgDir).sort();
+    const old = new Date("2020-01-01T00:00:00Z");
+    for (const f of files) fs.utimesSync(path.join(imgDir, f), old, old);
+    extract(pdf, "again/out.md", ...EMBEDDED);
+    for (const f of files) {
+      const { mtimeMs } = fs.statSync(path.join(imgDir, f));
+      assert.equal(mtimeMs, old.getTime(), `${f} was written again`);
+    }
+    assert.deepEqual(fs.readdirSync(imgDir).sort(), files, "and no temporary file is left behind");
+  });
+});
+
+describe("extract-pdf.py --pages and --incremental", () => {
+  const reused = (stdout) => Number(stdout.match(/^Reused (\d+) unchanged pages/m)[1]);
+
+  it("writes only the pages asked for, and no journal without --incremental", (t) => {
+    if (!usable) return t.skip(SKIP);
+    const args = [...EMBEDDED, "--pages", "2,4-"];
+    const { text, stdout } = extract(pdfPath("revised/six/doc.pdf"), "pages/out.md", ...args);
+    assert.deepEqual(pageMarkers(text), [2, 4, 5, 6]);
+    assert.match(stdout, /Extracted 4 of 6 pages/);
+    assert.equal(fs.existsSync(path.join(dir, "pages/out.md.journal.jsonl")), false);
+    assert.equal(fs.existsSync(path.join(dir, "plain/out.md.journal.jsonl")), false);
+  });
+
+  it("fills in a document extracted range by range, reusing what is journaled", (t) => {
+    if (!usable) return t.skip(SKIP);
+    const pdf = pdfPath("four.pdf");
+    extract(pdf, "ranges/out.md", ...EMBEDDED, "--incremental", "--pages", "1-2");
+    const args = [...EMBEDDED, "--incremental", "--workers", "2"];
+    const whole = extract(pdf, "ranges/out.md", ...args);
+    assert.equal(reused(whole.stdout), 2);
+    assert.equal(whole.text, plain.text);
+    assert.deepEqual(whole.images, plain.images);
+  });
+
+  it("reuses unchanged pages of a revised PDF and extracts the rest", (t) => {
+    if (!usable) return t.skip(SKIP);
+    extract(pdfPath("revised/four/doc.pdf"), "revised/out.md", ...EMBEDDED, "--incremental");
+    const args = [...EMBEDDED, "--incremental"];
+    const grown = extract(pdfPath("revised/six/doc.pdf"), "revised/out.md", ...args);
+    assert.equal(reused(grown.stdout), 4, "only pages 5 and 6 are new");
+    assert.deepEqual(pageMarkers(grown.text), [1, 2, 3, 4, 5, 6]);
+  });
+
+  it("extracts a journaled page again once one of its image files is gone", (t) => {
+    if (!usable) return t.skip(SKIP);
+    const pdf = pdfPath("three.pdf");
+    const first = extract(pdf, "missing/out.md", ...EMBEDDED, "--incremental");
+    // A photo, drawn on one page only (the logo is on all three).
+    const photo = Object.keys(first.images).find((f) => f.endsWith(".jpg"));
+    fs.rmSync(path.join(dir, "missing/img", photo));
+    const again = extract(pdf, "missing/out.md", ...EMBEDDED, "--incremental");
+    assert.equal(reused(again.stdout), 2);
+    assert.deepEqual(again.images, first.images, "the missing file is written again");
+  });
+
+  it("hashes pages against the image mode, so switching modes reuses nothing", (t) => {
+    if (!usable) return t.skip(SKIP);
+    const pdf = pdfPath("three.pdf");
+    extract(pdf, "modes/out.md", "--incremental");
+    const embedded = extract(pdf, "modes/out.md", ...EMBEDDED, "--incremental");
+    assert.equal(reused(embedded.stdout), 0);
+  });
+});
+
+describe("extract-pdf.py --profile", () => {
+  it("writes per-page timings whose totals add up, and prints the summary", (t) => {
+    if (!usable) return t.skip(SKIP);
+    const report = path.join(dir, "profile.json");
+    const args = [...EMBEDDED, "--workers", "2", "--profile", report];
+    const { stdout } = extract(pdfPath("four.pdf"), "profile/out.md", ...args);
+    assert.match(stdout, /^Profile: 4 pages \(4 extracted\) in .* pages\/s, workers 2/m);
+    const data = JSON.parse(fs.readFileSync(report, "utf8"));
+    assert.equal(data.pages, 4);
+    assert.equal(data.extracted, 4);
+    assert.deepEqual(data.per_page.map((p) => p.page).sort(), [1, 2, 3, 4]);
+    assert.ok(data.per_page.every((p) => p.images === 3));
+    for (const phase of ["text", "raster", "save"]) {
+      const sum = data.per_page.reduce((total, p) => total + p[phase], 0);
+      assert.ok(Math.abs(data.totals_s[phase] - sum) < 1e-9, `${phase} total is the pages' sum`);
+    }
+  });
+
+  it("counts reused pages but has no timings for them", (t) => {
+    if (!usable) return t.skip(SKIP);
+    const pdf = pdfPath("three.pdf");
+    extract(pdf, "profile-reused/out.md", ...EMBEDDED, "--incremental");
+    const args = [...EMBEDDED, "--incremental", "--profile"];
+    const { stdout } = extract(pdf, "profile-reused/out.md", ...args);
+    assert.match(stdout, /^Profile: 3 pages \(0 extracted\)/m);
+    assert.doesNotMatch(stdout, /slowest pages/);
+  });
+});
@@ -51,6 +51,16 @@ export function packageIncludes(pySource) {
   return [...block[1].matchAll(/["']([^"']+)["']/g)].map((m) => m[1]);
 }
 
+/**
+ * The files the build generates into the archive root (the skills index), read out of the
+ * script the same way. They have no source in the checkout, so staging cannot copy them.
+ */
+export function generatedEntries(pySource) {
+  const block = pySource.match(/^GENERATED_ENTRIES\s*=\s*\[([\s\S]*?)^\]/m);
+  if (!block) return [];
+  return [...block[1].matchAll(/["']([^"']+)["']/g)].map((m) => m[1]);
+}
+
 /** Every file under a directory, as forward-slash paths relative to it. */
 export function walk(dir, base = dir) {
   return fs.readdirSync(dir, { withFileTypes: true }).flatMap((e) => {
@@ -119,9 +129,10 @@ export function stagePluginArchive(dest, { includes, rootName }) {
 
 /* -------------------------------------------------------------------- setup */
 
-const BUILD_PY = read("scripts/build-plugin.py");
+const BUILD_PY = read("scripts/build_plugin.py");
 const PLUGIN_META = JSON.parse(read(".claude-plugin/plugin.json"));
 const INCLUDES = packageIncludes(BUILD_PY);
+const GENERATED = generatedEntries(BUILD_PY);
 const ROOT_NAME = PLUGIN_META.name;
 const README = read("README.md");
 const SKILL_MD = read("skills/problem-based-srs/SKILL.md");
@@ -149,7 +160,7 @@ describe("the staged tree is derived from the packager, not restated", () => {
   it("reads a non-empty include list out of build-plugin.py", () => {
     assert.ok(
       INCLUDES.length > 0,
-      "PACKAGE_INCLUDES could not be parsed from scripts/build-plugin.py — every assertion " +
+      "PACKAGE_INCLUDES could not be parsed from scripts/build_plugin.py — every assertion " +
         "below stages from it, so a silent parse failure would make this suite vacuous",
     );
     for (const rel of INCLUDES) {
@@ -159,6 +170,11 @@ describe("the staged tree is derived from the packager, not restated", () => {
           `silently ship without it (package() skips missing paths)`,
       );
     }
+    assert.ok(
+      GENERATED.length > 0,
+      "GENERATED_ENTRIES could not be parsed from scripts/build_plugin.py — the fidelity " +
+        "check would then blame the packager for shipping the skills index",
+    );
   });
 
   it("ships the plugin manifest, the agent and the skills", () => {
@@ -227,9 +243,9 @@ describe("the staged tree is derived from the packager, not restated", () => {
         .sort();
       assert.deepEqual(
         inArchive,
-        [...stagedFiles].sort(),
-        "the staged tree must equal what package() writes; if they diverge, every assertion " +
-          "in this suite is checking a tree nobody ships",
+        [...stagedFiles, ...GENERATED].sort(),
+        "the staged tree, plus what the build generates, must equal what package() writes; if " +
+          "they diverge, every assertion in this suite is checking a tree nobody ships",
       );
       assert.deepEqual(
         entries.filter((e) => !e.startsWith(`${ROOT_NAME}/`)),
@@ -480,10 +480,10 @@ describe("the tag rule is derived from the pipeline, not restated", () => {
       "print('\\n'.join(m.normalize_version(v) for v in sys.argv[2:]))\n";
     let out = null;
     for (const exe of ["python3", "python"]) {
-      // -B: importing build-plugin.py must not leave a __pycache__ in a tracked directory.
+      // -B: importing build_plugin.py must not leave a __pycache__ in a tracked directory.
       const res = spawnSync(
         exe,
-        ["-B", "-c", script, path.join(repoRoot, "scripts/build-plugin.py"), ...cases],
+        ["-B", "-c", script, path.join(repoRoot, "scripts/build_plugin.py"), ...cases],
         { encoding: "utf8", env: { ...process.env, PYTHONDONTWRITEBYTECODE: "1" } },
       );
       if (res.status === 0) {
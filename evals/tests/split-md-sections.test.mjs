@@ -0,0 +1,185 @@
+// `docs/helper/split-md-sections.py --headings` cuts a document at its own headings, and a
+// '#' line inside a fenced code block is a comment, not a heading. The fence tracking is a
+// single regex pass, so this suite pins down the cases that pass gets wrong silently: an
+// opening fence with an info string, and a fence that a shorter or different marker inside
+// it must not close. A wrong answer here is an extra file cut from the middle of a listing.
+//
+// Without --headings, sections are cut between the `<!-- Page N -->` markers a section map
+// names, as byte slices of the memory-mapped input; those slices must be exactly the text
+// between the markers, whatever the document's line endings or encoding.
+//
+// Every check needs Python and skips cleanly without an interpreter.
+import { describe, it, before, after } from "node:test";
+import assert from "node:assert/strict";
+import fs from "node:fs";
+import os from "node:os";
+import path from "node:path";
+import { spawnSync } from "node:child_process";
+import { python, repoRoot, buildEnv } from "../lib/build-plugin-tree.mjs";
+
+const SCRIPT = path.join(repoRoot, "docs/helper/split-md-sections.py");
+const hasYaml = python && spawnSync(python, ["-c", "import yaml"]).status === 0;
+
+let dir;
+
+before(() => {
+  dir = fs.mkdtempSync(path.join(os.tmpdir(), "pbsrs-split-"));
+});
+
+after(() => fs.rmSync(dir, { recursive: true, force: true }));
+
+/** Split `doc` by its level-1 headings and return the section files written, in order. */
+function split(name, doc) {
+  const input = path.join(dir, `${name}.md`);
+  const out = path.join(dir, name);
+  fs.writeFileSync(input, doc);
+  const res = spawnSync(python, ["-B", SCRIPT, input, out, "--headings"], {
+    encoding: "utf8",
+    env: buildEnv({ PYTHONIOENCODING: "utf-8" }),
+  });
+  assert.equal(res.status, 0, res.stdout + res.stderr);
+  return fs.readdirSync(out).filter((f) => f !== "README.md").sort();
+}
+
+/** Split `doc` with the section `map` (an object, or YAML text for a .yaml `mapName`). */
+function splitWithMap(name, doc, map, mapName = `${name}.json`) {
+  const input = path.join(dir, `${name}.md`);
+  const mapPath = path.join(dir, mapName);
+  fs.writeFileSync(input, doc);
+  fs.writeFileSync(mapPath, typeof map === "string" ? map : JSON.stringify(map));
+  return spawnSync(python, ["-B", SCRIPT, input, path.join(dir, name), "--map", mapPath], {
+    encoding: "utf8",
+    env: buildEnv({ PYTHONIOENCODING: "utf-8" }),
+  });
+}
+
+/** Read section `file` of the split `name`. */
+const section = (name, file) => fs.readFileSync(path.join(dir, name, file), "utf8");
+
+// Page 2 appears twice: a section ending there ends at its first marker after the start.
+const PAGED =
+  "front\n<!-- Page 1 -->\nUm é ação.\r\n<!-- Page 2 -->\ntwo\n<!-- Page 3 -->\nthree\n" +
+  "<!-- Page 2 -->\nagain\n<!-- Page 4 -->\nfour\n";
+
+const PAGED_MAP = {
+  title: "Paged",
+  part_of: "The Whole",
+  sections: [
+    { start_page: 1, end_page: 2, file: "a.md", title: "A" },
+    { start_page: 3, end_page: 2, file: "b.md", title: "B" },
+    { start_page: 4, file: "c.md", title: "C" },
+    { start_page: 9, end_page: 10, file: "missing.md", title: "Missing" },
+  ],
+};
+
+describe("split-md-sections.py --headings skips headings inside fenced code", () => {
+  it("treats a fence with an info string as opening a block", (t) => {
+    if (!python) return t.skip("no python interpreter available to run split-md-sections.py");
+    const files = split(
+      "info-string",
+      "# Intro\n\n```python\n# not a heading\n```\n\n# Real Two\n\ntext\n\n# Three\n",
+    );
+    assert.deepEqual(files, ["00-intro.md", "01-real-two.md", "02-three.md"]);
+    const intro = fs.readFileSync(path.join(dir, "info-string", "00-intro.md"), "utf8");
+    assert.match(intro, /```python\n# not a heading\n```/, "the listing stays in its section");
+  });
+
+  it("closes a fence only on a bare marker of the same character, at least as long", (t) => {
+    if (!python) return t.skip("no python interpreter available to run split-md-sections.py");
+    const doc = [
+      "# One",
+      "````markdown",
+      "```",
+      "# inside a longer fence",
+      "```js",
+      "````",
+      "~~~",
+      "# inside a tilde fence",
+      "```",
+      "# still inside",
+      "~~~",
+      "# Two",
+      "",
+    ].join("\r\n");
+    assert.deepEqual(split("nested", doc), ["00-one.md", "01-two.md"]);
+  });
+});
+
+describe("split-md-sections.py cuts sections between page markers", () => {
+  it("copies the bytes between the markers, after a header naming the section", (t) => {
+    if (!python) return t.skip("no python interpreter available to run split-md-sections.py");
+    const res = splitWithMap("paged", PAGED, PAGED_MAP);
+    assert.equal(res.status, 0, res.stdout + res.stderr);
+    const header = (title) => `# ${title}\n\n*Part of: The Whole*\n\n---\n\n`;
+    assert.equal(section("paged", "a.md"), header("A") + "<!-- Page 1 -->\nUm é ação.\r\n");
+    assert.equal(section("paged", "b.md"), header("B") + "<!-- Page 3 -->\nthree\n");
+    // An open-ended section runs to the end of the document, less its final newline.
+    assert.equal(section("paged", "c.md"), header("C") + "<!-- Page 4 -->\nfour");
+  });
+
+  it("skips a section whose markers are missing and indexes the rest in map order", (t) => {
+    if (!python) return t.skip("no python interpreter available to run split-md-sections.py");
+    const res = splitWithMap("paged-index", PAGED, PAGED_MAP);
+    assert.equal(res.status, 0, res.stdout + res.stderr);
+    assert.match(res.stdout, /Section not found: Missing/);
+    assert.deepEqual(fs.readdirSync(path.join(dir, "paged-index")).sort(), [
+      "README.md",
+      "a.md",
+      "b.md",
+      "c.md",
+    ]);
+    const links = section("paged-index", "README.md").match(/^- .*$/gm);
+    assert.deepEqual(links, ["- [A](a.md)", "- [B](b.md)", "- [C](c.md)"]);
+  });
+});
+
+const PAGED_YAML = `title: Paged
+part_of: The Whole
+sections:
+  - {start_page: 1, end_page: 2, file: a.md, title: A}
+  - {start_page: 3, end_page: 2, file: b.md, title: B}
+  - {start_page: 4, file: c.md, title: C}
+  - {start_page: 9, end_page: 10, file: missing.md, title: Missing}
+`;
+
+describe("split-md-sections.py section maps", () => {
+  it("reads a YAML map as it reads the same map in JSON", (t) => {
+    if (!python) return t.skip("no python interpreter available to run split-md-sections.py");
+    const res = splitWithMap("yaml", PAGED, PAGED_YAML, "yaml.yaml");
+    if (!hasYaml) {
+      assert.equal(res.status, 1);
+      assert.match(res.stdout, /YAML section maps need PyYAML/);
+      return t.skip("PyYAML is not installed; checked the install hint instead");
+    }
+    assert.equal(res.status, 0, res.stdout + res.stderr);
+    assert.equal(splitWithMap("json", PAGED, PAGED_MAP).status, 0);
+    for (const file of ["README.md", "a.md", "b.md", "c.md"]) {
+      assert.equal(section("yaml", file), section("json", file), file);
+    }
+  });
+
+  it("refuses a map with neither sections nor headings", (t) => {
+    if (!python) return t.skip("no python interpreter available to run split-md-sections.py");
+    const res = splitWithMap("no-sections", PAGED, { title: "Nothing to cut" });
+    assert.equal(res.status, 1);
+    assert.match(res.stdout, /a section map needs a 'sections' list or a 'headings' level/);
+    assert.equal(fs.existsSync(path.join(dir, "no-sections")), false);
+  });
+
+  it("rewrites only the files whose content changed", (t) => {
+    if (!python) return t.skip("no python interpreter available to run split-md-sections.py");
+    assert.equal(splitWithMap("rerun", PAGED, PAGED_MAP).status, 0);
+    const out = path.join(dir, "rerun");
+    const old = new Date("2020-01-01T00:00:00Z");
+    for (const f of fs.readdirSync(out)) fs.utimesSync(path.join(out, f), old, old);
+    const again = splitWithMap("rerun", PAGED, PAGED_MAP);
+    assert.match(again.stdout, /\(0 created, 0 updated, 4 unchanged\)/);
+    const edited = splitWithMap("rerun", PAGED.replace("three", "THREE"), PAGED_MAP);
+    assert.match(edited.stdout, /\(0 created, 1 updated, 3 unchanged\)/);
+    const touched = fs
+      .readdirSync(out)
+      .filter((f) => fs.statSync(path.join(out, f)).mtimeMs !== old.getTime());
+    assert.deepEqual(touched, ["b.md"]);
+    assert.match(section("rerun", "b.md"), /THREE/);
+  });
+});
@@ -0,0 +1,133 @@
+// `docs/helper/translate-md.py` keeps every translation in a memory on disk and can run
+// many requests at once. Both are only safe while the document that comes out is the one
+// a plain serial run would have written, so this suite runs the offline translators
+// (`stub`, and `fake` with its injected latency) and compares what they write.
+//
+// Every check needs Python and skips cleanly without an interpreter.
+import { describe, it, before, after } from "node:test";
+import assert from "node:assert/strict";
+import fs from "node:fs";
+import os from "node:os";
+import path from "node:path";
+import { spawnSync } from "node:child_process";
+import { python, repoRoot, buildEnv } from "../lib/build-plugin-tree.mjs";
+
+const SCRIPT = path.join(repoRoot, "docs/helper/translate-md.py");
+
+// Ten pages with paragraphs, an image and a page number between them: 20 requests.
+const DOC = Array.from({ length: 10 }, (_, i) => i + 1)
+  .map(
+    (page) =>
+      `<!-- Page ${page} -->\n\n` +
+      `Primeiro paragrafo da pagina ${page}.\n\n` +
+      `![figura](images/p${page}.png)\n\n` +
+      `Segundo paragrafo da pagina ${page},\nem duas linhas.\n\n${page}\n`,
+  )
+  .join("\n");
+
+let dir;
+
+before(() => {
+  dir = fs.mkdtempSync(path.join(os.tmpdir(), "pbsrs-translate-"));
+  fs.writeFileSync(path.join(dir, "doc.md"), DOC);
+});
+
+after(() => fs.rmSync(dir, { recursive: true, force: true }));
+
+/** Translate doc.md into `out` with `args`; return the output and the request count. */
+function translate(out, ...args) {
+  return translateFrom("doc.md", out, ...args);
+}
+
+/** Translate `input`, a file in the suite's directory, into `out` with `args`. */
+function translateFrom(input, out, ...args) {
+  const res = spawnSync(python, ["-B", SCRIPT, path.join(dir, input), path.join(dir, out), ...args], {
+    encoding: "utf8",
+    env: buildEnv({ PYTHONIOENCODING: "utf-8" }),
+  });
+  assert.equal(res.status, 0, res.stdout + res.stderr);
+  const requests = Number(res.stdout.match(/^(\d+) requests/m)[1]);
+  return { text: fs.readFileSync(path.join(dir, out), "utf8"), requests, stdout: res.stdout };
+}
+
+describe("translate-md.py translation memory", () => {
+  it("never answers one translator's request with another's translation", (t) => {
+    if (!python) return t.skip("no python interpreter available to run translate-md.py");
+    const memory = path.join(dir, "memory.json");
+    const stub = translate("stub.md", "--translator", "stub", "--memory", memory);
+    assert.ok(stub.requests > 0);
+    assert.equal(translate("stub-again.md", "--translator", "stub", "--memory", memory).requests, 0);
+    const fake = translate("fake.md", "--translator", "fake", "--fake-latency", "0", "--memory", memory);
+    assert.equal(fake.requests, stub.requests, "the stub's entries are not the fake's");
+  });
+
+  it("evicts the least recently used entry beyond --memory-entries and keeps the rest", (t) => {
+    if (!python) return t.skip("no python interpreter available to run translate-md.py");
+    const memory = path.join(dir, "lru.json");
+    const docs = {
+      "one-two.md": "Um.\n\nDois.\n",
+      "one.md": "Um.\n",
+      "three-four.md": "Tres.\n\nQuatro.\n",
+    };
+    for (const [name, text] of Object.entries(docs)) fs.writeFileSync(path.join(dir, name), text);
+    const args = ["--translator", "stub", "--memory", memory, "--memory-entries", "3"];
+    const run = (input) => translateFrom(input, `lru-${input}`, ...args);
+    assert.equal(run("one-two.md").requests, 2);
+    // "Um." is used again, so "Dois." is now the least recently used of the two.
+    assert.equal(run("one.md").requests, 0);
+    const third = run("three-four.md");
+    assert.equal(third.requests, 2);
+    assert.match(third.stdout, /3 entries, 1 evicted/);
+    const kept = JSON.parse(fs.readFileSync(memory, "utf8")).entries.map(([, text]) => text);
+    // Stored least to most recently used.
+    assert.deepEqual(kept, ["[en] Um.", "[en] Tres.", "[en] Quatro."]);
+    assert.equal(run("one.md").requests, 0, "the recently used entry survived the eviction");
+    assert.equal(run("one-two.md").requests, 1, "only the evicted entry is requested again");
+  });
+});
+
+describe("translate-md.py --concurrency", () => {
+  // A short latency keeps the suite fast; what is checked is order and pacing, not speed.
+  const FAKE = ["--translator", "fake", "--fake-latency", "0.01"];
+
+  it("skips the memory for --translator fake, so every run sends every request", (t) => {
+    if (!python) return t.skip("no python interpreter available to run translate-md.py");
+    const first = translate("fake-1.md", ...FAKE, "--concurrency", "4");
+    const second = translate("fake-2.md", ...FAKE, "--concurrency", "4");
+    assert.equal(first.requests, 20);
+    assert.equal(second.requests, 20, "a second fake run is not answered from a memory");
+    assert.doesNotMatch(second.stdout, /Translation memory:/);
+  });
+
+  it("writes the same document in the same order as a serial run", (t) => {
+    if (!python) return t.skip("no python interpreter available to run translate-md.py");
+    const serial = translate("serial.md", ...FAKE, "--no-memory");
+    const concurrent = translate("concurrent.md", ...FAKE, "--no-memory", "--concurrency", "4");
+    assert.equal(concurrent.text, serial.text);
+    assert.equal(concurrent.requests, serial.requests);
+    const pages = [...concurrent.text.matchAll(/\[en\] Primeiro paragrafo da pagina (\d+)/g)];
+    assert.deepEqual(pages.map((m) => Number(m[1])), [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]);
+  });
+
+  it("holds every thread together to --rate requests per second", (t) => {
+    if (!python) return t.skip("no python interpreter available to run translate-md.py");
+    const started = performance.now();
+    const limited = translate("limited.md", ...FAKE, "--no-memory", "--concurrency", "4", "--rate", "20");
+    const elapsed = (performance.now() - started) / 1000;
+    // The bucket starts with one token per thread; every request past those waits its turn.
+    assert.ok(elapsed >= (limited.requests - 4) / 20, `${limited.requests} requests in ${elapsed} s`);
+    assert.equal(limited.text, translate("unlimited.md", ...FAKE, "--no-memory").text);
+  });
+
+  it("retries failed requests and still writes every block", (t) => {
+    if (!python) return t.skip("no python interpreter available to run translate-md.py");
+    const serial = translate("reliable.md", ...FAKE, "--no-memory");
+    const flaky = translate(
+      "flaky.md", ...FAKE, "--no-memory", "--concurrency", "4",
+      "--fake-failure-rate", "0.3", "--retries", "20", "--backoff", "0.0001",
+    );
+    const retried = Number(flaky.stdout.match(/\((\d+) retried\)/)[1]);
+    assert.equal(flaky.text, serial.text, "no block falls back to its source text");
+    assert.equal(flaky.requests, serial.requests + retried, "each retry is one more request");
+  });
+});
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""Benchmark build-plugin.py on a synthetic repository of any size.
+
+The real tree has one skill and a short CHANGELOG, so it cannot show how the build
+pipeline scales. This script generates a throwaway tree with N skills, M reference
+files per skill, a marketplace catalog of K plugins and a CHANGELOG with V versions,
+then times each phase against it:
+
+  validate       - build-plugin.validate() over every skill, cache disabled
+  marketplace    - build-plugin.validate_marketplace() over the K-entry catalog
+  package        - build-plugin.package() of the whole tree, cache disabled
+  notes          - build-plugin.extract_notes() for the oldest version, cache disabled
+
+Each phase runs in its own child process so that its peak RSS is its own, and is
+repeated --repeat times; the median wall time is reported with a throughput figure.
+Results are compared against a stored baseline, and a phase slower than the baseline
+by more than --tolerance fails the run, so a regression shows up before it reaches CI.
+
+Usage:
+  python scripts/bench-build-plugin.py [--skills 200] [--refs 5] [--plugins 50]
+                                       [--versions 200] [--repeat 3]
+  python scripts/bench-build-plugin.py --save-baseline      # record this machine's numbers
+  python scripts/bench-build-plugin.py --json results.json  # also write the results
+
+The baseline lives in .build-cache/bench-baseline.json by default. Timings are only
+comparable on the machine that recorded them, so it is never committed.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, so no peak RSS
+    resource = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# The entry point and the module that implements it.
+BUILD_SCRIPTS = ("build-plugin.py", "build_plugin.py")
+DEFAULT_BASELINE = REPO_ROOT / ".build-cache" / "bench-baseline.json"
+PHASES = ("validate", "marketplace", "package", "notes")
+
+# Roughly the shape of the real skill: a frontmatter block over a long body.
+_PARAGRAPH = (
+    "Every requirement traces back to a customer problem. The need states what the "
+    "software must provide, the functional requirement states how, and each link "
+    "is kept explicit so an auditor can walk the chain in either direction.\n\n"
+)
+
+
+def generate_tree(root: Path, skills: int, refs: int, plugins: int, versions: int) -> dict:
+    """Write a synthetic repository under `root`. Returns the sizes it was built with."""
+    (root / "scripts").mkdir(parents=True)
+    for script in BUILD_SCRIPTS:
+        shutil.copy2(REPO_ROOT / "scripts" / script, root / "scripts" / script)
+    (root / ".claude-plugin").mkdir()
+    manifest = {"name": "bench-plugin", "version": "1.0.0", "description": "synthetic"}
+    (root / ".claude-plugin" / "plugin.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    entries = [{"name": "bench-plugin", "source": "./", "description": "synthetic"}]
+    for index in range(plugins):
+        name = f"plugin-{index:04d}"
+        target = root / "plugins" / name / ".claude-plugin"
+        target.mkdir(parents=True)
+        (target / "plugin.json").write_text(
+            json.dumps({"name": name, "version": "1.0.0"}), encoding="utf-8"
+        )
+        entries.append({"name": name, "source": f"./plugins/{name}", "version": "1.0.0"})
+    catalog = {"name": "bench", "owner": {"name": "bench"}, "plugins": entries}
+    (root / ".claude-plugin" / "marketplace.json").write_text(
+        json.dumps(catalog, indent=2), encoding="utf-8"
+    )
+
+    for index in range(skills):
+        name = f"skill-{index:04d}"
+        skill_dir = root / "skills" / name
+        (skill_dir / "reference").mkdir(parents=True)
+        links = "".join(f"- [ref {r}](reference/ref-{r:03d}.md)\n" for r in range(refs))
+        (skill_dir / "SKILL.md").write_text(
+            f"---\nname: {name}\ndescription: Synthetic skill {index}.\nlicense: MIT\n"
+            f"metadata:\n  version: \"1.0\"\n---\n\n# {name}\n\n{links}\n" + _PARAGRAPH * 40,
+            encoding="utf-8",
+        )
+        for r in range(refs):
+            (skill_dir / "reference" / f"ref-{r:03d}.md").write_text(
+                f"# Reference {r}\n\n" + _PARAGRAPH * 20, encoding="utf-8"
+            )
+
+    (root / "agents" / "bench").mkdir(parents=True)
+    (root / "agents" / "bench" / "AGENT.md").write_text("# Agent\n", encoding="utf-8")
+    (root / "settings.json").write_text("{}\n", encoding="utf-8")
+    (root / "LICENSE").write_text("MIT\n", encoding="utf-8")
+    sections = [
+        f"## [1.{v}] - 2026-01-01\n\n### Added\n\n- Change {v}.\n\n" + _PARAGRAPH * 3
+        for v in range(versions, 0, -1)
+    ]
+    (root / "CHANGELOG.md").write_text(
+        "# Changelog\n\n## [Unreleased]\n\n" + "".join(sections), encoding="utf-8"
+    )
+    return {"skills": skills, "refs": refs, "plugins": plugins, "versions": versions}
+
+
+def _load_build_module(root: Path):
+    """Import the tree's own copy of build_plugin.py, so its paths resolve inside the tree."""
+    path = root / "scripts" / "build_plugin.py"
+    spec = importlib.util.spec_from_file_location("build_plugin", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _peak_rss_kb() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _tree_bytes(paths: list[Path]) -> int:
+    total = 0
+    for top in paths:
+        for path in [top] if top.is_file() else top.rglob("*"):
+            if path.is_file():
+                total += path.stat().st_size
+    return total
+
+
+def run_phase(root: Path, phase: str, repeat: int) -> dict:
+    """Run one phase `repeat` times in this process. Returns timings, throughput and RSS."""
+    bp = _load_build_module(root)
+    meta = bp.get_plugin_meta()
+    changelog = root / "CHANGELOG.md"
+    if phase == "validate":
+        units = sum(1 for p in (root / "skills").iterdir() if p.is_dir())
+        unit = "skills"
+
+        def work():
+            bp.validate(use_cache=False)
+
+    elif phase == "marketplace":
+        catalog = json.loads((root / ".claude-plugin" / "marketplace.json").read_text())
+        units = len(catalog["plugins"])
+        unit = "entries"
+
+        def work():
+            bp.validate_marketplace(meta)
+
+    elif phase == "package":
+        shipped = [root / rel for rel in bp.PACKAGE_INCLUDES if (root / rel).exists()]
+        units = _tree_bytes(shipped) / 1e6
+        unit = "MB"
+
+        def work():
+            bp.package(meta["version"], root / "dist", use_cache=False)
+
+    else:
+        # The oldest section is the worst case for a scan from the top of the file.
+        lines = changelog.read_text().splitlines()
+        headers = [line for line in lines if line.startswith("## [1.")]
+        version = headers[-1][4:].split("]")[0]
+        units = changelog.stat().st_size / 1e6
+        unit = "MB"
+
+        def work():
+            bp.extract_notes(version, use_cache=False)
+
+    seconds: list[float] = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            work()
+            seconds.append(time.perf_counter() - started)
+    median = statistics.median(seconds)
+    return {
+        "seconds": seconds,
+        "median": median,
+        "throughput": units / median if median else None,
+        "unit": f"{unit}/s",
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, floor: float) -> list[str]:
+    """The phases whose median is slower than the baseline's by more than `tolerance`.
+
+    A phase must also be slower by at least `floor` seconds: a 2 ms phase that takes 3 ms
+    is scheduler noise, not a regression.
+    """
+    regressions = []
+    for phase, result in results.items():
+        before = baseline.get("phases", {}).get(phase)
+        if not before:
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else 1.0
+        result["vs_baseline"] = ratio
+        if ratio > 1 + tolerance and result["median"] - before["median"] >= floor:
+            regressions.append(
+                f"{phase}: {result['median'] * 1000:.1f} ms vs baseline "
+                f"{before['median'] * 1000:.1f} ms ({(ratio - 1) * 100:+.0f}%)"
+            )
+    return regressions
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark build-plugin.py on a synthetic tree")
+    parser.add_argument("--skills", type=int, default=200)
+    parser.add_argument("--refs", type=int, default=5, help="reference files per skill")
+    parser.add_argument("--plugins", type=int, default=50, help="marketplace entries")
+    parser.add_argument("--versions", type=int, default=200, help="CHANGELOG sections")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--phase", action="append", choices=PHASES, help="run only these phases")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="record as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown ratio")
+    parser.add_argument(
+        "--floor-ms", type=float, default=5.0, help="ignore slowdowns smaller than this"
+    )
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the generated tree")
+    # Internal: run a single phase in this process against an existing tree.
+    parser.add_argument("--run-phase", choices=PHASES, help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_phase:
+        print(json.dumps(run_phase(Path(args.root), args.run_phase, args.repeat)))
+        return 0
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    root = Path(tempfile.mkdtemp(prefix="bench-build-plugin-"))
+    try:
+        sizes = generate_tree(root, args.skills, args.refs, args.plugins, args.versions)
+        print(
+            f"[bench] tree: {sizes['skills']} skills x {sizes['refs']} refs, "
+            f"{sizes['plugins']} catalog entries, {sizes['versions']} versions"
+        )
+        results: dict = {}
+        for phase in args.phase or PHASES:
+            command = [sys.executable, "-B", __file__, "--run-phase", phase]
+            command += ["--root", str(root), "--repeat", str(args.repeat)]
+            child = subprocess.run(command, capture_output=True, text=True)
+            if child.returncode != 0:
+                print(f"[bench] {phase} failed:\n{child.stdout}{child.stderr}", file=sys.stderr)
+                return 1
+            results[phase] = json.loads(child.stdout.strip().splitlines()[-1])
+    finally:
+        if args.keep:
+            print(f"[bench] tree kept at {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    baseline_path = Path(args.baseline)
+    try:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        baseline = {}
+    if baseline.get("sizes") not in (None, sizes):
+        print(f"[bench] baseline {baseline_path} was recorded for other sizes — not compared")
+        baseline = {}
+    regressions = compare(results, baseline, args.tolerance, args.floor_ms / 1000)
+
+    for phase, result in results.items():
+        rss = f"{result['peak_rss_kb'] / 1024:.1f} MiB" if result["peak_rss_kb"] else "n/a"
+        versus = ""
+        if "vs_baseline" in result:
+            versus = f", {(result['vs_baseline'] - 1) * 100:+.0f}% vs baseline"
+        print(
+            f"[bench] {phase:<12} {result['median'] * 1000:9.1f} ms  "
+            f"{result['throughput']:10.1f} {result['unit']:<10} peak RSS {rss}{versus}"
+        )
+
+    report = {"sizes": sizes, "python": sys.version.split()[0], "phases": results}
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[bench] baseline saved to {baseline_path}")
+    elif regressions:
+        print("::error::benchmark regression:\n  - " + "\n  - ".join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,2493 @@
+#!/usr/bin/env python3
+"""Build and validate the Problem-Based SRS plugin.
+
+This script powers the build & release pipeline. It can be run locally or from
+GitHub Actions. It performs eight things:
+
+  1. validate  - Validate plugin.json, the marketplace.json catalog (when present)
+                 every skills/*/SKILL.md frontmatter and every relative link and
+                 heading anchor under skills/, and (optionally) check version
+                 consistency against --expected-version.
+  2. notes     - Extract the CHANGELOG.md section for a given version.
+  3. package   - Bundle the distributable plugin into dist/<name>-v<version>.zip,
+                 with SHA-256 checksums beside it, and optionally a patch from an
+                 earlier archive (--delta-from).
+  4. apply     - Rebuild a full archive from a base archive and a patch.
+  5. verify    - Check an archive against the checksum manifest written with it.
+  6. watch     - Keep running and revalidate whatever changes under skills/,
+                 .claude-plugin/ or CHANGELOG.md, for authoring skills locally.
+  7. trace     - Check CP -> CN -> FR/NFR traceability in SRS specifications of
+                 any size, streamed a line at a time.
+  8. serve     - Answer validate/notes/package/build/trace/verify requests over a
+                 local socket from one warm process, with no interpreter start-up.
+
+Usage:
+  python scripts/build-plugin.py validate [--expected-version 1.3] [--no-cache] [--jobs N]
+  python scripts/build-plugin.py notes --version 1.3
+  python scripts/build-plugin.py notes --all [--format json]
+  python scripts/build-plugin.py package [--version 1.3] [--out-dir dist] [--no-cache] [--jobs N]
+  python scripts/build-plugin.py package --compression auto --report
+  python scripts/build-plugin.py package --format tar.xz
+  python scripts/build-plugin.py build --version 1.3    # validate + package + notes
+  python scripts/build-plugin.py package --delta-from dist/<name>-v1.2.zip
+  python scripts/build-plugin.py apply --base old.zip --patch new-from-old.patch.zip
+  python scripts/build-plugin.py watch [--expected-version 1.3] [--interval 0.05]
+  python scripts/build-plugin.py verify dist/<name>-v1.3.zip [--manifest FILE]
+  python scripts/build-plugin.py trace SPEC.md [SPEC.md ...] [--format json]
+  python scripts/build-plugin.py build --version 1.3 --timings timings.json [--profile]
+  python scripts/build-plugin.py serve [--socket PATH | --port N]
+
+Validation is incremental: each skill's result is cached in .build-cache/ against
+the content hash of SKILL.md, and the catalog's against every manifest it read, so
+only what changed is parsed again. CHANGELOG.md is indexed once per content
+hash (version -> byte range), so `notes` reads only the section it prints.
+A skill the cache cannot answer is read once: its hash (for the cache and
+skills-index.json) and its frontmatter come from the same bytes, and only the
+frontmatter block is parsed. --jobs N spreads those skills over N processes.
+Links are resolved against a single index of every file and heading under skills/,
+and that result is cached against every file the index was built from.
+The same pass that validates the skills writes .build-cache/skills-index.json: each
+skill's full frontmatter (nesting kept), SKILL.md size and SHA-256. The archive
+ships it at its root, so consumers read one file instead of parsing every skill.
+
+Packaging is incremental: compressed entries are kept in .build-cache/ keyed by
+the content hash of their source, so only changed files are re-deflated and an
+unchanged tree leaves the existing archive in place. Pass --no-cache to rebuild
+from scratch. Entries are deflated on --jobs worker threads and the archive is
+reproducible: sorted entries, fixed permissions and a fixed timestamp
+(SOURCE_DATE_EPOCH when set), so two builds of the same tree hash identically.
+Each zip entry is stored, fast-deflated or max-deflated by file type and size
+(--compression auto), and --report shows each entry's ratio and compression time.
+--format tar.gz / tar.xz writes an equally reproducible tarball instead, compressed
+as one stream, so it has no per-entry policy or report.
+That is what makes patches safe: --delta-from writes only the entries added or
+changed since an older archive, plus a deletion list, and `apply` rebuilds the
+new archive from the old one and checks it hashes exactly as the original did.
+Every archive gets <archive>.sha256 (sha256sum format: the archive, then each entry)
+and <archive>.manifest.json, from hashes taken while packaging anyway: the archive's
+as it is written, each entry's as its source is fingerprinted. `verify` reads an
+archive once, front to back, and checks both against the manifest without
+extracting anything.
+
+Every command but watch and serve takes --timings [FILE]: wall time, CPU time and bytes read
+and written for each phase it ran (manifest, marketplace, skills, links, archive,
+notes, trace, verify), as JSON on stderr or in FILE and, under GitHub Actions, as the
+`timings` output.
+--profile prints the hottest functions from cProfile to stderr.
+
+A served request is one line of JSON, {"argv": ["validate"]}, answered with one
+line holding the exit status, stdout and stderr the command line would have had;
+{"argv": ["shutdown"]} stops the server. Modules only some commands need
+(zipfile, concurrent.futures, ...) are imported where they are used, so a plain
+`validate` or `notes` does not pay for them either. scripts/build-plugin.py is only
+the command-line entry point: the implementation lives in this module so that it
+is imported, not run as __main__, and Python reuses its cached bytecode instead of
+compiling some 2,500 lines on every invocation.
+
+Exit code is non-zero on any validation failure.
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import contextlib
+import hashlib
+import json
+import os
+import posixpath
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+
+# Ensure UTF-8 output regardless of the host console codepage (e.g. Windows cp1252).
+for _stream in (sys.stdout, sys.stderr):
+    try:
+        _stream.reconfigure(encoding="utf-8")
+    except (AttributeError, ValueError):
+        pass
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PLUGIN_MANIFEST = REPO_ROOT / ".claude-plugin" / "plugin.json"
+MARKETPLACE_MANIFEST = REPO_ROOT / ".claude-plugin" / "marketplace.json"
+SKILLS_DIR = REPO_ROOT / "skills"
+CHANGELOG = REPO_ROOT / "CHANGELOG.md"
+CACHE_DIR = REPO_ROOT / ".build-cache"
+
+# Paths included in the distributable archive (relative to repo root).
+# The release ships only what the agent needs at runtime: the plugin manifest,
+# the agent definition, and the skills it orchestrates (plus LICENSE for
+# compliance). README, CHANGELOG, AGENTS.md, lockfiles, tests, build scripts,
+# and docs/helper files are intentionally excluded.
+PACKAGE_INCLUDES = [
+    ".claude-plugin",
+    "agents",
+    "skills",
+    "settings.json",
+    "LICENSE",
+]
+
+# Files the build generates into CACHE_DIR and ships at the archive root alongside
+# PACKAGE_INCLUDES. skills-index.json lists every skill with its full frontmatter, size
+# and hash, so a consumer reads one small file instead of parsing skills/*/SKILL.md.
+GENERATED_ENTRIES = [
+    "skills-index.json",
+]
+SKILLS_INDEX = CACHE_DIR / "skills-index.json"
+
+
+class BuildError(Exception):
+    """Raised when validation or packaging fails."""
+
+
+# Bytes this process reads and writes through the helpers below, for --timings. Packaging
+# threads add to it concurrently, hence the lock.
+_IO_LOCK = threading.Lock()
+_IO_BYTES = {"read": 0, "written": 0}
+# Phases recorded for --timings; `phases` stays None unless main() turns recording on.
+_TIMINGS: dict = {"phases": None, "open": None}
+
+
+def _count_io(read: int = 0, written: int = 0) -> None:
+    with _IO_LOCK:
+        _IO_BYTES["read"] += read
+        _IO_BYTES["written"] += written
+
+
+def _clock() -> tuple[float, float, int, int]:
+    """(wall seconds, CPU seconds, bytes read, bytes written) so far.
+
+    CPU time includes reaped child processes, so a --jobs validation pool is charged to
+    the phase that ran it.
+    """
+    children = os.times()
+    cpu = time.process_time() + children.children_user + children.children_system
+    with _IO_LOCK:
+        return time.perf_counter(), cpu, _IO_BYTES["read"], _IO_BYTES["written"]
+
+
+def _since(start: tuple[float, float, int, int]) -> dict:
+    now = _clock()
+    return {
+        "wall_ms": round((now[0] - start[0]) * 1000, 3),
+        "cpu_ms": round((now[1] - start[1]) * 1000, 3),
+        "bytes_read": now[2] - start[2],
+        "bytes_written": now[3] - start[3],
+    }
+
+
+@contextlib.contextmanager
+def _phase(name: str):
+    """Record one build phase for --timings. A phase opened inside another is folded into it."""
+    if _TIMINGS["phases"] is None or _TIMINGS["open"] is not None:
+        yield
+        return
+    _TIMINGS["open"] = name
+    start = _clock()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        _TIMINGS["open"] = None
+        _TIMINGS["phases"].append({"phase": name, **_since(start), "ok": ok})
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        data = path.read_bytes()
+        _count_io(read=len(data))
+        return json.loads(data.decode("utf-8"))
+    except FileNotFoundError as exc:
+        raise BuildError(f"Required file not found: {path}") from exc
+    except json.JSONDecodeError as exc:
+        raise BuildError(f"Invalid JSON in {path}: {exc}") from exc
+
+
+def _load_cache(path: Path, schema: int) -> dict:
+    """Read a JSON cache file. Anything missing, unreadable or from another schema is empty.
+
+    A cache is only ever an optimisation, so a corrupt one must cost a rebuild, never a
+    failed build.
+    """
+    try:
+        raw = path.read_bytes()
+        _count_io(read=len(raw))
+        data = json.loads(raw)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("schema") != schema:
+        return {}
+    return data
+
+
+def _save_cache(path: Path, data: dict) -> None:
+    """Write a JSON cache file atomically, so an interrupted build leaves the old one."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    tmp.write_bytes(raw)
+    _count_io(written=len(raw))
+    os.replace(tmp, path)
+
+
+def _stat_key(st: os.stat_result) -> list[int]:
+    """The (size, mtime) pair that lets a cache skip reading a file it has already hashed."""
+    return [st.st_size, st.st_mtime_ns]
+
+
+FRONTMATTER_CHUNK = 4096
+FRONTMATTER_MAX_BYTES = 64 * 1024
+
+
+def _read_frontmatter(path: Path) -> str:
+    """Read a file only as far as the end of its frontmatter block.
+
+    SKILL.md bodies run to tens of kilobytes and validation needs none of it, so the file
+    is read in small chunks until the closing '---' appears. A file with no opening
+    marker stops after the first chunk; one whose block never closes stops at
+    FRONTMATTER_MAX_BYTES. Either way _parse_frontmatter then reports the problem.
+    """
+    head = b""
+    closed = False
+    consumed = 0
+    with open(path, "rb") as fh:
+        while len(head) < FRONTMATTER_MAX_BYTES:
+            chunk = fh.read(FRONTMATTER_CHUNK)
+            if not chunk:
+                break
+            consumed += len(chunk)
+            head += chunk
+            if not head.startswith(b"---"[: len(head)]):
+                break
+            # Search from just before the new chunk, in case the marker straddles two reads.
+            end = head.find(b"\n---", max(3, len(head) - len(chunk) - 3))
+            if end != -1:
+                head, closed = head[: end + 4], True
+                break
+    _count_io(read=consumed)
+    # An unclosed prefix may end mid-character; only a complete block must decode cleanly.
+    return head.decode("utf-8", errors="strict" if closed else "ignore")
+
+
+def _cut_frontmatter(data: bytes) -> str:
+    """The frontmatter block of a file already in memory, decoded as _read_frontmatter would."""
+    end = data.find(b"\n---", 3, FRONTMATTER_MAX_BYTES) if data.startswith(b"---") else -1
+    if end == -1:
+        return data[:FRONTMATTER_CHUNK].decode("utf-8", errors="ignore")
+    return data[: end + 4].decode("utf-8")
+
+
+def _parse_frontmatter(text: str) -> dict:
+    """Parse a minimal YAML frontmatter block (key: value pairs)."""
+    if not text.startswith("---"):
+        raise BuildError("missing YAML frontmatter (file must start with '---')")
+    end = text.find("\n---", 3)
+    if end == -1:
+        raise BuildError("unterminated YAML frontmatter (missing closing '---')")
+    block = text[3:end].strip("\n")
+    data: dict[str, str] = {}
+    for line in block.splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        # only consider top-level keys (no indentation)
+        if line[0] in (" ", "\t"):
+            continue
+        if ":" not in line:
+            continue
+        key, _, value = line.partition(":")
+        data[key.strip()] = value.strip().strip('"').strip("'")
+    return data
+
+
+def _yaml_scalar(value: str):
+    """A frontmatter value: quotes stripped, a [flow, list] split into its items."""
+    value = value.strip()
+    if value.startswith("[") and value.endswith("]"):
+        return [_yaml_scalar(item) for item in value[1:-1].split(",") if item.strip()]
+    return value.strip('"').strip("'")
+
+
+def _parse_frontmatter_tree(text: str) -> dict:
+    """Parse the frontmatter block with its nesting: indented keys, '- item' lists.
+
+    _parse_frontmatter keeps only the top-level strings validation checks; the skills
+    index publishes the rest too (`metadata.version` and the like). Still a small subset
+    of YAML: every scalar is a string, and a list holds scalars only.
+    """
+    block = text[3 : text.find("\n---", 3)].strip("\n")
+    root: dict = {}
+    stack: list[tuple[int, dict | list]] = [(-1, root)]
+    pending: tuple[int, dict, str] | None = None  # a key whose value is the block below it
+    for line in block.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        indent = len(line) - len(line.lstrip())
+        is_item = stripped == "-" or stripped.startswith("- ")
+        if pending is not None:
+            key_indent, owner, key = pending
+            pending = None
+            if indent > key_indent or (indent == key_indent and is_item):
+                owner[key] = [] if is_item else {}
+                stack.append((indent, owner[key]))
+        while len(stack) > 1 and (
+            indent < stack[-1][0] or (isinstance(stack[-1][1], list) and not is_item)
+        ):
+            stack.pop()
+        container = stack[-1][1]
+        if isinstance(container, list):
+            container.append(_yaml_scalar(stripped[1:]))
+            continue
+        if ":" not in stripped:
+            continue
+        key, _, value = stripped.partition(":")
+        key = key.strip()
+        if value.strip():
+            container[key] = _yaml_scalar(value)
+        else:
+            container[key] = ""
+            pending = (indent, container, key)
+    return root
+
+
+def normalize_version(version: str) -> str:
+    """Normalize versions for comparison: strip leading 'v' and trailing '.0'."""
+    v = version.strip().lstrip("vV")
+    parts = v.split(".")
+    while len(parts) > 2 and parts[-1] == "0":
+        parts.pop()
+    return ".".join(parts)
+
+
+def get_plugin_meta() -> dict:
+    with _phase("manifest"):
+        meta = _read_json(PLUGIN_MANIFEST)
+    if not meta.get("name"):
+        raise BuildError("plugin.json is missing required field: name")
+    if not meta.get("version"):
+        raise BuildError("plugin.json is missing required field: version")
+    return meta
+
+
+MARKETPLACE_THREADS = 16
+# The last parse of each sourced manifest, by resolved path: (content hash, result). watch
+# (and anything else that validates repeatedly) re-parses only what changed, and the memo
+# holds one entry per source the catalog currently lists, however many edits it sees.
+_SOURCED_MANIFESTS: dict[str, tuple[str, dict | str]] = {}
+
+
+def _load_sourced_manifest(path: Path) -> dict | str | None:
+    """A sourced plugin.json: its parsed content, the JSON error as a string, or None if absent.
+
+    Runs on the catalog's thread pool, so a catalog of hundreds of entries waits on the
+    disk once per distinct source rather than once per entry in turn.
+    """
+    key = str(path)
+    try:
+        raw = path.read_bytes()
+    except (FileNotFoundError, NotADirectoryError):
+        _SOURCED_MANIFESTS.pop(key, None)
+        return None
+    _count_io(read=len(raw))
+    digest = hashlib.sha256(raw).hexdigest()
+    memo = _SOURCED_MANIFESTS.get(key)
+    if memo is not None and memo[0] == digest:
+        return memo[1]
+    try:
+        result: dict | str = json.loads(raw.decode("utf-8"))
+    except json.JSONDecodeError as exc:
+        result = str(exc)
+    _SOURCED_MANIFESTS[key] = (digest, result)
+    return result
+
+
+def validate_marketplace(plugin_meta: dict, consulted: list[Path] | None = None) -> list[str]:
+    """Validate .claude-plugin/marketplace.json, the catalog `/plugin marketplace add` reads.
+
+    The catalog is optional to the plugin itself, so an absent file is not an error.
+    When it is present it is the only thing standing between a reader and a working
+    `/plugin install`, and every field below is one Claude Code resolves at install time:
+    a source that points nowhere, an entry named something the repository does not
+    publish, or a pinned version that has drifted from plugin.json all fail on the
+    reader's machine rather than here. Returns a list of error strings.
+
+    Every manifest the check reads, or looks for and does not find, is appended to
+    `consulted`, so a cached result can tell when any of them changes.
+    """
+    if not MARKETPLACE_MANIFEST.exists():
+        print("[validate] no marketplace.json (catalog is optional) — skipped")
+        return []
+
+    if consulted is None:
+        consulted = []
+    consulted.extend([MARKETPLACE_MANIFEST, PLUGIN_MANIFEST])
+    errors: list[str] = []
+    catalog = _read_json(MARKETPLACE_MANIFEST)
+
+    name = catalog.get("name")
+    if not name:
+        errors.append("marketplace.json is missing required field: name")
+    owner = catalog.get("owner")
+    if not isinstance(owner, dict) or not owner.get("name"):
+        errors.append("marketplace.json is missing required field: owner.name")
+
+    plugins = catalog.get("plugins")
+    if not isinstance(plugins, list) or not plugins:
+        errors.append("marketplace.json must list at least one plugin")
+        return errors
+
+    # Relative sources resolve against the marketplace root — the directory holding
+    # .claude-plugin/, not .claude-plugin/ itself. Remote sources (github/url/npm) are
+    # fetched at install time and cannot be checked here. Every distinct manifest is
+    # loaded once, all of them concurrently, before any entry is checked.
+    root = REPO_ROOT.resolve()
+    manifests: dict[str, Path] = {}
+    for entry in plugins:
+        source = entry.get("source") if isinstance(entry, dict) else None
+        if isinstance(source, str) and source.startswith("./") and source not in manifests:
+            manifests[source] = (REPO_ROOT / source).resolve() / ".claude-plugin" / "plugin.json"
+    unique = sorted(
+        {path for path in manifests.values() if str(path).startswith(str(root))}, key=str
+    )
+    # A source dropped from the catalog is forgotten here, before the pool starts.
+    for stale in _SOURCED_MANIFESTS.keys() - {str(path) for path in unique}:
+        del _SOURCED_MANIFESTS[stale]
+    if len(unique) <= 1:
+        loaded = {path: _load_sourced_manifest(path) for path in unique}
+    else:
+        import concurrent.futures
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(MARKETPLACE_THREADS, len(unique))
+        ) as pool:
+            loaded = dict(zip(unique, pool.map(_load_sourced_manifest, unique)))
+    consulted.extend(unique)
+
+    for index, entry in enumerate(plugins):
+        label = f"marketplace.json plugins[{index}]"
+        if not isinstance(entry, dict):
+            errors.append(f"{label}: entry must be an object")
+            continue
+        entry_name = entry.get("name")
+        if not entry_name:
+            errors.append(f"{label}: missing required field: name")
+        source = entry.get("source")
+        if not source:
+            errors.append(f"{label}: missing required field: source")
+            continue
+
+        if isinstance(source, str):
+            if not source.startswith("./"):
+                errors.append(f"{label}: a path source must start with './' (got '{source}')")
+                continue
+            manifest = manifests[source]
+            if manifest not in loaded:
+                errors.append(f"{label}: source '{source}' escapes the marketplace root")
+                continue
+            sourced = loaded[manifest]
+            if sourced is None:
+                errors.append(
+                    f"{label}: source '{source}' has no .claude-plugin/plugin.json behind it"
+                )
+                continue
+            if isinstance(sourced, str):
+                errors.append(f"{label}: invalid JSON in {manifest}: {sourced}")
+                continue
+            if entry_name and sourced.get("name") != entry_name:
+                errors.append(
+                    f"{label}: entry name '{entry_name}' does not match the plugin at "
+                    f"source '{source}' (named '{sourced.get('name')}')"
+                )
+            if entry.get("version") is not None and entry["version"] != sourced.get("version"):
+                errors.append(
+                    f"{label}: pinned version '{entry['version']}' does not match "
+                    f"plugin.json ({sourced.get('version')}); a stale pin freezes updates"
+                )
+            if (
+                entry.get("description") is not None
+                and entry["description"] != sourced.get("description")
+            ):
+                errors.append(
+                    f"{label}: description has drifted from the plugin.json at source "
+                    f"'{source}'"
+                )
+
+    published = plugin_meta.get("name")
+    if published and not any(
+        isinstance(e, dict) and e.get("name") == published for e in plugins
+    ):
+        errors.append(
+            f"marketplace.json does not catalog '{published}', the plugin this repository "
+            "publishes — nothing an installer can reach"
+        )
+
+    if not errors:
+        print(f"[validate] marketplace OK: {name} ({len(plugins)} plugin(s))")
+    return errors
+
+
+VALIDATE_CACHE_SCHEMA = 2
+SKILLS_INDEX_SCHEMA = 1
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b""):
+            digest.update(chunk)
+            _count_io(read=len(chunk))
+    return digest.hexdigest()
+
+
+def _record_deps(paths: list[Path]) -> dict:
+    """Fingerprint the files a validation result was derived from (None for a missing one)."""
+    deps: dict = {}
+    for path in paths:
+        rel = path.relative_to(REPO_ROOT).as_posix()
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            deps[rel] = None
+            continue
+        deps[rel] = {"stat": _stat_key(st), "sha256": _sha256_file(path)}
+    return deps
+
+
+def _deps_unchanged(deps: dict) -> bool:
+    """True when every recorded dependency still has the content it was validated with.
+
+    A file whose size and mtime match is trusted without being read; one that was only
+    touched is re-hashed, and its new stat is written back so the next run trusts it again.
+    A dependency recorded as missing must still be missing.
+    """
+    for rel, dep in deps.items():
+        path = REPO_ROOT / rel
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            if dep is None:
+                continue
+            return False
+        if dep is None:
+            return False
+        if dep["stat"] == _stat_key(st):
+            continue
+        if _sha256_file(path) != dep["sha256"]:
+            return False
+        dep["stat"] = _stat_key(st)
+    return True
+
+
+def _validate_skill(
+    skill_dir: Path, data: bytes | None = None
+) -> tuple[list[str], bool, dict | None]:
+    """Validate one skills/<name>/SKILL.md, given as `data` if the caller already read it.
+
+    Returns (errors, whether the skill counts, its frontmatter with nesting kept), the last
+    None when there is no frontmatter to read.
+    """
+    skill_md = skill_dir / "SKILL.md"
+    if data is None and not skill_md.exists():
+        return [f"{skill_dir.name}: missing SKILL.md"], False, None
+    try:
+        text = _read_frontmatter(skill_md) if data is None else _cut_frontmatter(data)
+        fm = _parse_frontmatter(text)
+    except UnicodeDecodeError as exc:
+        reason = f"frontmatter is not valid UTF-8 ({exc.reason})"
+        return [f"{skill_dir.name}/SKILL.md: {reason}"], False, None
+    except BuildError as exc:
+        return [f"{skill_dir.name}/SKILL.md: {exc}"], False, None
+    errors: list[str] = []
+    name = fm.get("name")
+    if not name:
+        errors.append(f"{skill_dir.name}/SKILL.md: frontmatter missing 'name'")
+    elif name != skill_dir.name:
+        errors.append(
+            f"{skill_dir.name}/SKILL.md: name '{name}' does not match directory "
+            f"'{skill_dir.name}'"
+        )
+    if not fm.get("description"):
+        errors.append(f"{skill_dir.name}/SKILL.md: frontmatter missing 'description'")
+    return errors, True, _parse_frontmatter_tree(text)
+
+
+def _validate_skill_unit(skill_dir: Path, read: dict | None = None) -> dict:
+    """Fingerprint and validate one skill: the unit of work the validation pool runs.
+
+    The cache and the skills index both record the SHA-256 of the whole SKILL.md, so the
+    file is read once, in full, and the hash and the frontmatter both come from those
+    bytes. The stat is taken before the read, so an edit racing the validation leaves a
+    stale stat behind and is caught on the next run instead of being cached as checked.
+    The (stat, bytes) read are added to `read` by repository path, for validate_links.
+    """
+    skill_md = skill_dir / "SKILL.md"
+    rel = skill_md.relative_to(REPO_ROOT).as_posix()
+    data = None
+    try:
+        st = skill_md.stat()
+        data = skill_md.read_bytes()
+    except FileNotFoundError:
+        deps: dict = {rel: None}
+    else:
+        _count_io(read=len(data))
+        deps = {rel: {"stat": _stat_key(st), "sha256": hashlib.sha256(data).hexdigest()}}
+        if read is not None:
+            read[rel] = (st, data)
+    errors, counted, frontmatter = _validate_skill(skill_dir, data)
+    entry = None
+    if frontmatter is not None:
+        dep = deps[rel]
+        entry = {
+            "name": skill_dir.name,
+            "path": rel,
+            "size": dep["stat"][0],
+            "sha256": dep["sha256"],
+            "frontmatter": frontmatter,
+        }
+    return {"deps": deps, "errors": errors, "counted": counted, "index": entry}
+
+
+def _pooled_skill_unit(skill_dir: Path) -> tuple[dict, int]:
+    """_validate_skill_unit on a pool worker, plus the bytes it read for the parent to count."""
+    before = _IO_BYTES["read"]
+    result = _validate_skill_unit(skill_dir)
+    return result, _IO_BYTES["read"] - before
+
+
+def _validate_skills(
+    skill_dirs: list[Path], jobs: int, read: dict | None = None
+) -> list[dict]:
+    """Validate `skill_dirs`, on a process pool when `jobs` > 1, in the order given.
+
+    A serial run hands what it read to `read` (see _validate_skill_unit); a pooled one
+    read in other processes and has nothing to hand over.
+    """
+    if jobs <= 1 or len(skill_dirs) <= 1:
+        return [_validate_skill_unit(skill_dir, read) for skill_dir in skill_dirs]
+    import concurrent.futures
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        chunk = max(1, len(skill_dirs) // (jobs * 4))
+        pooled = list(pool.map(_pooled_skill_unit, skill_dirs, chunksize=chunk))
+    _count_io(read=sum(read for _, read in pooled))
+    return [result for result, _ in pooled]
+
+
+_LINK = re.compile(r"\[[^\]]*\]\(\s*([^)\s]+)")
+_LINK_DEFINITION = re.compile(r"^ {0,3}\[[^\]]+\]:\s*(\S+)")
+_HEADING = re.compile(r"^ {0,3}#{1,6}[ \t]+(.+?)(?:[ \t]+#+)?[ \t]*$")
+_HTML_ANCHOR = re.compile(r"""<a\s[^>]*?\b(?:name|id)=["']([^"']+)["']""", re.IGNORECASE)
+_CODE_SPAN = re.compile(r"`[^`]*`")
+# URLs with a scheme, protocol-relative URLs and site-absolute paths are not files under skills/.
+_NOT_RELATIVE = re.compile(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|/)")
+
+
+def _heading_slug(heading: str) -> str:
+    """The anchor GitHub renders for a heading: lowercase, punctuation dropped, spaces to '-'."""
+    text = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", heading)
+    text = re.sub(r"<[^>]+>|[`*]", "", text)
+    return re.sub(r"[^\w\- ]", "", text.lower()).replace(" ", "-")
+
+
+def _scan_markdown(text: str) -> tuple[set[str], list[tuple[int, str]]]:
+    """One pass over a Markdown file: (heading anchors, [(line, link target)]).
+
+    Fenced blocks and code spans are skipped, since a link there is an example. Repeated
+    headings get GitHub's '-1', '-2' suffixes; explicit <a name/id> anchors count too.
+    """
+    anchors: set[str] = set()
+    links: list[tuple[int, str]] = []
+    fence = ""
+    for number, line in enumerate(text.splitlines(), 1):
+        stripped = line.lstrip()
+        if stripped.startswith(("```", "~~~")):
+            if not fence:
+                fence = stripped[:3]
+            elif stripped.startswith(fence):
+                fence = ""
+            continue
+        if fence:
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            slug = _heading_slug(heading.group(1))
+            candidate, repeat = slug, 0
+            while candidate in anchors:
+                repeat += 1
+                candidate = f"{slug}-{repeat}"
+            anchors.add(candidate)
+        anchors.update(_HTML_ANCHOR.findall(line))
+        prose = _CODE_SPAN.sub("", line)
+        links.extend((number, match.group(1)) for match in _LINK.finditer(prose))
+        definition = _LINK_DEFINITION.match(prose)
+        if definition:
+            links.append((number, definition.group(1)))
+    return anchors, links
+
+
+def validate_links(deps: dict | None = None, read: dict | None = None) -> list[str]:
+    """Resolve every relative link in the Markdown under skills/, anchors included.
+
+    Every file and directory under skills/ is indexed in one walk, and every Markdown file
+    is read once for both its headings and its links, so resolving a link is a lookup
+    however many reference pages there are. A link that leaves skills/ is checked on disk.
+    The fingerprint of every file the result depends on is recorded into `deps`, taken as
+    the file is read. A file already in `read` ((stat, bytes) by repository path, as the
+    skills phase leaves them) is not read again. Returns a list of error strings.
+    """
+    from urllib.parse import unquote
+
+    if deps is None:
+        deps = {}
+    known: set[str] = {"."}
+    anchors: dict[str, set[str]] = {}
+    links: dict[str, list[tuple[int, str]]] = {}
+    for path in sorted(SKILLS_DIR.rglob("*")):
+        rel = path.relative_to(SKILLS_DIR).as_posix()
+        known.add(rel)
+        if path.suffix.lower() != ".md" or not path.is_file():
+            continue
+        repo_rel = path.relative_to(REPO_ROOT).as_posix()
+        if read and repo_rel in read:
+            st, data = read[repo_rel]
+        else:
+            st = path.stat()
+            data = path.read_bytes()
+            _count_io(read=len(data))
+        deps[repo_rel] = {
+            "stat": _stat_key(st),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+        anchors[rel], links[rel] = _scan_markdown(data.decode("utf-8", errors="replace"))
+
+    outside: dict[str, set[str] | None] = {}
+
+    def resolve_outside(dest: str) -> set[str] | None:
+        """Anchors of a target beyond skills/ (empty for a non-Markdown file, None if absent)."""
+        if dest not in outside:
+            path = Path(os.path.normpath(SKILLS_DIR / dest))
+            deps.update(_record_deps([path]))
+            if not path.exists():
+                outside[dest] = None
+            elif path.suffix.lower() == ".md" and path.is_file():
+                data = path.read_bytes()
+                _count_io(read=len(data))
+                outside[dest] = _scan_markdown(data.decode("utf-8", errors="replace"))[0]
+            else:
+                outside[dest] = set()
+        return outside[dest]
+
+    errors: list[str] = []
+    count = 0
+    depth = len(SKILLS_DIR.relative_to(REPO_ROOT).parts)
+    for rel, found in links.items():
+        base = posixpath.dirname(rel)
+        for number, target in found:
+            if _NOT_RELATIVE.match(target):
+                continue
+            count += 1
+            path, _, fragment = target.partition("#")
+            path, fragment = unquote(path), unquote(fragment)
+            dest = posixpath.normpath(posixpath.join(base, path)) if path else rel
+            where = f"{rel}:{number}"
+            if dest == ".." or dest.startswith("../"):
+                if dest.split("/").count("..") > depth:
+                    errors.append(f"{where}: link '{target}' escapes the repository")
+                    continue
+                targets = resolve_outside(dest)
+            elif dest in known:
+                targets = anchors.get(dest, set())
+            else:
+                targets = None
+            if targets is None:
+                errors.append(f"{where}: broken link '{target}' (no such file)")
+            elif fragment and dest.lower().endswith(".md") and not (
+                fragment in targets or fragment.lower() in targets
+            ):
+                errors.append(f"{where}: broken link '{target}' (no heading #{fragment})")
+
+    if not errors:
+        print(f"[validate] links OK: {count} link(s) across {len(links)} file(s)")
+    return errors
+
+
+def _skill_listing() -> str:
+    """A digest of every path under skills/, so adding or removing a file misses the cache."""
+    listing = sorted(path.relative_to(SKILLS_DIR).as_posix() for path in SKILLS_DIR.rglob("*"))
+    return hashlib.sha256("\n".join(listing).encode("utf-8")).hexdigest()
+
+
+def _load_validate_cache(use_cache: bool) -> tuple[str, dict]:
+    """(this script's hash, .build-cache/validate.json), empty if written by another script."""
+    script = _sha256_file(Path(__file__))
+    cache = _load_cache(CACHE_DIR / "validate.json", VALIDATE_CACHE_SCHEMA) if use_cache else {}
+    if cache.get("script") != script:
+        cache = {}
+    return script, cache
+
+
+def _skill_units(
+    skill_dirs: list[Path],
+    cached: dict,
+    use_cache: bool,
+    jobs: int = 1,
+    read: dict | None = None,
+) -> tuple[dict, int]:
+    """Every skill's unit result by directory name, and how many came from `cached`."""
+    seen: dict = {}
+    stale: list[Path] = []
+    for skill_dir in skill_dirs:
+        unit = cached.get(skill_dir.name)
+        if use_cache and unit is not None and _deps_unchanged(unit["deps"]):
+            seen[skill_dir.name] = unit
+        else:
+            stale.append(skill_dir)
+    for skill_dir, result in zip(stale, _validate_skills(stale, jobs, read)):
+        seen[skill_dir.name] = result
+    return seen, len(skill_dirs) - len(stale)
+
+
+def _write_skills_index(skill_dirs: list[Path], units: dict) -> None:
+    """Write SKILLS_INDEX from the skills' unit results, leaving it untouched if unchanged.
+
+    An unchanged file keeps its mtime, so the package cache trusts it without reading it.
+    """
+    index = {
+        "schema": SKILLS_INDEX_SCHEMA,
+        "skills": [
+            units[skill_dir.name]["index"]
+            for skill_dir in skill_dirs
+            if units[skill_dir.name]["index"] is not None
+        ],
+    }
+    raw = json.dumps(index, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    data = raw.encode("utf-8") + b"\n"
+    try:
+        current = SKILLS_INDEX.read_bytes()
+        _count_io(read=len(current))
+        if current == data:
+            return
+    except OSError:
+        pass
+    SKILLS_INDEX.parent.mkdir(parents=True, exist_ok=True)
+    tmp = SKILLS_INDEX.with_name(SKILLS_INDEX.name + ".tmp")
+    tmp.write_bytes(data)
+    _count_io(written=len(data))
+    os.replace(tmp, SKILLS_INDEX)
+
+
+def validate(
+    expected_version: str | None = None, use_cache: bool = True, jobs: int = 1
+) -> dict:
+    """Validate manifest + skills. Returns plugin meta on success.
+
+    With `use_cache`, results are reused from .build-cache/validate.json for every unit
+    whose inputs still hash the same: a skill against its SKILL.md, the catalog against
+    every manifest it consulted. The cache is keyed by this script's own hash as well, so
+    changing a rule revalidates everything. Skills that do need validating are spread
+    over `jobs` processes; errors are reported in directory order either way.
+    """
+    if jobs < 1:
+        raise BuildError(f"--jobs must be at least 1 (got {jobs})")
+    errors: list[str] = []
+    meta = get_plugin_meta()
+    print(f"[validate] plugin: {meta['name']} v{meta['version']}")
+
+    if expected_version is not None:
+        if normalize_version(meta["version"]) != normalize_version(expected_version):
+            errors.append(
+                f"version mismatch: plugin.json has {meta['version']} but expected "
+                f"{expected_version}"
+            )
+
+    if not SKILLS_DIR.is_dir():
+        raise BuildError(f"skills directory not found: {SKILLS_DIR}")
+
+    cache_path = CACHE_DIR / "validate.json"
+    script, cache = _load_validate_cache(use_cache)
+    hits = misses = 0
+
+    with _phase("marketplace"):
+        if MARKETPLACE_MANIFEST.exists() and use_cache:
+            cached = cache.get("marketplace")
+            if cached is not None and _deps_unchanged(cached["deps"]):
+                hits += 1
+                if not cached["errors"]:
+                    print("[validate] marketplace OK (cached)")
+                errors.extend(cached["errors"])
+            else:
+                misses += 1
+                consulted: list[Path] = []
+                found = validate_marketplace(meta, consulted)
+                cache["marketplace"] = {"deps": _record_deps(consulted), "errors": found}
+                errors.extend(found)
+        else:
+            errors.extend(validate_marketplace(meta))
+
+    with _phase("skills"):
+        skill_dirs = sorted(p for p in SKILLS_DIR.iterdir() if p.is_dir())
+        # The SKILL.md files a miss read in full; the links phase reuses them as they are.
+        read: dict = {}
+        seen, reused = _skill_units(
+            skill_dirs, cache.get("skills", {}), use_cache, jobs, read
+        )
+        hits += reused
+        misses += len(skill_dirs) - reused
+        _write_skills_index(skill_dirs, seen)
+
+        skill_count = 0
+        for skill_dir in skill_dirs:
+            result = seen[skill_dir.name]
+            errors.extend(result["errors"])
+            if result["counted"]:
+                skill_count += 1
+                print(f"[validate] skill OK: {skill_dir.name}")
+
+    with _phase("links"):
+        # Any file under skills/ can be a link target, so the unit depends on all of them.
+        listing = _skill_listing() if use_cache else None
+        cached = cache.get("links")
+        if (
+            use_cache
+            and cached is not None
+            and cached["listing"] == listing
+            and _deps_unchanged(cached["deps"])
+        ):
+            hits += 1
+            if not cached["errors"]:
+                print("[validate] links OK (cached)")
+            errors.extend(cached["errors"])
+        else:
+            misses += 1
+            deps: dict = {}
+            found = validate_links(deps, read)
+            cache["links"] = {"deps": deps, "listing": listing, "errors": found}
+            errors.extend(found)
+
+    if use_cache:
+        _save_cache(
+            cache_path,
+            {
+                "schema": VALIDATE_CACHE_SCHEMA,
+                "script": script,
+                "marketplace": cache.get("marketplace"),
+                "skills": seen,
+                "links": cache["links"],
+            },
+        )
+        print(f"[validate] cache: {hits} hit(s), {misses} miss(es)")
+
+    if skill_count == 0:
+        errors.append("no skills found under skills/")
+
+    if errors:
+        raise BuildError("validation failed:\n  - " + "\n  - ".join(errors))
+
+    print(f"[validate] success: {skill_count} skills validated")
+    return meta
+
+
+CHANGELOG_INDEX_SCHEMA = 1
+_CHANGELOG_HEADER = re.compile(rb"^## (.*)$", re.MULTILINE)
+
+
+def _changelog_sections(data: bytes) -> list[list]:
+    """Index CHANGELOG bytes in one pass: [normalized, as written, start, end] per section.
+
+    `start`/`end` bound the section body — everything between its '## ' header line and
+    the next one. Only the first section for a version is kept, which is the one release
+    notes have always been taken from.
+    """
+    sections: list[list] = []
+    seen: set[str] = set()
+    headers = list(_CHANGELOG_HEADER.finditer(data))
+    for number, match in enumerate(headers):
+        # match headers like: ## [1.3] - 2026-03-15  or  ## 1.3
+        header = match.group(1).decode("utf-8").strip()
+        token = header.split("]")[0].lstrip("[").split(" ")[0]
+        version = normalize_version(token)
+        if version in seen:
+            continue
+        seen.add(version)
+        end = headers[number + 1].start() if number + 1 < len(headers) else len(data)
+        sections.append([version, token, match.end(), end])
+    return sections
+
+
+def _changelog_index(use_cache: bool = True) -> list[list]:
+    """The CHANGELOG section index, rebuilt only when the file's content hash changes."""
+    if not CHANGELOG.exists():
+        raise BuildError(f"CHANGELOG.md not found: {CHANGELOG}")
+    cache_path = CACHE_DIR / "changelog-index.json"
+    st = CHANGELOG.stat()
+    cache = _load_cache(cache_path, CHANGELOG_INDEX_SCHEMA) if use_cache else {}
+    if cache.get("stat") == _stat_key(st):
+        return cache["sections"]
+    data = CHANGELOG.read_bytes()
+    _count_io(read=len(data))
+    sha = hashlib.sha256(data).hexdigest()
+    if cache.get("sha256") == sha:
+        sections = cache["sections"]
+    else:
+        sections = _changelog_sections(data)
+    if use_cache:
+        _save_cache(
+            cache_path,
+            {
+                "schema": CHANGELOG_INDEX_SCHEMA,
+                "stat": _stat_key(st),
+                "sha256": sha,
+                "sections": sections,
+            },
+        )
+    return sections
+
+
+def _section_notes(body: bytes) -> str:
+    return "\n".join(body.decode("utf-8").splitlines()).strip()
+
+
+def extract_notes(version: str, use_cache: bool = True) -> str:
+    """Extract the CHANGELOG.md section for the given version.
+
+    Looks the version up in the section index and reads only that byte range.
+    """
+    with _phase("notes"):
+        target = normalize_version(version)
+        notes = ""
+        for section_version, _, start, end in _changelog_index(use_cache):
+            if section_version == target:
+                with open(CHANGELOG, "rb") as fh:
+                    fh.seek(start)
+                    body = fh.read(end - start)
+                _count_io(read=len(body))
+                notes = _section_notes(body)
+                break
+        if not notes:
+            raise BuildError(
+                f"no CHANGELOG.md section found for version {version}. "
+                f"Add a '## [{target}] - YYYY-MM-DD' section."
+            )
+        return notes
+
+
+def extract_all_notes() -> list[dict]:
+    """Every CHANGELOG.md section in document order, from a single read of the file."""
+    with _phase("notes"):
+        if not CHANGELOG.exists():
+            raise BuildError(f"CHANGELOG.md not found: {CHANGELOG}")
+        data = CHANGELOG.read_bytes()
+        _count_io(read=len(data))
+        return [
+            {"version": token, "notes": _section_notes(data[start:end])}
+            for _, token, start, end in _changelog_sections(data)
+        ]
+
+
+# Identifier notation, as in .github/extensions/srs-navigator/lib/notation.mjs: canonical
+# dotted IDs (CP.01, CN.01.1, FR.01.1.1) and legacy hyphenated ones (CP-1, FR-001).
+_ID_LEVELS = r"[-.]\d+(?:\.\d+)*"
+_HEADING_ID = re.compile(
+    rf"\[((?:CP|CN|FR|NFR|P|N){_ID_LEVELS})\]|^\s*((?:CP|CN|FR|NFR|P|N){_ID_LEVELS})\b",
+    re.IGNORECASE,
+)
+_TRACE_REFS = {
+    "need": re.compile(rf"\b((?:CP|P){_ID_LEVELS})\b", re.IGNORECASE),
+    "fr": re.compile(rf"\b((?:CN|N){_ID_LEVELS})\b", re.IGNORECASE),
+    "nfr": re.compile(rf"\b((?:CN|N){_ID_LEVELS})\b", re.IGNORECASE),
+}
+# Top-level sections, tried in order; the fallback prefix names an item with no ID.
+_TRACE_SECTIONS = [
+    (re.compile(r"^#\s+(Customer\s+)?Problems?", re.IGNORECASE), "problem", "P"),
+    (re.compile(r"^#\s+(Customer\s+)?Needs?", re.IGNORECASE), "need", "N"),
+    (re.compile(r"^#\s+Functional\s*Requirements?", re.IGNORECASE), "fr", "FR"),
+    (re.compile(r"^#\s+Non-?Functional\s*Requirements?", re.IGNORECASE), "nfr", "NFR"),
+]
+_TRACE_TOP_HEADING = re.compile(r"^#\s+[^#]")
+_TRACE_LABELS = {"problem": "Problem", "need": "Need", "fr": "FR", "nfr": "NFR"}
+
+
+def _trace_spec(
+    path: Path, nodes: dict, edges: dict, counters: dict, duplicates: list[str]
+) -> None:
+    """Stream one specification into the ID indexes, a line at a time.
+
+    Follows parseSpecificationData: a '# Problems' / '# Needs' / '# Functional
+    Requirements' / '# Non-Functional Requirements' section holds one '### ' item per
+    node, and a need's or requirement's body references the IDs it traces to. Only the
+    IDs are kept — `nodes` maps each to (kind, file, line), `edges` each need or
+    requirement to the IDs it references — so memory follows the number of IDs, not the
+    size of the document. `counters` numbers the items of each kind that carry no ID.
+    """
+    kind = prefix = current = None
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        for number, line in enumerate(fh, 1):
+            if _TRACE_TOP_HEADING.match(line):
+                kind = prefix = current = None
+                for pattern, section_kind, fallback in _TRACE_SECTIONS:
+                    if pattern.match(line):
+                        kind, prefix = section_kind, fallback
+                        break
+                continue
+            if kind is None:
+                continue
+            if line.startswith("### "):
+                found = _HEADING_ID.search(line[4:].strip())
+                counters[kind] = counters.get(kind, 0) + 1
+                current = (
+                    (found.group(1) or found.group(2)).upper()
+                    if found
+                    else f"{prefix}-{counters[kind]}"
+                )
+                where = f"{path.name}:{number}"
+                if current in nodes:
+                    duplicates.append(
+                        f"{where}: {current} is already defined at {nodes[current][1]}"
+                    )
+                else:
+                    nodes[current] = (kind, where)
+                if kind != "problem":
+                    edges.setdefault(current, [])
+                continue
+            if current is not None and kind != "problem":
+                refs = edges[current]
+                for match in _TRACE_REFS[kind].finditer(line):
+                    ref = match.group(1).upper()
+                    if ref not in refs:
+                        refs.append(ref)
+    _count_io(read=path.stat().st_size)
+
+
+def trace(paths: list[Path]) -> dict:
+    """Check traceability across CP/CN/FR/NFR specifications. Returns the report.
+
+    Reports three kinds of gap: a reference to an ID no specification defines, a need
+    that references no problem, and a requirement that references no need. Problems and
+    needs may be defined in any of `paths`, in any order.
+    """
+    nodes: dict[str, tuple[str, str]] = {}
+    edges: dict[str, list[str]] = {}
+    counters: dict[str, int] = {}
+    duplicates: list[str] = []
+    with _phase("trace"):
+        for path in paths:
+            if not path.is_file():
+                raise BuildError(f"specification not found: {path}")
+            _trace_spec(path, nodes, edges, counters, duplicates)
+
+        dangling: list[str] = []
+        orphaned: list[str] = []
+        untraced: list[str] = []
+        for source, refs in edges.items():
+            kind = nodes[source][0]
+            target = "problem" if kind == "need" else "need"
+            if not refs:
+                (orphaned if kind == "need" else untraced).append(source)
+            for ref in refs:
+                if nodes.get(ref, ("",))[0] != target:
+                    dangling.append(
+                        f"{_TRACE_LABELS[kind]} {source} references non-existent {target} {ref}"
+                    )
+
+    counts = {kind: 0 for kind in _TRACE_LABELS}
+    for kind, _ in nodes.values():
+        counts[kind] += 1
+    return {
+        "counts": counts,
+        "links": sum(len(refs) for refs in edges.values()),
+        "duplicates": duplicates,
+        "dangling": dangling,
+        "orphaned_needs": orphaned,
+        "untraced_requirements": untraced,
+    }
+
+
+PACKAGE_CACHE_SCHEMA = 2
+PACKAGE_COMPRESS_LEVEL = zlib.Z_DEFAULT_COMPRESSION
+# How each entry may be compressed, and the deflate level each policy uses (None stores).
+COMPRESSION_POLICIES = {"store": None, "fast": 1, "default": PACKAGE_COMPRESS_LEVEL, "max": 9}
+# Formats whose content is already compressed: deflating them again costs time for nothing.
+STORED_SUFFIXES = frozenset(
+    {".gif", ".gz", ".jpeg", ".jpg", ".mp4", ".pdf", ".png", ".webp", ".woff2", ".xz", ".zip"}
+)
+# Below this, deflate's block header outweighs anything it saves.
+COMPRESSION_STORE_BELOW = 128
+# Above this, level 9 takes several times as long as level 1 for a percent or two.
+COMPRESSION_FAST_ABOVE = 1 << 20
+ARCHIVE_FORMATS = ("zip", "tar.gz", "tar.xz")
+# Every entry is a plain rw-r--r-- file stamped with the earliest time a zip can hold, so
+# the archive depends on file contents alone and not on the checkout that produced it.
+ARCHIVE_FILE_MODE = 0o100644
+ARCHIVE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+_ZIP_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_ZIP_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_ZIP_END_RECORD = struct.Struct("<IHHHHIIH")
+_ZIP_MAX_SIZE = 0xFFFFFFFF
+
+
+# One archive entry with its payload already compressed. collections rather than typing,
+# which is not otherwise imported and would cost every command its load time.
+_ZipMember = collections.namedtuple("_ZipMember", "arcname data crc size method")
+
+
+def _package_sources(name: str) -> list[tuple[Path, str]]:
+    """Every file PACKAGE_INCLUDES and GENERATED_ENTRIES ship, paired with its archive name."""
+    sources: list[tuple[Path, str]] = []
+    for rel in PACKAGE_INCLUDES:
+        src = REPO_ROOT / rel
+        if not src.exists():
+            continue
+        if src.is_file():
+            sources.append((src, f"{name}/{rel}"))
+        else:
+            for path in sorted(src.rglob("*")):
+                if path.is_file():
+                    sources.append((path, f"{name}/{path.relative_to(REPO_ROOT).as_posix()}"))
+    for generated in GENERATED_ENTRIES:
+        sources.append((CACHE_DIR / generated, f"{name}/{generated}"))
+    return sorted(sources, key=lambda source: source[1])
+
+
+def _refresh_skills_index(use_cache: bool) -> None:
+    """Bring SKILLS_INDEX up to date for packaging, from validation's cached skill results.
+
+    After a `validate` (or within `build`) every skill is a cache hit and nothing is read
+    but stat(); only a skill edited since, or a cold cache, has its frontmatter parsed.
+    """
+    skill_dirs = []
+    if SKILLS_DIR.is_dir():
+        skill_dirs = sorted(p for p in SKILLS_DIR.iterdir() if p.is_dir())
+    _, cache = _load_validate_cache(use_cache)
+    units, _ = _skill_units(skill_dirs, cache.get("skills", {}), use_cache)
+    _write_skills_index(skill_dirs, units)
+
+
+def _archive_date_time() -> tuple[int, ...]:
+    """The timestamp stamped on every entry: SOURCE_DATE_EPOCH when set, else 1980-01-01."""
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if not epoch:
+        return ARCHIVE_DATE_TIME
+    try:
+        stamp = time.gmtime(int(epoch))
+    except ValueError as exc:
+        raise BuildError(f"SOURCE_DATE_EPOCH must be an integer (got '{epoch}')") from exc
+    return max(tuple(stamp[:6]), ARCHIVE_DATE_TIME)
+
+
+def _deflate(data: bytes, level: int) -> tuple[int, bytes]:
+    """Compress one entry payload the way zipfile does: raw deflate, no zlib header."""
+    if not data:
+        return 0, b""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return 8, compressor.compress(data) + compressor.flush()
+
+
+def _compression_policy(arcname: str, size: int) -> str:
+    """The policy `--compression auto` picks for one entry, from its type and size."""
+    if size < COMPRESSION_STORE_BELOW or Path(arcname).suffix.lower() in STORED_SUFFIXES:
+        return "store"
+    if size > COMPRESSION_FAST_ABOVE:
+        return "fast"
+    return "max"
+
+
+def _compress(data: bytes, policy: str) -> tuple[int, bytes]:
+    """Compress one entry under `policy`, storing it instead when deflate does not shrink it."""
+    level = COMPRESSION_POLICIES[policy]
+    if level is None:
+        return 0, data
+    method, packed = _deflate(data, level)
+    if len(packed) >= len(data):
+        return 0, data
+    return method, packed
+
+
+def _dos_date_time(date_time: tuple[int, ...]) -> tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    return (
+        (max(year, 1980) - 1980) << 9 | month << 5 | day,
+        hour << 11 | minute << 5 | second // 2,
+    )
+
+
+class _HashingFile:
+    """A file wrapper that hashes and counts every byte read or written through it.
+
+    Lets an archive be hashed in the same pass that writes or reads it, instead of a
+    second full read of the file afterwards.
+    """
+
+    def __init__(self, fh) -> None:
+        self._fh = fh
+        self.digest = hashlib.sha256()
+        self.count = 0
+
+    def write(self, data: bytes) -> int:
+        self.digest.update(data)
+        self.count += len(data)
+        return self._fh.write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fh.read(size)
+        self.digest.update(data)
+        self.count += len(data)
+        return data
+
+    def flush(self) -> None:
+        self._fh.flush()
+
+
+def _write_zip(archive: Path, members: list[_ZipMember], date_time: tuple[int, ...]) -> str:
+    """Write `members` to `archive` in order, without compressing anything again.
+
+    zipfile can only store payloads it compresses itself, which is exactly the work the
+    package cache exists to skip, so the container is written directly. The archive is
+    assembled beside its destination and moved into place, so a failed build never leaves
+    a truncated zip where the last good one was. Returns the archive's SHA-256, taken from
+    the bytes as they are written.
+    """
+    tmp = archive.with_name(archive.name + ".tmp")
+    central: list[bytes] = []
+    offset = 0
+    date, clock = _dos_date_time(date_time)
+    with open(tmp, "wb") as raw:
+        fh = _HashingFile(raw)
+        for member in members:
+            name = member.arcname.encode("utf-8")
+            flags = 0 if member.arcname.isascii() else 0x800
+            if offset > _ZIP_MAX_SIZE or len(member.data) > _ZIP_MAX_SIZE:
+                raise BuildError(f"archive too large for a non-zip64 zip: {archive}")
+            header = _ZIP_LOCAL_HEADER.pack(
+                0x04034B50, 20, flags, member.method, clock, date,
+                member.crc, len(member.data), member.size, len(name), 0,
+            )
+            central.append(
+                _ZIP_CENTRAL_HEADER.pack(
+                    0x02014B50, 3 << 8 | 20, 20, flags, member.method, clock, date,
+                    member.crc, len(member.data), member.size, len(name), 0, 0, 0, 0,
+                    ARCHIVE_FILE_MODE << 16, offset,
+                )
+                + name
+            )
+            fh.write(header + name)
+            fh.write(member.data)
+            offset += len(header) + len(name) + len(member.data)
+        directory = b"".join(central)
+        fh.write(directory)
+        fh.write(
+            _ZIP_END_RECORD.pack(
+                0x06054B50, 0, 0, len(members), len(members), len(directory), offset, 0
+            )
+        )
+    _count_io(written=fh.count)
+    os.replace(tmp, archive)
+    return fh.digest.hexdigest()
+
+
+def _fingerprint(path: Path, record: dict | None) -> dict:
+    """Hash a source unless its size and mtime match the cached record, which is reused."""
+    st = path.stat()
+    if record is not None and record.get("stat") == _stat_key(st):
+        return record
+    data = path.read_bytes()
+    _count_io(read=len(data))
+    sha = hashlib.sha256(data).hexdigest()
+    if record is None or record.get("sha256") != sha:
+        record = {"sha256": sha, "crc": zlib.crc32(data), "size": len(data)}
+    return {**record, "stat": _stat_key(st)}
+
+
+def _load_or_deflate(
+    path: Path, record: dict, policy: str, blob: Path | None
+) -> tuple[int, bytes, float | None]:
+    """Return (method, payload, seconds compressing) for one entry, from the cache when it can.
+
+    The seconds are None for a cached entry. Runs on the packaging pool: zlib releases the
+    GIL while it deflates, so threads compress separate entries on separate cores without
+    the cost of a process pool.
+    """
+    if blob is not None and blob.exists():
+        data = blob.read_bytes()
+        _count_io(read=len(data))
+        # _compress only keeps a deflated payload that is smaller than the file.
+        return (8 if len(data) < record["size"] else 0), data, None
+    source = path.read_bytes()
+    _count_io(read=len(source))
+    started = time.perf_counter()
+    method, data = _compress(source, policy)
+    elapsed = time.perf_counter() - started
+    if blob is not None:
+        # Two sources with identical content share a blob; give each writer its own temp.
+        tmp = blob.with_name(f"{blob.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        _count_io(written=len(data))
+        os.replace(tmp, blob)
+    return method, data, elapsed
+
+
+def _write_tar(
+    archive: Path, sources: list[tuple[Path, str]], date_time: tuple[int, ...]
+) -> str:
+    """Write `sources` as a .tar.gz or .tar.xz, as reproducibly as _write_zip writes a zip.
+
+    Entries are plain 0644 files owned by uid/gid 0 with no user or group names, and every
+    timestamp (the gzip header's included) is `date_time`. The compressors are imported
+    here because a Python built without lzma can still package zips. Returns the
+    archive's SHA-256, taken from the compressed bytes as they are written.
+    """
+    import calendar
+    import io
+    import tarfile
+
+    mtime = calendar.timegm(tuple(date_time))
+    tmp = archive.with_name(archive.name + ".tmp")
+    with open(tmp, "wb") as out:
+        raw = _HashingFile(out)
+        if archive.name.endswith(".tar.gz"):
+            import gzip
+
+            stream = gzip.GzipFile(
+                filename="", mode="wb", fileobj=raw, compresslevel=9, mtime=mtime
+            )
+        else:
+            try:
+                import lzma
+            except ImportError as exc:
+                raise BuildError("--format tar.xz needs a Python built with lzma") from exc
+            stream = lzma.LZMAFile(raw, "wb", preset=9)
+        with stream, tarfile.open(fileobj=stream, mode="w", format=tarfile.PAX_FORMAT) as tar:
+            for path, arcname in sources:
+                data = path.read_bytes()
+                _count_io(read=len(data))
+                info = tarfile.TarInfo(arcname)
+                info.size, info.mtime, info.mode = len(data), mtime, ARCHIVE_FILE_MODE & 0o777
+                info.uid = info.gid = 0
+                info.uname = info.gname = ""
+                tar.addfile(info, io.BytesIO(data))
+    _count_io(written=raw.count)
+    os.replace(tmp, archive)
+    return raw.digest.hexdigest()
+
+
+def package(
+    version: str,
+    out_dir: Path,
+    use_cache: bool = True,
+    jobs: int | None = None,
+    compression: str = "auto",
+    fmt: str = "zip",
+    report: bool = False,
+) -> Path:
+    """Create dist/<name>-v<version>.zip (or .tar.gz / .tar.xz). Returns the archive path.
+
+    The cache under .build-cache/package/ maps every archive path to the content hash of
+    its source and keeps the compressed entry under that hash and its compression policy.
+    A file whose size and mtime are unchanged is not even read; one whose content is
+    unchanged is not re-deflated; and when no input changed at all the archive on disk is
+    left alone and reported as a hit. Entries are hashed and deflated on `jobs` threads
+    (default: one per CPU) and written in sorted order, so the bytes never depend on which
+    worker finished first.
+
+    `compression` is a policy from COMPRESSION_POLICIES for every entry, or "auto" to
+    pick one per entry with _compression_policy. A tarball is compressed as one stream,
+    so the policy only applies to zips. `report` prints each entry's ratio and the time
+    spent compressing it; it is refused for a tarball, which has no per-entry figures.
+    """
+    meta = get_plugin_meta()
+    with _phase("archive"):
+        if fmt not in ARCHIVE_FORMATS:
+            raise BuildError(f"unknown archive format '{fmt}' (expected one of {ARCHIVE_FORMATS})")
+        if report and fmt != "zip":
+            raise BuildError(
+                f"--report shows per-entry compression, which a {fmt} does not have: "
+                "it is compressed as one stream"
+            )
+        if compression != "auto" and compression not in COMPRESSION_POLICIES:
+            raise BuildError(f"unknown compression policy '{compression}'")
+        name = meta["name"]
+        out_dir.mkdir(parents=True, exist_ok=True)
+        archive = out_dir / f"{name}-v{normalize_version(version)}.{fmt}"
+        date_time = _archive_date_time()
+        if jobs is not None and jobs < 1:
+            raise BuildError(f"--jobs must be at least 1 (got {jobs})")
+
+        cache_dir = CACHE_DIR / "package"
+        blobs = cache_dir / "blobs"
+        cache = _load_cache(cache_dir / "manifest.json", PACKAGE_CACHE_SCHEMA) if use_cache else {}
+        known: dict = cache.get("files", {})
+        _refresh_skills_index(use_cache)
+        sources = _package_sources(name)
+
+        import concurrent.futures
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            records = list(
+                pool.map(lambda src: _fingerprint(src[0], known.get(src[1])), sources)
+            )
+            files = {arcname: record for (_, arcname), record in zip(sources, records)}
+            policies = [
+                compression if compression != "auto" else _compression_policy(arcname, rec["size"])
+                for (_, arcname), rec in zip(sources, records)
+            ]
+
+            inputs = hashlib.sha256(
+                json.dumps(
+                    [
+                        date_time,
+                        fmt,
+                        [
+                            [arcname, record["sha256"], policy]
+                            for (arcname, record), policy in zip(files.items(), policies)
+                        ],
+                    ]
+                ).encode("utf-8")
+            ).hexdigest()
+            archives: dict = cache.get("archives", {})
+            previous = archives.get(str(archive))
+            if (
+                previous is not None
+                and previous.get("inputs") == inputs
+                and "sha256" in previous
+                and archive.exists()
+                and previous.get("stat") == _stat_key(archive.stat())
+            ):
+                _write_checksums(archive, previous["sha256"], files)
+                print(f"[package] cache hit: {archive} is up to date ({len(sources)} files)")
+                return archive
+
+            payloads: list = []
+            if fmt == "zip":
+                if use_cache:
+                    blobs.mkdir(parents=True, exist_ok=True)
+                payloads = list(
+                    pool.map(
+                        lambda item: _load_or_deflate(
+                            item[0][0],
+                            item[1],
+                            item[2],
+                            blobs / f"{item[1]['sha256']}.{item[2]}" if use_cache else None,
+                        ),
+                        zip(sources, records, policies),
+                    )
+                )
+
+        if fmt == "zip":
+            members = [
+                _ZipMember(arcname, data, record["crc"], record["size"], method)
+                for (_, arcname), record, (method, data, _) in zip(sources, records, payloads)
+            ]
+            compressed = sum(1 for *_, seconds in payloads if seconds is not None)
+            digest = _write_zip(archive, members, date_time)
+        else:
+            started = time.perf_counter()
+            digest = _write_tar(archive, sources, date_time)
+            elapsed = time.perf_counter() - started
+        _write_checksums(archive, digest, files)
+
+        if use_cache:
+            # Drop blobs nothing in the current tree refers to, so the cache tracks the tree
+            # instead of growing with every revision it has ever seen.
+            live = {
+                f"{record['sha256']}.{policy}" for record, policy in zip(records, policies)
+            }
+            if fmt == "zip" and blobs.is_dir():
+                for blob in blobs.iterdir():
+                    if blob.name not in live:
+                        blob.unlink()
+            archives[str(archive)] = {
+                "inputs": inputs,
+                "stat": _stat_key(archive.stat()),
+                "sha256": digest,
+            }
+            _save_cache(
+                cache_dir / "manifest.json",
+                {"schema": PACKAGE_CACHE_SCHEMA, "files": files, "archives": archives},
+            )
+
+        source_bytes = sum(record["size"] for record in records)
+        if fmt != "zip":
+            size = archive.stat().st_size
+            print(
+                f"[package] wrote {archive} ({len(sources)} files, "
+                f"{size / max(source_bytes, 1):.1%} of {source_bytes} bytes "
+                f"in {elapsed * 1000:.1f} ms)"
+            )
+            return archive
+        if report:
+            _print_compression_report(members, policies, payloads)
+        print(
+            f"[package] wrote {archive} ({len(members)} files, {compressed} compressed, "
+            f"{len(members) - compressed} from cache)"
+        )
+        return archive
+
+
+def _print_compression_report(
+    members: list[_ZipMember], policies: list[str], payloads: list
+) -> None:
+    """One line per entry, slowest first: policy, size, stored size, ratio, time spent."""
+    rows = sorted(
+        zip(members, policies, (seconds for *_, seconds in payloads)),
+        key=lambda row: (-(row[2] or 0.0), row[0].arcname),
+    )
+    for member, policy, seconds in rows:
+        spent = "cached" if seconds is None else f"{seconds * 1000:.2f} ms"
+        ratio = len(member.data) / member.size if member.size else 1.0
+        print(
+            f"[package] {spent:>10}  {policy:<7} {member.size:>9} -> {len(member.data):>9} "
+            f"({ratio:6.1%})  {member.arcname}"
+        )
+    size = sum(member.size for member in members)
+    stored = sum(len(member.data) for member in members)
+    spent = sum(seconds or 0.0 for *_, seconds in payloads)
+    print(
+        f"[package] entries: {size} -> {stored} bytes ({stored / max(size, 1):.1%}), "
+        f"{spent * 1000:.1f} ms compressing"
+    )
+
+
+CHECKSUM_SCHEMA = 1
+
+
+def _checksum_paths(archive: Path) -> tuple[Path, Path]:
+    """Where package() writes the checksums for `archive`: (<archive>.sha256, .manifest.json)."""
+    return (
+        archive.with_name(archive.name + ".sha256"),
+        archive.with_name(archive.name + ".manifest.json"),
+    )
+
+
+def _write_checksums(archive: Path, digest: str, files: dict) -> None:
+    """Write the archive's checksum files from hashes packaging already computed.
+
+    `digest` was taken while the archive was written and every entry's hash while its
+    source was fingerprinted, so nothing is read again here. <archive>.sha256 is in
+    `sha256sum` format, the archive first and then every entry by its path inside it, so
+    `sha256sum -c` checks a download and, after unpacking beside it, the unpacked files.
+    <archive>.manifest.json holds the same hashes, with sizes, for `verify`.
+    """
+    text_path, json_path = _checksum_paths(archive)
+    text = "".join(
+        [f"{digest}  {archive.name}\n"]
+        + [f"{record['sha256']}  {arcname}\n" for arcname, record in files.items()]
+    )
+    manifest = {
+        "schema": CHECKSUM_SCHEMA,
+        "archive": {"name": archive.name, "size": archive.stat().st_size, "sha256": digest},
+        "entries": [
+            {"name": arcname, "size": record["size"], "sha256": record["sha256"]}
+            for arcname, record in files.items()
+        ],
+    }
+    raw = json.dumps(manifest, indent=2).encode("utf-8") + b"\n"
+    for path, data in ((text_path, text.encode("utf-8")), (json_path, raw)):
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        _count_io(written=len(data))
+        os.replace(tmp, path)
+
+
+def _stream_zip_entries(stream: _HashingFile, found: dict) -> None:
+    """Hash every entry of a zip read front to back through `stream`, without seeking.
+
+    Local headers are walked in file order and each payload is inflated a chunk at a time,
+    so memory stays flat however large an entry is. Stops at the central directory.
+    """
+    while True:
+        header = stream.read(_ZIP_LOCAL_HEADER.size)
+        if header[:4] != b"PK\x03\x04":
+            return
+        if len(header) < _ZIP_LOCAL_HEADER.size:
+            raise BuildError("archive is truncated")
+        _, _, flags, method, _, _, _, stored, _, name_len, extra_len = (
+            _ZIP_LOCAL_HEADER.unpack(header)
+        )
+        name = stream.read(name_len).decode("utf-8" if flags & 0x800 else "cp437")
+        stream.read(extra_len)
+        if flags & 0x08:
+            raise BuildError(f"{name}: sizes deferred to a data descriptor; cannot stream it")
+        if method not in (0, 8):
+            raise BuildError(f"{name}: unsupported compression method {method}")
+        inflater = zlib.decompressobj(-15) if method == 8 else None
+        digest = hashlib.sha256()
+        size = 0
+        remaining = stored
+        while remaining:
+            chunk = stream.read(min(remaining, 1 << 16))
+            if not chunk:
+                raise BuildError(f"{name}: archive is truncated")
+            remaining -= len(chunk)
+            if inflater is not None:
+                chunk = inflater.decompress(chunk)
+            digest.update(chunk)
+            size += len(chunk)
+        if inflater is not None:
+            tail = inflater.flush()
+            digest.update(tail)
+            size += len(tail)
+        found[name] = (size, digest.hexdigest())
+
+
+def _stream_tar_entries(stream: _HashingFile, compression: str, found: dict) -> None:
+    """Hash every file in a .tar.gz / .tar.xz read front to back through `stream`."""
+    import tarfile
+
+    with tarfile.open(fileobj=stream, mode=f"r|{compression}") as tar:
+        for info in tar:
+            if not info.isfile():
+                continue
+            member = tar.extractfile(info)
+            digest = hashlib.sha256()
+            size = 0
+            for chunk in iter(lambda: member.read(1 << 16), b""):
+                digest.update(chunk)
+                size += len(chunk)
+            found[info.name] = (size, digest.hexdigest())
+
+
+def verify(archive: Path, manifest: Path | None = None) -> None:
+    """Check `archive` against the checksum manifest package() wrote for it.
+
+    The archive is read exactly once, front to back: the same bytes feed the archive hash
+    and are unpacked in memory, a chunk at a time, into each entry's hash. Nothing is
+    extracted to disk. Raises BuildError listing every difference.
+    """
+    with _phase("verify"):
+        manifest = manifest or _checksum_paths(archive)[1]
+        expected = _read_json(manifest)
+        if expected.get("schema") != CHECKSUM_SCHEMA:
+            raise BuildError(f"{manifest} is not a checksum manifest this script understands")
+        found: dict[str, tuple[int, str]] = {}
+        try:
+            with open(archive, "rb") as fh:
+                stream = _HashingFile(fh)
+                if archive.name.endswith(".zip"):
+                    _stream_zip_entries(stream, found)
+                else:
+                    import tarfile
+
+                    compression = "gz" if archive.name.endswith(".tar.gz") else "xz"
+                    try:
+                        _stream_tar_entries(stream, compression, found)
+                    except (tarfile.TarError, EOFError) as exc:
+                        raise BuildError(f"cannot read archive {archive}: {exc}") from exc
+                while stream.read(1 << 16):
+                    pass
+        except (OSError, zlib.error) as exc:
+            raise BuildError(f"cannot read archive {archive}: {exc}") from exc
+        _count_io(read=stream.count)
+
+        errors: list[str] = []
+        whole = expected["archive"]
+        if (stream.count, stream.digest.hexdigest()) != (whole["size"], whole["sha256"]):
+            errors.append(
+                f"{archive.name}: sha256 {stream.digest.hexdigest()} ({stream.count} bytes), "
+                f"manifest has {whole['sha256']} ({whole['size']} bytes)"
+            )
+        wanted = {entry["name"]: (entry["size"], entry["sha256"]) for entry in expected["entries"]}
+        errors += [f"{name}: missing from the archive" for name in sorted(wanted.keys() - found)]
+        errors += [f"{name}: not in the manifest" for name in sorted(found.keys() - wanted)]
+        errors += [
+            f"{name}: content does not match the manifest"
+            for name in sorted(wanted.keys() & found.keys())
+            if wanted[name] != found[name]
+        ]
+        if errors:
+            raise BuildError(f"{archive} does not match {manifest}:\n  - " + "\n  - ".join(errors))
+    print(
+        f"[verify] OK: {archive} matches {manifest.name} "
+        f"({len(found)} entries, {stream.count} bytes read once)"
+    )
+
+
+PATCH_SCHEMA = 1
+PATCH_MANIFEST = "patch.json"
+
+
+def _read_zip(path: Path) -> tuple[list[_ZipMember], tuple[int, ...]]:
+    """Every entry of a zip with its payload exactly as stored, and the entries' timestamp.
+
+    zipfile parses the central directory; the payloads are read straight from the file,
+    without decompressing them, so they can be copied into another archive byte for byte.
+    """
+    import zipfile
+
+    try:
+        with zipfile.ZipFile(path) as zf:
+            infos = zf.infolist()
+    except (OSError, zipfile.BadZipFile) as exc:
+        raise BuildError(f"cannot read archive {path}: {exc}") from exc
+    members: list[_ZipMember] = []
+    with open(path, "rb") as fh:
+        for info in infos:
+            fh.seek(info.header_offset)
+            fields = _ZIP_LOCAL_HEADER.unpack(fh.read(_ZIP_LOCAL_HEADER.size))
+            if fields[0] != 0x04034B50:
+                raise BuildError(f"corrupt local header for {info.filename} in {path}")
+            fh.seek(fields[9] + fields[10], os.SEEK_CUR)
+            data = fh.read(info.compress_size)
+            _count_io(read=_ZIP_LOCAL_HEADER.size + fields[9] + fields[10] + len(data))
+            members.append(
+                _ZipMember(info.filename, data, info.CRC, info.file_size, info.compress_type)
+            )
+    return members, (infos[0].date_time if infos else ARCHIVE_DATE_TIME)
+
+
+def _entry_digest(member: _ZipMember) -> str:
+    """The content hash an entry is compared by: its stored payload and how it was stored."""
+    digest = hashlib.sha256(f"{member.method}:{member.crc}:{member.size}:".encode("ascii"))
+    digest.update(member.data)
+    return digest.hexdigest()
+
+
+def write_delta(base: Path, archive: Path) -> Path:
+    """Write the patch that turns the `base` archive into `archive`. Returns its path.
+
+    The patch holds every entry that was added or whose content changed, copied as
+    stored, plus patch.json with the deletion list and the SHA-256 of both archives.
+    Unchanged entries are identified by the hash of what is stored, so a level change
+    that re-deflates an entry ships it again, and `apply` can always rebuild `archive`
+    byte for byte.
+    """
+    with _phase("delta"):
+        if not base.is_file():
+            raise BuildError(f"--delta-from archive not found: {base}")
+        old = {member.arcname: _entry_digest(member) for member in _read_zip(base)[0]}
+        new, date_time = _read_zip(archive)
+        changed = [m for m in new if old.get(m.arcname) != _entry_digest(m)]
+        deleted = sorted(old.keys() - {member.arcname for member in new})
+        added = sum(1 for member in changed if member.arcname not in old)
+
+        # <name>-v2.6.zip from <name>-v2.5.zip -> <name>-v2.6-from-v2.5.patch.zip
+        name = archive.stem.rsplit("-v", 1)[0]
+        label = base.stem[len(name) + 1 :] if base.stem.startswith(f"{name}-v") else base.stem
+        patch = archive.with_name(f"{archive.stem}-from-{label}.patch.zip")
+        manifest = json.dumps(
+            {
+                "schema": PATCH_SCHEMA,
+                "base": {"name": base.name, "sha256": _sha256_file(base)},
+                "target": {"name": archive.name, "sha256": _sha256_file(archive)},
+                "date_time": list(date_time),
+                "deleted": deleted,
+            },
+            indent=2,
+            sort_keys=True,
+        ).encode("utf-8")
+        method, data = _deflate(manifest, PACKAGE_COMPRESS_LEVEL)
+        members = [
+            _ZipMember(PATCH_MANIFEST, data, zlib.crc32(manifest), len(manifest), method),
+            *changed,
+        ]
+        _write_zip(patch, members, date_time)
+    print(
+        f"[package] wrote delta {patch} ({added} added, {len(changed) - added} changed, "
+        f"{len(deleted)} deleted; {patch.stat().st_size} of {archive.stat().st_size} bytes)"
+    )
+    return patch
+
+
+def apply_delta(base: Path, patch: Path, out: Path | None = None) -> Path:
+    """Rebuild the full archive a patch was made for from `base`. Returns its path.
+
+    Both ends are checked against the hashes the patch recorded: the base before anything
+    is written, the result before it is reported, so a wrong base or a damaged patch never
+    leaves an archive behind that looks like a release.
+    """
+    with _phase("apply"):
+        if not base.is_file():
+            raise BuildError(f"base archive not found: {base}")
+        entries = _read_zip(patch)[0]
+        meta = next((m for m in entries if m.arcname == PATCH_MANIFEST), None)
+        if meta is None:
+            raise BuildError(f"{patch} is not a patch archive (no {PATCH_MANIFEST})")
+        raw = meta.data if meta.method == 0 else zlib.decompress(meta.data, -15)
+        manifest = json.loads(raw.decode("utf-8"))
+        if manifest.get("schema") != PATCH_SCHEMA:
+            raise BuildError(f"{patch}: unsupported patch schema {manifest.get('schema')}")
+        if _sha256_file(base) != manifest["base"]["sha256"]:
+            raise BuildError(
+                f"{base} is not the archive this patch was made from "
+                f"({manifest['base']['name']})"
+            )
+
+        members = {member.arcname: member for member in _read_zip(base)[0]}
+        for arcname in manifest["deleted"]:
+            members.pop(arcname, None)
+        for member in entries:
+            if member is not meta:
+                members[member.arcname] = member
+        target = out if out is not None else patch.with_name(manifest["target"]["name"])
+        target.parent.mkdir(parents=True, exist_ok=True)
+        _write_zip(target, [members[n] for n in sorted(members)], tuple(manifest["date_time"]))
+        sha = _sha256_file(target)
+        if sha != manifest["target"]["sha256"]:
+            target.unlink()
+            raise BuildError(
+                f"rebuilt archive hashes {sha}, not {manifest['target']['sha256']} as "
+                f"{manifest['target']['name']} did"
+            )
+    print(f"[apply] wrote {target} (sha256 {sha}, matches the patch)")
+    return target
+
+
+WATCH_INTERVAL = 0.05
+
+
+def _watch_snapshot(extra: list[Path]) -> dict[Path, list[int]]:
+    """Stat every file the watch loop revalidates from, plus each skill directory itself.
+
+    Skill directories are recorded with a constant key so that one appearing or
+    disappearing is a change even before it holds a file.
+    """
+    found: dict[Path, list[int]] = {}
+    for path in (PLUGIN_MANIFEST, MARKETPLACE_MANIFEST, CHANGELOG, *extra):
+        try:
+            found[path] = _stat_key(path.stat())
+        except OSError:
+            pass
+    if not SKILLS_DIR.is_dir():
+        return found
+    pending = [Path(entry.path) for entry in os.scandir(SKILLS_DIR) if entry.is_dir()]
+    for skill_dir in pending:
+        found[skill_dir] = [0, 0]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(Path(entry.path))
+                elif entry.is_file():
+                    found[Path(entry.path)] = _stat_key(entry.stat())
+    return found
+
+
+def _watch_units(path: Path) -> set[str]:
+    """The validation units a change to `path` can affect."""
+    if path == PLUGIN_MANIFEST:
+        return {"manifest", "marketplace", "changelog"}
+    if path == CHANGELOG:
+        return {"changelog"}
+    try:
+        rel = path.relative_to(SKILLS_DIR)
+    except ValueError:
+        # marketplace.json, or a manifest one of its entries sources
+        return {"marketplace"}
+    # Any file under skills/ can be a link source or target.
+    return {f"skill:{rel.parts[0]}", "links"}
+
+
+def watch(expected_version: str | None = None, interval: float = WATCH_INTERVAL) -> None:
+    """Revalidate on every save until interrupted.
+
+    The manifest, the catalog, each skill, the links under skills/ and the CHANGELOG
+    section for the manifest version are separate units whose results stay in memory; a
+    poll that finds a changed file re-runs only the units that file feeds, so a save
+    under one skill costs one frontmatter read and one pass of validate_links, however
+    many skills there are. Polling stat() keeps this to the standard library and behaves
+    the same on every platform and filesystem.
+    """
+    results: dict[str, list[str]] = {}
+    meta: dict = {}
+    consulted: list[Path] = []
+
+    def run(unit: str) -> list[str]:
+        if unit == "manifest":
+            meta.clear()
+            try:
+                meta.update(get_plugin_meta())
+            except BuildError as exc:
+                return [str(exc)]
+            if expected_version is not None and normalize_version(
+                meta["version"]
+            ) != normalize_version(expected_version):
+                return [
+                    f"version mismatch: plugin.json has {meta['version']} but expected "
+                    f"{expected_version}"
+                ]
+            return []
+        if unit == "links":
+            return validate_links()
+        if not meta:
+            return []  # the manifest unit already reports why nothing else can run
+        if unit == "marketplace":
+            consulted.clear()
+            try:
+                return validate_marketplace(meta, consulted)
+            except BuildError as exc:
+                return [str(exc)]
+        if unit == "changelog":
+            try:
+                extract_notes(meta["version"])
+            except BuildError as exc:
+                return [str(exc)]
+            return []
+        return _validate_skill(SKILLS_DIR / unit.split(":", 1)[1])[0]
+
+    def revalidate(units: set[str]) -> None:
+        started = time.perf_counter()
+        # The manifest first: every other unit reads the metadata it loads.
+        for unit in sorted(units, key=lambda u: (u != "manifest", u)):
+            if unit.startswith("skill:") and not (SKILLS_DIR / unit[6:]).is_dir():
+                results.pop(unit, None)
+                print(f"[watch] {unit[6:]}: removed")
+                continue
+            results[unit] = run(unit)
+            # Skill errors already lead with the skill's directory name.
+            label = unit[6:] if unit.startswith("skill:") else unit
+            prefix = "[watch]" if unit.startswith("skill:") else f"[watch] {unit}:"
+            for error in results[unit]:
+                print(f"{prefix} {error}")
+            if not results[unit]:
+                print(f"[watch] {label} OK")
+        errors = sum(len(found) for found in results.values())
+        if not any(unit.startswith("skill:") for unit in results):
+            errors += 1
+            print("[watch] no skills found under skills/")
+        elapsed = (time.perf_counter() - started) * 1000
+        state = "all OK" if not errors else f"{errors} error(s)"
+        print(f"[watch] revalidated {len(units)} unit(s) in {elapsed:.1f} ms: {state}", flush=True)
+
+    def track(current: dict[Path, list[int]]) -> dict[Path, list[int]]:
+        # The catalog may have started sourcing other manifests; watch those from here on.
+        # Anything else that changed while revalidating still differs from `current`.
+        for path in consulted:
+            if path not in current and path.exists():
+                current[path] = _stat_key(path.stat())
+        return current
+
+    snapshot = _watch_snapshot([])
+    revalidate(
+        {"manifest", "marketplace", "changelog", "links"}
+        | {unit for path in snapshot if path.parent == SKILLS_DIR for unit in _watch_units(path)}
+    )
+    snapshot = track(snapshot)
+    print(
+        f"[watch] watching {len(snapshot)} path(s) every {interval * 1000:.0f} ms; "
+        "Ctrl+C stops",
+        flush=True,
+    )
+    try:
+        while True:
+            time.sleep(interval)
+            current = _watch_snapshot(consulted)
+            if current == snapshot:
+                continue
+            changed = {
+                path
+                for path in snapshot.keys() | current.keys()
+                if snapshot.get(path) != current.get(path)
+            }
+            revalidate({unit for path in changed for unit in _watch_units(path)})
+            snapshot = track(current)
+    except KeyboardInterrupt:
+        print("[watch] stopped")
+
+
+# What `serve` answers. watch and serve never return, and apply is rare enough to start cold.
+SERVE_COMMANDS = ("validate", "notes", "package", "build", "trace", "verify")
+SERVE_SOCKET = CACHE_DIR / "serve.sock"
+# Every argument a served command reads or writes a file through. The server's working
+# directory means nothing to a client, so these resolve against REPO_ROOT and must stay in it.
+SERVE_PATH_ARGS = ("out_dir", "delta_from", "archive", "manifest", "specs", "timings")
+
+
+def _confine_to_repo(args: argparse.Namespace) -> None:
+    """Resolve a served command's path arguments against REPO_ROOT, refusing any outside it."""
+    root = REPO_ROOT.resolve()
+    for attr in SERVE_PATH_ARGS:
+        value = getattr(args, attr, None)
+        if value is None or value == "-":  # unset, or --timings to stderr
+            continue
+        resolved = []
+        for item in value if isinstance(value, list) else [value]:
+            path = (REPO_ROOT / item).resolve()
+            try:
+                path.relative_to(root)
+            except ValueError:
+                raise BuildError(
+                    f"'{item}' is outside the repository; served commands only read and "
+                    f"write under {root}"
+                ) from None
+            resolved.append(str(path))
+        setattr(args, attr, resolved if isinstance(value, list) else resolved[0])
+
+
+def _serve_request(argv: list[str]) -> dict:
+    """Run one command line through main() in this process, capturing what it prints."""
+    if not argv or argv[0] not in SERVE_COMMANDS:
+        return {
+            "status": 2,
+            "stdout": "",
+            "stderr": f"serve answers {', '.join(SERVE_COMMANDS)} only (got {argv[:1]})\n",
+        }
+    import io
+
+    out, err = io.StringIO(), io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        try:
+            status = main(argv, served=True)
+        except SystemExit as exc:  # argparse on a bad command line, or --help
+            status = exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+    return {
+        "status": status,
+        "stdout": out.getvalue(),
+        "stderr": err.getvalue(),
+        "ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+def serve(socket_path: Path | None = None, port: int | None = None) -> None:
+    """Answer build commands over a local socket until interrupted or sent `shutdown`.
+
+    Each request is one line of JSON, {"argv": ["validate", "--jobs", "4"]}, answered
+    with one line, {"status": 0, "stdout": ..., "stderr": ..., "ms": ...}, exactly as
+    the same command line would have exited and printed. A connection may send any
+    number of requests. The interpreter, this module and everything it memoizes stay
+    loaded between them, so a request costs the command and not a Python start-up.
+    Requests run one at a time: the commands share this module's state.
+
+    Listens on a Unix socket (default .build-cache/serve.sock) or, with `port`, on
+    127.0.0.1 only; port 0 picks a free one. Either way it is printed once listening.
+    The socket file is readable and writable by its owner only, but a port has no such
+    check: any local user can connect and run the commands above as this process's user.
+    Whoever the client is, every path it passes resolves against REPO_ROOT and must stay
+    inside it, so a request can neither read nor write elsewhere on the machine.
+    """
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    argv = request["argv"]
+                    if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv):
+                        raise TypeError("argv must be a list of strings")
+                except (ValueError, KeyError, TypeError) as exc:
+                    response = {"status": 2, "stdout": "", "stderr": f"bad request: {exc}\n"}
+                else:
+                    if argv == ["shutdown"]:
+                        # shutdown() waits for serve_forever(), which is waiting for us.
+                        threading.Thread(target=self.server.shutdown).start()
+                        response = {"status": 0, "stdout": "", "stderr": ""}
+                    else:
+                        response = _serve_request(argv)
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+    try:
+        if port is not None:
+            server = socketserver.TCPServer(("127.0.0.1", port), Handler)
+            where = "%s:%d" % server.server_address[:2]
+        else:
+            socket_path = socket_path or SERVE_SOCKET
+            if not hasattr(socketserver, "UnixStreamServer"):
+                raise BuildError("Unix sockets are not available here; pass --port")
+            socket_path.parent.mkdir(parents=True, exist_ok=True)
+            if socket_path.exists():
+                socket_path.unlink()  # left behind by a server that did not stop cleanly
+            server = socketserver.UnixStreamServer(str(socket_path), Handler)
+            os.chmod(socket_path, 0o600)
+            where = f"unix:{socket_path}"
+    except OSError as exc:
+        raise BuildError(f"cannot listen: {exc}") from exc
+
+    print(f"[serve] listening on {where}; answering {', '.join(SERVE_COMMANDS)}", flush=True)
+    try:
+        with server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if port is None:
+            socket_path.unlink(missing_ok=True)
+    print("[serve] stopped")
+
+
+def _resolve_version(arg_version: str | None) -> str:
+    if arg_version:
+        return normalize_version(arg_version)
+    return normalize_version(get_plugin_meta()["version"])
+
+
+def _write_github_output(key: str, value: str) -> None:
+    out = os.environ.get("GITHUB_OUTPUT")
+    if not out:
+        return
+    with open(out, "a", encoding="utf-8") as fh:
+        if "\n" in value:
+            delim = "EOF_BUILD_PLUGIN"
+            fh.write(f"{key}<<{delim}\n{value}\n{delim}\n")
+        else:
+            fh.write(f"{key}={value}\n")
+
+
+def _emit_timings(command: str, start: tuple, target: str) -> None:
+    """Write the --timings report: JSON to `target` ('-' for stderr) and a `timings` output.
+
+    A relative `target` is under REPO_ROOT, like every other path the CLI takes.
+    """
+    report = {"command": command, "phases": _TIMINGS["phases"], "total": _since(start)}
+    if target == "-":
+        print(json.dumps(report, indent=2), file=sys.stderr)
+    else:
+        (REPO_ROOT / target).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    _write_github_output("timings", json.dumps(report, separators=(",", ":")))
+
+
+def _print_profile(profiler) -> None:
+    import io
+    import pstats
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    print(out.getvalue(), file=sys.stderr)
+
+
+PROFILE_TOP = 25
+
+
+def _write_checksum_outputs(archive: Path) -> None:
+    """Publish the archive's SHA-256 and its checksum manifest as GitHub outputs."""
+    text_path, json_path = _checksum_paths(archive)
+    _write_github_output("sha256", text_path.read_text(encoding="utf-8").split()[0])
+    _write_github_output("manifest", str(json_path))
+
+
+def _package_from_args(args: argparse.Namespace, version: str) -> Path:
+    if args.delta_from and args.archive_format != "zip":
+        raise BuildError("--delta-from works on zip archives only")
+    return package(
+        version,
+        REPO_ROOT / args.out_dir,
+        use_cache=not args.no_cache,
+        jobs=args.jobs,
+        compression=args.compression,
+        fmt=args.archive_format,
+        report=args.report,
+    )
+
+
+def main(argv: list[str], served: bool = False) -> int:
+    parser = argparse.ArgumentParser(description="Build & validate the plugin")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    # Shared by every command that runs once and exits; watch never finishes a phase set.
+    measured = argparse.ArgumentParser(add_help=False)
+    measured.add_argument(
+        "--timings",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="FILE",
+        help="write per-phase wall/CPU time and bytes read/written as JSON (default: stderr)",
+    )
+    measured.add_argument(
+        "--profile", action="store_true", help="print the hottest functions to stderr"
+    )
+
+    p_val = sub.add_parser(
+        "validate", parents=[measured], help="validate manifest and skills"
+    )
+    p_val.add_argument("--expected-version", default=None)
+    p_val.add_argument("--no-cache", action="store_true", help="revalidate every unit")
+    p_val.add_argument("--jobs", type=int, default=1, help="validation processes")
+
+    p_notes = sub.add_parser(
+        "notes", parents=[measured], help="print CHANGELOG notes for a version"
+    )
+    p_notes.add_argument("--version", default=None)
+    p_notes.add_argument("--all", action="store_true", help="every section, in one pass")
+    p_notes.add_argument("--format", choices=("text", "json"), default="text")
+    p_notes.add_argument("--no-cache", action="store_true", help="rebuild the CHANGELOG index")
+
+    p_pkg = sub.add_parser("package", parents=[measured], help="package the distributable zip")
+    p_pkg.add_argument("--version", default=None)
+    p_pkg.add_argument("--out-dir", default="dist")
+    p_pkg.add_argument("--no-cache", action="store_true", help="rebuild every entry")
+    p_pkg.add_argument("--jobs", type=int, default=None, help="compression threads")
+    p_pkg.add_argument(
+        "--delta-from", default=None, metavar="ZIP", help="also write a patch from this archive"
+    )
+    p_pkg.add_argument(
+        "--compression",
+        choices=("auto", *COMPRESSION_POLICIES),
+        default="auto",
+        help="per-entry policy; auto picks store/fast/max by file type and size",
+    )
+    p_pkg.add_argument(
+        "--format", dest="archive_format", choices=ARCHIVE_FORMATS, default="zip"
+    )
+    p_pkg.add_argument(
+        "--report", action="store_true", help="print each entry's ratio and compression time"
+    )
+
+    p_build = sub.add_parser("build", parents=[measured], help="validate + package + emit notes")
+    p_build.add_argument("--version", default=None)
+    p_build.add_argument("--out-dir", default="dist")
+    p_build.add_argument("--no-cache", action="store_true", help="rebuild every entry")
+    p_build.add_argument("--jobs", type=int, default=None, help="compression threads")
+    p_build.add_argument(
+        "--delta-from", default=None, metavar="ZIP", help="also write a patch from this archive"
+    )
+    p_build.add_argument(
+        "--compression",
+        choices=("auto", *COMPRESSION_POLICIES),
+        default="auto",
+        help="per-entry policy; auto picks store/fast/max by file type and size",
+    )
+    p_build.add_argument(
+        "--format", dest="archive_format", choices=ARCHIVE_FORMATS, default="zip"
+    )
+    p_build.add_argument(
+        "--report", action="store_true", help="print each entry's ratio and compression time"
+    )
+
+    p_apply = sub.add_parser(
+        "apply", parents=[measured], help="rebuild a full archive from a base and a patch"
+    )
+    p_apply.add_argument("--base", required=True, help="the archive the patch was made from")
+    p_apply.add_argument("--patch", required=True, help="a *.patch.zip from --delta-from")
+    p_apply.add_argument("--out", default=None, help="default: next to the patch, named as built")
+
+    p_verify = sub.add_parser(
+        "verify", parents=[measured], help="check an archive against its checksum manifest"
+    )
+    p_verify.add_argument("archive", help="a zip or tarball written by package")
+    p_verify.add_argument(
+        "--manifest", default=None, help="default: <archive>.manifest.json beside it"
+    )
+
+    p_trace = sub.add_parser(
+        "trace", parents=[measured], help="check CP/CN/FR/NFR traceability in specifications"
+    )
+    p_trace.add_argument("specs", nargs="+", help="Markdown specification file(s)")
+    p_trace.add_argument("--format", choices=("text", "json"), default="text")
+
+    p_watch = sub.add_parser("watch", help="revalidate on every change until interrupted")
+    p_watch.add_argument("--expected-version", default=None)
+    p_watch.add_argument(
+        "--interval", type=float, default=WATCH_INTERVAL, help="seconds between polls"
+    )
+
+    p_serve = sub.add_parser("serve", help="answer build commands over a local socket")
+    where = p_serve.add_mutually_exclusive_group()
+    where.add_argument("--socket", default=None, help="Unix socket (default: .build-cache/)")
+    where.add_argument("--port", type=int, default=None, help="listen on 127.0.0.1 instead")
+
+    args = parser.parse_args(argv)
+    if served:
+        try:
+            _confine_to_repo(args)
+        except BuildError as exc:
+            print(f"::error::{exc}", file=sys.stderr)
+            return 1
+    timings = getattr(args, "timings", None)
+    if timings is not None:
+        _TIMINGS["phases"] = []
+    start = _clock()
+    profiler = None
+    if getattr(args, "profile", False):
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    try:
+        if args.command == "validate":
+            validate(args.expected_version, use_cache=not args.no_cache, jobs=args.jobs)
+        elif args.command == "notes" and args.all:
+            sections = extract_all_notes()
+            if args.format == "json":
+                print(json.dumps(sections, indent=2, ensure_ascii=False))
+            else:
+                print("\n\n".join(f"## [{s['version']}]\n\n{s['notes']}" for s in sections))
+        elif args.command == "notes":
+            version = _resolve_version(args.version)
+            notes = extract_notes(version, use_cache=not args.no_cache)
+            if args.format == "json":
+                print(json.dumps({"version": version, "notes": notes}, ensure_ascii=False))
+            else:
+                print(notes)
+            _write_github_output("notes", notes)
+            _write_github_output("version", version)
+        elif args.command == "package":
+            version = _resolve_version(args.version)
+            archive = _package_from_args(args, version)
+            _write_github_output("artifact", str(archive))
+            _write_github_output("version", version)
+            _write_checksum_outputs(archive)
+            if args.delta_from:
+                patch = write_delta(REPO_ROOT / args.delta_from, archive)
+                _write_github_output("delta", str(patch))
+        elif args.command == "build":
+            version = _resolve_version(args.version)
+            validate(expected_version=version, use_cache=not args.no_cache)
+            archive = _package_from_args(args, version)
+            notes = extract_notes(version)
+            _write_github_output("artifact", str(archive))
+            _write_github_output("version", version)
+            _write_github_output("notes", notes)
+            _write_checksum_outputs(archive)
+            if args.delta_from:
+                patch = write_delta(REPO_ROOT / args.delta_from, archive)
+                _write_github_output("delta", str(patch))
+            print(f"[build] success: v{version} -> {archive}")
+        elif args.command == "apply":
+            out = REPO_ROOT / args.out if args.out else None
+            target = apply_delta(REPO_ROOT / args.base, REPO_ROOT / args.patch, out)
+            _write_github_output("artifact", str(target))
+        elif args.command == "verify":
+            manifest = REPO_ROOT / args.manifest if args.manifest else None
+            verify(REPO_ROOT / args.archive, manifest)
+        elif args.command == "trace":
+            report = trace([REPO_ROOT / spec for spec in args.specs])
+            if args.format == "json":
+                print(json.dumps(report, indent=2))
+            else:
+                counts = report["counts"]
+                print(
+                    f"[trace] {counts['problem']} problem(s), {counts['need']} need(s), "
+                    f"{counts['fr']} FR, {counts['nfr']} NFR; {report['links']} link(s)"
+                )
+            gaps = (
+                report["duplicates"]
+                + report["dangling"]
+                + [
+                    f"Need {need} is orphaned: it references no problem"
+                    for need in report["orphaned_needs"]
+                ]
+                + [
+                    f"{req} is untraced: it references no need"
+                    for req in report["untraced_requirements"]
+                ]
+            )
+            if gaps:
+                raise BuildError("traceability check failed:\n  - " + "\n  - ".join(gaps))
+            if args.format == "text":
+                print("[trace] OK: every need traces to a problem, every requirement to a need")
+        elif args.command == "watch":
+            watch(args.expected_version, args.interval)
+        elif args.command == "serve":
+            serve(REPO_ROOT / args.socket if args.socket else None, args.port)
+    except BuildError as exc:
+        print(f"::error::{exc}", file=sys.stderr)
+        return 1
+    finally:
+        # A failed build is reported too: the slow step is often the one that broke.
+        if profiler is not None:
+            profiler.disable()
+            _print_profile(profiler)
+        if timings is not None:
+            _emit_timings(args.command, start, timings)
+            _TIMINGS["phases"] = None  # a served request must not record into the next one
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))